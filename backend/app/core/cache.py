@@ -0,0 +1,222 @@
+import asyncio
+import functools
+import hashlib
+import json
+import logging
+import time
+import uuid
+from datetime import date, datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable
+
+import redis.asyncio as redis
+from fastapi.encoders import jsonable_encoder
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Tags bumped by writes; a cached response lists the tags its data comes from
+TAG_MATCHES = "matches"
+TAG_TEAMS = "teams"
+TAG_SEASONS = "seasons"
+STATISTICS_TAGS = (TAG_MATCHES, TAG_TEAMS, TAG_SEASONS)
+
+# Endpoint arguments of these types become part of the cache key (sessions and users do not)
+KEY_TYPES = (str, int, float, bool, uuid.UUID, datetime, date, type(None))
+
+# How often a request waiting on another worker's recompute checks for the result
+FILL_POLL_SECONDS = 0.05
+
+# After a Redis error the cache is bypassed for this long instead of failing every request
+RETRY_AFTER_SECONDS = 30
+
+# Deletes the fill lock only if it still holds our token (it may have expired and been re-taken)
+RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+class ResponseCache:
+    """Redis cache for JSON endpoint responses
+
+    Entries are keyed by endpoint namespace, the endpoint's scalar arguments
+    and the current version of every tag the entry depends on. Invalidating
+    a tag increments its version, so every entry built from older data stops
+    being addressed at once and expires with its TTL; a recompute that
+    started before the write can only store under the old version.
+
+    A miss is recomputed once: concurrent requests in the same process wait
+    on the first one, and other processes wait on a ``SET NX`` fill lock
+    until the entry appears (or the lock disappears or times out). Any Redis
+    failure makes the cache step aside and the endpoint run uncached.
+    """
+
+    def __init__(self, url: str = settings.REDIS_URL, prefix: str = "cache"):
+        self.url = url
+        self.prefix = prefix
+        self._client = None
+        self._client_loop = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._inflight_loop = None
+        self._retry_at = 0.0
+
+    def _get_client(self):
+        # Celery tasks run each job in a fresh event loop; connections cannot be shared across loops
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = redis.from_url(
+                self.url,
+                socket_timeout=settings.RESPONSE_CACHE_SOCKET_TIMEOUT,
+                socket_connect_timeout=settings.RESPONSE_CACHE_SOCKET_TIMEOUT
+            )
+            self._client_loop = loop
+        return self._client
+
+    def _get_inflight(self) -> Dict[str, asyncio.Future]:
+        loop = asyncio.get_running_loop()
+        if self._inflight_loop is not loop:
+            self._inflight = {}
+            self._inflight_loop = loop
+        return self._inflight
+
+    @property
+    def available(self) -> bool:
+        return settings.RESPONSE_CACHE_ENABLED and time.monotonic() >= self._retry_at
+
+    def _failed(self, operation: str, error: Exception) -> None:
+        self._retry_at = time.monotonic() + RETRY_AFTER_SECONDS
+        logger.warning(f"Response cache {operation} failed, bypassing cache for {RETRY_AFTER_SECONDS}s: {str(error)}")
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.prefix}:tag:{tag}"
+
+    async def _entry_key(self, client, namespace: str, params: Dict[str, Any], tags: Iterable[str]) -> str:
+        tags = list(tags)
+        versions = await client.mget([self._tag_key(tag) for tag in tags]) if tags else []
+        version = ".".join(value.decode() if value else "0" for value in versions)
+        digest = hashlib.sha1(json.dumps(jsonable_encoder(params), sort_keys=True).encode()).hexdigest()
+        return f"{self.prefix}:{namespace}:{digest}:{version}"
+
+    async def get_or_compute(
+        self,
+        namespace: str,
+        params: Dict[str, Any],
+        compute: Callable[[], Awaitable[Any]],
+        ttl: int,
+        tags: Iterable[str] = STATISTICS_TAGS
+    ) -> Any:
+        """Cached JSON-compatible value of ``compute()``, recomputing at most once per miss"""
+        if not self.available:
+            return await compute()
+
+        try:
+            client = self._get_client()
+            key = await self._entry_key(client, namespace, params, tags)
+            cached = await client.get(key)
+        except Exception as e:
+            self._failed("read", e)
+            return await compute()
+
+        if cached is not None:
+            return json.loads(cached)
+
+        inflight = self._get_inflight()
+        pending = inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        pending = asyncio.get_running_loop().create_future()
+        inflight[key] = pending
+        try:
+            value = await self._fill(client, key, compute, ttl)
+            pending.set_result(value)
+            return value
+        except BaseException as e:
+            pending.set_exception(e)
+            pending.exception()  # waiters re-raise it; do not warn when there are none
+            raise
+        finally:
+            inflight.pop(key, None)
+
+    async def _fill(self, client, key: str, compute: Callable[[], Awaitable[Any]], ttl: int) -> Any:
+        lock_key = f"{key}:lock"
+        token = uuid.uuid4().hex
+        try:
+            acquired = await client.set(lock_key, token, nx=True, px=int(settings.RESPONSE_CACHE_LOCK_SECONDS * 1000))
+        except Exception as e:
+            self._failed("lock", e)
+            return jsonable_encoder(await compute())
+
+        if not acquired:
+            # Another worker is computing this entry; wait for it rather than stampede the database
+            deadline = time.monotonic() + settings.RESPONSE_CACHE_LOCK_SECONDS
+            while time.monotonic() < deadline:
+                await asyncio.sleep(FILL_POLL_SECONDS)
+                try:
+                    cached, locked = await client.get(key), await client.exists(lock_key)
+                except Exception as e:
+                    self._failed("read", e)
+                    break
+                if cached is not None:
+                    return json.loads(cached)
+                if not locked:
+                    break  # the other worker failed without storing anything
+            return jsonable_encoder(await compute())
+
+        try:
+            value = jsonable_encoder(await compute())
+            try:
+                await client.set(key, json.dumps(value), ex=ttl)
+            except Exception as e:
+                self._failed("write", e)
+            return value
+        finally:
+            try:
+                await client.eval(RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+            except Exception:
+                pass  # the lock expires on its own
+
+    async def invalidate(self, *tags: str) -> None:
+        """Drop every entry depending on any of ``tags``; call it after the write has committed"""
+        if not settings.RESPONSE_CACHE_ENABLED or not tags:
+            return
+        try:
+            client = self._get_client()
+            async with client.pipeline(transaction=False) as pipe:
+                for tag in tags:
+                    pipe.incr(self._tag_key(tag))
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Response cache invalidation failed for {', '.join(tags)}: {str(e)}")
+
+    def cached(self, namespace: str, ttl: int, tags: Iterable[str] = STATISTICS_TAGS):
+        """Decorator caching an endpoint's response for ``ttl`` seconds
+
+        Place it below the route decorator. The cached value is the
+        JSON-encoded response, which FastAPI validates against the
+        endpoint's ``response_model`` as usual.
+        """
+        tags = tuple(tags)
+
+        def decorator(endpoint):
+            @functools.wraps(endpoint)
+            async def wrapper(*args, **kwargs):
+                params = {name: value for name, value in kwargs.items() if isinstance(value, KEY_TYPES)}
+                return await self.get_or_compute(namespace, params, lambda: endpoint(*args, **kwargs), ttl, tags)
+            return wrapper
+
+        return decorator
+
+    async def close(self) -> None:
+        if self._client is not None:
+            try:
+                await self._client.aclose()
+            except Exception:
+                pass
+            self._client = None
+            self._client_loop = None
+
+# Global response cache instance
+response_cache = ResponseCache()
@@ -0,0 +1,106 @@
+import hashlib
+import json
+import logging
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, List, Optional
+
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.security import get_current_user
+from app.database import get_db
+from app.models.database import User
+
+logger = logging.getLogger(__name__)
+
+CACHE_CONTROL = "private, no-cache"
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against our ETag"""
+    if header.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+class ConditionalGet:
+    """Dependency answering conditional GETs before the endpoint runs
+
+    The validator is ``max(updated_at)`` and ``count(*)`` of every table
+    the response is built from, plus the path and query string; the counts
+    let the ETag catch hard deletes, which ``If-Modified-Since`` cannot
+    see. It costs one aggregate query; when the client's
+    ``If-None-Match`` (or, without it, ``If-Modified-Since``) still holds,
+    a 304 is raised and the endpoint's own queries and serialization never
+    run. Otherwise ``ETag`` and ``Last-Modified`` are added to the response.
+    It depends on ``get_current_user`` itself, so an unauthenticated
+    request gets its 401 before any validator can answer 304.
+
+    Use it as a route dependency:
+    ``dependencies=[Depends(ConditionalGet(Match, Team, Season))]``.
+    """
+
+    def __init__(self, *models: Any):
+        self.models = models
+
+    async def validators(self, db: AsyncSession) -> List[Any]:
+        columns = []
+        for model in self.models:
+            columns.append(select(func.max(model.updated_at)).scalar_subquery())
+            columns.append(select(func.count()).select_from(model).scalar_subquery())
+        result = await db.execute(select(*columns))
+        return list(result.one())
+
+    async def __call__(
+        self,
+        request: Request,
+        response: Response,
+        db: AsyncSession = Depends(get_db),
+        current_user: User = Depends(get_current_user)
+    ) -> None:
+        try:
+            values = await self.validators(db)
+        except Exception as e:
+            logger.error(f"Conditional GET validator error: {str(e)}")
+            return
+
+        parts = [request.url.path, sorted(request.query_params.multi_items()), values]
+        digest = hashlib.sha1(json.dumps(parts, default=str).encode()).hexdigest()
+        etag = f'W/"{digest}"'
+
+        timestamps = [value for value in values if isinstance(value, datetime)]
+        last_modified: Optional[datetime] = max(timestamps).astimezone(timezone.utc) if timestamps else None
+
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+        if last_modified is not None:
+            headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+
+        if self._not_modified(request, etag, last_modified):
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        response.headers.update(headers)
+
+    def _not_modified(self, request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            # If-None-Match takes precedence over If-Modified-Since (RFC 9110)
+            return _etag_matches(if_none_match, etag)
+
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since is None or last_modified is None:
+            return False
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        # HTTP dates have one-second resolution
+        return last_modified.replace(microsecond=0) <= since
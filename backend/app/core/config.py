@@ -9,6 +9,11 @@ class Settings(BaseSettings):
     # Redis
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379")
     
+    # Response cache
+    RESPONSE_CACHE_ENABLED: bool = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+    RESPONSE_CACHE_LOCK_SECONDS: float = float(os.getenv("RESPONSE_CACHE_LOCK_SECONDS", "10"))
+    RESPONSE_CACHE_SOCKET_TIMEOUT: float = float(os.getenv("RESPONSE_CACHE_SOCKET_TIMEOUT", "0.5"))
+    
     # Security
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
     ALGORITHM: str = "HS256"
@@ -32,6 +37,35 @@ class Settings(BaseSettings):
     
     # ML Models
     MODEL_STORAGE_PATH: str = os.getenv("MODEL_STORAGE_PATH", "./models")
+    MODEL_CACHE_MAX_BYTES: int = int(os.getenv("MODEL_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+    MODEL_MMAP_ARTIFACTS: bool = os.getenv("MODEL_MMAP_ARTIFACTS", "true").lower() == "true"
+    ML_INFERENCE_BACKEND: str = os.getenv("ML_INFERENCE_BACKEND", "sklearn")  # sklearn | compiled
+    ML_COMPILED_MAX_BATCH: int = int(os.getenv("ML_COMPILED_MAX_BATCH", "64"))
+    
+    # Training feature matrices cached on disk, keyed by feature version and data watermarks
+    FEATURE_CACHE_ENABLED: bool = os.getenv("FEATURE_CACHE_ENABLED", "true").lower() == "true"
+    FEATURE_CACHE_PATH: str = os.getenv("FEATURE_CACHE_PATH", "./models/feature_cache")
+    
+    # Columnar (Parquet/Arrow) exports
+    EXPORT_STORAGE_PATH: str = os.getenv("EXPORT_STORAGE_PATH", "./exports")
+    
+    # Match history index
+    MATCH_HISTORY_REFRESH_SECONDS: int = int(os.getenv("MATCH_HISTORY_REFRESH_SECONDS", "30"))
+    # updated_at is the transaction start time; re-read this far back to catch late commits
+    MATCH_HISTORY_REFRESH_OVERLAP_SECONDS: int = int(os.getenv("MATCH_HISTORY_REFRESH_OVERLAP_SECONDS", "300"))
+    
+    # Model training (runs on its own Celery queue, never in the API process)
+    TRAINING_QUEUE: str = os.getenv("TRAINING_QUEUE", "training")
+    TRAINING_CPU_BUDGET: int = int(os.getenv("TRAINING_CPU_BUDGET", "2"))
+    # Wall-clock cap on a hyperparameter search; training tasks get this plus the overhead
+    # (data loading, final fit, saving) as their soft time limit
+    TRAINING_SEARCH_TIME_BUDGET: int = int(os.getenv("TRAINING_SEARCH_TIME_BUDGET", "2700"))
+    TRAINING_TASK_OVERHEAD_SECONDS: int = int(os.getenv("TRAINING_TASK_OVERHEAD_SECONDS", "900"))
+    
+    # Weekly warm-start retrain of the active model
+    RETRAIN_MIN_NEW_MATCHES: int = int(os.getenv("RETRAIN_MIN_NEW_MATCHES", "30"))
+    RETRAIN_HOLDOUT_FRACTION: float = float(os.getenv("RETRAIN_HOLDOUT_FRACTION", "0.3"))
+    RETRAIN_ADDED_ESTIMATORS: int = int(os.getenv("RETRAIN_ADDED_ESTIMATORS", "50"))
     
     # Celery
     CELERY_BROKER_URL: str = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
@@ -0,0 +1,134 @@
+import base64
+import json
+import logging
+import uuid
+from datetime import datetime
+from typing import Any, List, NamedTuple, Optional, Sequence
+
+from sqlalchemy import select, func, text, tuple_, literal, DateTime
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+logger = logging.getLogger(__name__)
+
+class InvalidCursor(ValueError):
+    """Raised for a cursor that was not produced by ``encode_cursor`` for this list"""
+
+class Page(NamedTuple):
+    """One page of a list endpoint"""
+    items: List[Any]
+    total: int
+    total_is_estimate: bool
+    next_cursor: Optional[str]
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque cursor for the sort key of the last row on a page"""
+    payload = [value.isoformat() if isinstance(value, datetime) else str(value) for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, columns: Sequence[Any]) -> List[Any]:
+    """Sort key values from a cursor; raises InvalidCursor when it is malformed"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(payload, list) or len(payload) != len(columns):
+            raise ValueError("wrong number of values")
+
+        values = []
+        for value, column in zip(payload, columns):
+            if isinstance(column.type, DateTime):
+                values.append(datetime.fromisoformat(value))
+            elif isinstance(column.type, UUID):
+                values.append(uuid.UUID(value))
+            else:
+                values.append(value)
+        return values
+    except Exception:
+        raise InvalidCursor("Invalid cursor")
+
+def apply_keyset(query: Select, columns: Sequence[Any], cursor: Optional[str]) -> Select:
+    """Order by ``columns`` descending and continue strictly after ``cursor``
+
+    ``columns`` must end with a unique column (the primary key) so the
+    order is total. The row comparison ``(a, b) < (x, y)`` is served by an
+    index on the same columns, so every page costs the same regardless of
+    depth.
+    """
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        query = query.where(
+            tuple_(*columns) < tuple_(*[literal(value, column.type) for value, column in zip(values, columns)])
+        )
+    return query.order_by(*[column.desc() for column in columns])
+
+async def estimated_count(db: AsyncSession, query: Select) -> int:
+    """Planner estimate of the rows ``query`` returns
+
+    Unfiltered single-table queries read ``pg_class.reltuples``; anything
+    else asks ``EXPLAIN`` for the top plan node's row estimate. Both come
+    from the statistics kept by ANALYZE/autovacuum and cost no table scan.
+    """
+    froms = query.get_final_froms()
+    if query.whereclause is None and len(froms) == 1 and hasattr(froms[0], "name"):
+        result = await db.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:name)"),
+            {"name": froms[0].name}
+        )
+        reltuples = result.scalar()
+        # -1 until the table has been analyzed for the first time
+        if reltuples is not None and reltuples >= 0:
+            return int(reltuples)
+
+    # Values in the filters come from typed query parameters; literal rendering quotes them
+    compiled = query.compile(dialect=db.bind.dialect, compile_kwargs={"literal_binds": True})
+    result = await db.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}"))
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+async def exact_count(db: AsyncSession, query: Select) -> int:
+    result = await db.execute(select(func.count()).select_from(query.order_by(None).subquery()))
+    return result.scalar()
+
+async def paginate(
+    db: AsyncSession,
+    query: Select,
+    key_columns: Sequence[Any],
+    size: int,
+    page: int = 1,
+    cursor: Optional[str] = None,
+    include_total: bool = False
+) -> Page:
+    """Fetch one page of ``query`` ordered by ``key_columns`` (newest first)
+
+    With a ``cursor`` the page starts right after it (keyset pagination);
+    without one, ``page`` is still honoured with OFFSET for existing
+    clients. ``next_cursor`` is set whenever more rows follow. The total is
+    the planner's estimate unless ``include_total`` asks for an exact count.
+    """
+    if include_total:
+        total, total_is_estimate = await exact_count(db, query), False
+    else:
+        try:
+            # Savepoint, so a failed EXPLAIN does not abort the request's transaction
+            async with db.begin_nested():
+                total, total_is_estimate = await estimated_count(db, query), True
+        except Exception as e:
+            logger.warning(f"Row estimate failed, counting exactly: {str(e)}")
+            total, total_is_estimate = await exact_count(db, query), False
+
+    paged = apply_keyset(query, key_columns, cursor)
+    if not cursor:
+        paged = paged.offset((page - 1) * size)
+
+    result = await db.execute(paged.limit(size + 1))
+    rows = result.scalars().all()
+
+    next_cursor = None
+    if len(rows) > size:
+        rows = rows[:size]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, column.key) for column in key_columns])
+
+    return Page(items=list(rows), total=total, total_is_estimate=total_is_estimate, next_cursor=next_cursor)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, DateTime, Boolean, Text, DECIMAL, ForeignKey, JSON, TIMESTAMP
+from sqlalchemy import Column, String, Integer, DateTime, Date, Boolean, Text, DECIMAL, ForeignKey, JSON, TIMESTAMP, UniqueConstraint, Index, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB, INET
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -31,6 +31,7 @@ class Season(Base):
     end_date = Column(DateTime)
     is_active = Column(Boolean, default=False)
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+    updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationships
     matches = relationship("Match", back_populates="season")
@@ -57,6 +58,18 @@ class Team(Base):
 
 class Match(Base):
     __tablename__ = "matches"
+    __table_args__ = (
+        # One live match per fixture; a soft-deleted fixture can be created again
+        Index("uq_matches_fixture", "home_team_id", "away_team_id", "match_date", unique=True, postgresql_where=text("is_deleted = false")),
+        # Hot paths: one team's live matches by status, newest first (see create-database-schema.sql)
+        Index("idx_matches_home_status_date", "home_team_id", "status", text("match_date DESC"), postgresql_where=text("is_deleted = false")),
+        Index("idx_matches_away_status_date", "away_team_id", "status", text("match_date DESC"), postgresql_where=text("is_deleted = false")),
+        Index("idx_matches_status_date", "status", text("match_date DESC"), text("id DESC"), postgresql_where=text("is_deleted = false")),
+        # Keyset pagination: (sort column, id) matches ORDER BY match_date DESC, id DESC
+        Index("idx_matches_date_id", "match_date", "id"),
+        # Warm-start retrains select results recorded since the last training run
+        Index("idx_matches_finished_at", "finished_at", postgresql_where=text("finished_at IS NOT NULL")),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     home_team_id = Column(UUID(as_uuid=True), ForeignKey("teams.id"), nullable=False)
@@ -71,6 +84,8 @@ class Match(Base):
     referee = Column(String)
     weather_conditions = Column(JSONB)
     is_deleted = Column(Boolean, default=False)
+    # When the current result was recorded (status became 'finished'); NULL while not finished
+    finished_at = Column(TIMESTAMP(timezone=True))
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
     updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now())
     
@@ -79,9 +94,13 @@ class Match(Base):
     away_team = relationship("Team", foreign_keys=[away_team_id], back_populates="away_matches")
     season = relationship("Season", back_populates="matches")
     predictions = relationship("Prediction", back_populates="match")
+    features = relationship("MatchFeatures", back_populates="match")
 
 class Model(Base):
     __tablename__ = "models"
+    __table_args__ = (
+        Index("idx_models_created_id", "created_at", "id"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String, nullable=False)
@@ -125,6 +144,12 @@ class PredictionBatch(Base):
 
 class Prediction(Base):
     __tablename__ = "predictions"
+    __table_args__ = (
+        UniqueConstraint("match_id", "batch_id", name="uq_predictions_match_batch"),
+        Index("idx_predictions_status_created", "result_status", text("created_at DESC"), text("id DESC")),
+        Index("idx_predictions_pending", "match_id", postgresql_where=text("result_status = 'pending'")),
+        Index("idx_predictions_created_id", "created_at", "id"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     match_id = Column(UUID(as_uuid=True), ForeignKey("matches.id"), nullable=False)
@@ -144,6 +169,23 @@ class Prediction(Base):
     match = relationship("Match", back_populates="predictions")
     batch = relationship("PredictionBatch", back_populates="predictions")
 
+class PredictionDailyRollup(Base):
+    __tablename__ = "prediction_daily_rollups"
+    
+    # One row per (day, model, bucket); the composite key is the upsert target
+    day = Column(Date, primary_key=True)  # UTC date of Prediction.created_at
+    model_id = Column(UUID(as_uuid=True), ForeignKey("models.id"), primary_key=True)
+    confidence_bucket = Column(Integer, primary_key=True)  # 0 below 0.5, then 1..5 per 0.1 up to 1.0
+    total = Column(Integer, nullable=False, default=0)
+    correct = Column(Integer, nullable=False, default=0)
+    wrong = Column(Integer, nullable=False, default=0)
+    pending = Column(Integer, nullable=False, default=0)
+    confidence_sum = Column(DECIMAL(14, 3), nullable=False, default=0)
+    updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    # Relationships
+    model = relationship("Model")
+
 class TrainingLog(Base):
     __tablename__ = "training_logs"
     
@@ -152,6 +194,8 @@ class TrainingLog(Base):
     started_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
     completed_at = Column(TIMESTAMP(timezone=True))
     status = Column(String, default="running")
+    stage = Column(String)
+    progress = Column(Integer, default=0)  # percent
     accuracy_achieved = Column(DECIMAL(5, 2))
     training_samples = Column(Integer)
     validation_samples = Column(Integer)
@@ -165,6 +209,9 @@ class TrainingLog(Base):
 
 class TeamStats(Base):
     __tablename__ = "team_stats"
+    __table_args__ = (
+        UniqueConstraint("team_id", "season_id", name="team_stats_team_id_season_id_key"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     team_id = Column(UUID(as_uuid=True), ForeignKey("teams.id"), nullable=False)
@@ -190,15 +237,35 @@ class TeamStats(Base):
     team = relationship("Team", back_populates="team_stats")
     season = relationship("Season", back_populates="team_stats")
 
+class MatchFeatures(Base):
+    __tablename__ = "match_features"
+    __table_args__ = (
+        UniqueConstraint("match_id", "feature_version", name="uq_match_features_match_version"),
+    )
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    match_id = Column(UUID(as_uuid=True), ForeignKey("matches.id"), nullable=False)
+    feature_version = Column(String, nullable=False)
+    as_of = Column(TIMESTAMP(timezone=True), nullable=False)
+    features = Column(JSONB, nullable=False, default={})
+    computed_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+    
+    # Relationships
+    match = relationship("Match", back_populates="features")
+
 class Log(Base):
     __tablename__ = "logs"
+    __table_args__ = (
+        Index("idx_logs_timestamp_id", "timestamp", "id"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     action_type = Column(String, nullable=False)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"))
     resource_type = Column(String)
     resource_id = Column(UUID(as_uuid=True))
-    metadata = Column(JSONB, default={})
+    # 'metadata' is reserved on declarative classes; the column keeps its name
+    log_metadata = Column("metadata", JSONB, default={})
     ip_address = Column(INET)
     user_agent = Column(Text)
     timestamp = Column(TIMESTAMP(timezone=True), server_default=func.now())
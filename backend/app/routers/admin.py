@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, text
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import datetime, timedelta
 import uuid
 import logging
@@ -10,6 +11,11 @@ import json
 from app.database import get_db
 from app.models.database import Log, User, Match, Prediction, Model
 from app.core.security import get_current_user
+from app.core.pagination import paginate, InvalidCursor
+from app.services.prediction_rollups import prediction_rollup_service
+from app.services.data_export import data_exporter, EXPORT_FORMATS, EXPORT_SOURCES
+from app.services.columnar_io import columnar_exporter, iter_records, COLUMNAR_FORMATS, EXPORT_TABLES, PYARROW_AVAILABLE
+from app.services.match_import import match_importer
 from app.schemas.admin import LogEntry, SystemConfig, ExportRequest
 
 router = APIRouter()
@@ -23,6 +29,8 @@ async def get_logs(
     user_id: Optional[uuid.UUID] = Query(None),
     date_from: Optional[datetime] = Query(None),
     date_to: Optional[datetime] = Query(None),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    include_total: bool = Query(False, description="Exact total instead of the planner estimate"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -46,18 +54,13 @@ async def get_logs(
         if date_to:
             query = query.where(Log.timestamp <= date_to)
         
-        # Get total count
-        count_query = select(func.count()).select_from(query.subquery())
-        total_result = await db.execute(count_query)
-        total = total_result.scalar()
-        
-        # Apply pagination
-        query = query.order_by(Log.timestamp.desc())
-        query = query.offset((page - 1) * size).limit(size)
-        
-        # Execute query
-        result = await db.execute(query)
-        logs = result.scalars().all()
+        # Keyset pagination on (timestamp, id); the total is estimated unless requested
+        page_result = await paginate(
+            db, query, [Log.timestamp, Log.id], size,
+            page=page, cursor=cursor, include_total=include_total
+        )
+        logs = page_result.items
+        total = page_result.total
         
         # Transform to response format
         log_entries = []
@@ -68,7 +71,7 @@ async def get_logs(
                 "user_email": log.user.email if log.user else None,
                 "resource_type": log.resource_type,
                 "resource_id": str(log.resource_id) if log.resource_id else None,
-                "metadata": log.metadata,
+                "metadata": log.log_metadata,
                 "ip_address": str(log.ip_address) if log.ip_address else None,
                 "user_agent": log.user_agent,
                 "timestamp": log.timestamp.isoformat()
@@ -79,9 +82,16 @@ async def get_logs(
             "total": total,
             "page": page,
             "size": size,
-            "pages": (total + size - 1) // size
+            "pages": (total + size - 1) // size,
+            "total_is_estimate": page_result.total_is_estimate,
+            "next_cursor": page_result.next_cursor
         }
         
+    except InvalidCursor as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         logger.error(f"Get logs error: {str(e)}")
         raise HTTPException(
@@ -183,118 +193,124 @@ async def get_system_info(
 @router.post("/export/data")
 async def export_data(
     request: ExportRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """Export system data as a streamed NDJSON or CSV download"""
+    try:
+        export_format = (request.format or "json").lower()
+        if export_format not in EXPORT_FORMATS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Format must be one of: {', '.join(EXPORT_FORMATS)}"
+            )
+        
+        data_types = [data_type for data_type in EXPORT_SOURCES if data_type in request.data_types]
+        if not data_types:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Data types must include at least one of: {', '.join(EXPORT_SOURCES)}"
+            )
+        
+        media_type, extension = EXPORT_FORMATS[export_format]
+        filename = f"export_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.{extension}"
+        
+        logger.info(f"Data export started by user {current_user.email}: {', '.join(data_types)} as {extension}")
+        
+        return StreamingResponse(
+            data_exporter.stream(data_types, "csv" if extension == "csv" else "ndjson", current_user.id),
+            media_type=media_type,
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Export data error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to export data"
+        )
+
+@router.post("/export/columnar")
+async def export_columnar(
+    format: str = Query("parquet"),
+    data_types: List[str] = Query(["matches", "predictions", "team_stats"]),
+    season_id: Optional[uuid.UUID] = Query(None),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Export system data"""
+    """Write matches, predictions and team stats as Parquet/Arrow files partitioned by season"""
     try:
-        export_data = {}
-        
-        if "matches" in request.data_types:
-            matches_result = await db.execute(
-                select(Match).options(
-                    selectinload(Match.home_team),
-                    selectinload(Match.away_team),
-                    selectinload(Match.season)
-                ).where(Match.is_deleted == False)
+        export_format = format.lower()
+        if export_format not in COLUMNAR_FORMATS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Format must be one of: {', '.join(COLUMNAR_FORMATS)}"
             )
-            matches = matches_result.scalars().all()
-            
-            export_data["matches"] = [
-                {
-                    "id": str(match.id),
-                    "home_team": match.home_team.name,
-                    "away_team": match.away_team.name,
-                    "season": match.season.name,
-                    "match_date": match.match_date.isoformat(),
-                    "home_goals": match.home_goals,
-                    "away_goals": match.away_goals,
-                    "status": match.status,
-                    "winner": match.winner,
-                    "attendance": match.attendance,
-                    "referee": match.referee
-                } for match in matches
-            ]
-        
-        if "predictions" in request.data_types:
-            predictions_result = await db.execute(
-                select(Prediction).options(
-                    selectinload(Prediction.match).selectinload(Match.home_team),
-                    selectinload(Prediction.match).selectinload(Match.away_team),
-                    selectinload(Prediction.batch).selectinload(PredictionBatch.model)
-                )
+        
+        selected = [data_type for data_type in EXPORT_TABLES if data_type in data_types]
+        if not selected:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Data types must include at least one of: {', '.join(EXPORT_TABLES)}"
             )
-            predictions = predictions_result.scalars().all()
-            
-            export_data["predictions"] = [
-                {
-                    "id": str(pred.id),
-                    "match_home_team": pred.match.home_team.name,
-                    "match_away_team": pred.match.away_team.name,
-                    "match_date": pred.match.match_date.isoformat(),
-                    "predicted_winner": pred.predicted_winner,
-                    "home_expected_goals": float(pred.home_expected_goals) if pred.home_expected_goals else None,
-                    "away_expected_goals": float(pred.away_expected_goals) if pred.away_expected_goals else None,
-                    "confidence_score": float(pred.confidence_score),
-                    "result_status": pred.result_status,
-                    "model_name": f"{pred.batch.model.name} {pred.batch.model.version}",
-                    "created_at": pred.created_at.isoformat()
-                } for pred in predictions
-            ]
-        
-        if "models" in request.data_types:
-            models_result = await db.execute(
-                select(Model).where(Model.is_deleted == False)
+        
+        if not PYARROW_AVAILABLE:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Columnar export requires pyarrow"
             )
-            models = models_result.scalars().all()
-            
-            export_data["models"] = [
-                {
-                    "id": str(model.id),
-                    "name": model.name,
-                    "version": model.version,
-                    "algorithm": model.algorithm,
-                    "parameters": model.parameters,
-                    "features": model.features,
-                    "accuracy": float(model.accuracy) if model.accuracy else None,
-                    "precision_score": float(model.precision_score) if model.precision_score else None,
-                    "recall_score": float(model.recall_score) if model.recall_score else None,
-                    "f1_score": float(model.f1_score) if model.f1_score else None,
-                    "is_active": model.is_active,
-                    "trained_at": model.trained_at.isoformat() if model.trained_at else None,
-                    "created_at": model.created_at.isoformat()
-                } for model in models
-            ]
-        
-        # Log the export action
-        log_entry = Log(
-            action_type="data_export",
-            user_id=current_user.id,
-            metadata={
-                "data_types": request.data_types,
-                "format": request.format,
-                "record_counts": {key: len(value) for key, value in export_data.items()}
-            }
+        
+        manifest = await columnar_exporter.export(db, selected, export_format, season_id)
+        
+        logger.info(f"Columnar export {manifest['export_id']} by user {current_user.email}: {', '.join(selected)} as {export_format}")
+        
+        return manifest
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Columnar export error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to export data"
         )
-        db.add(log_entry)
-        await db.commit()
+
+@router.post("/import/matches")
+async def import_matches(
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Bulk upsert fixtures and results from a Parquet, Arrow IPC or CSV file"""
+    try:
+        file_format = (file.filename or "").rsplit(".", 1)[-1].lower()
+        if file_format not in ("parquet", "arrow", "csv"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="File must be .parquet, .arrow or .csv"
+            )
         
-        logger.info(f"Data export completed by user {current_user.email}")
+        if file_format != "csv" and not PYARROW_AVAILABLE:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Parquet/Arrow import requires pyarrow; upload CSV instead"
+            )
         
-        return {
-            "message": "Data export completed successfully",
-            "export_data": export_data,
-            "format": request.format,
-            "exported_at": datetime.utcnow().isoformat(),
-            "record_counts": {key: len(value) for key, value in export_data.items()}
-        }
+        summary = await match_importer.import_rows(db, iter_records(file.file, file_format))
+        
+        logger.info(f"Match import by user {current_user.email}: {file.filename}")
         
+        return summary
+        
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Export data error: {str(e)}")
+        logger.error(f"Import matches error: {str(e)}")
         await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to export data"
+            detail="Failed to import matches"
         )
 
 @router.post("/config/update")
@@ -309,7 +325,7 @@ async def update_config(
         log_entry = Log(
             action_type="config_update",
             user_id=current_user.id,
-            metadata={
+            log_metadata={
                 "config_changes": config.dict(),
                 "updated_by": current_user.email
             }
@@ -366,6 +382,11 @@ async def cleanup_old_data(
                 {"cutoff_date": cutoff_date}
             )
             
+            await prediction_rollup_service.record_deleted(
+                db,
+                Prediction.created_at < cutoff_date,
+                Prediction.result_status == 'pending'
+            )
             await db.execute(
                 text("DELETE FROM predictions WHERE created_at < :cutoff_date AND result_status = 'pending'"),
                 {"cutoff_date": cutoff_date}
@@ -377,7 +398,7 @@ async def cleanup_old_data(
             log_entry = Log(
                 action_type="data_cleanup",
                 user_id=current_user.id,
-                metadata={
+                log_metadata={
                     "cutoff_date": cutoff_date.isoformat(),
                     "records_deleted": cleanup_stats
                 }
@@ -402,3 +423,30 @@ async def cleanup_old_data(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to cleanup old data"
         )
+
+@router.post("/rollups/rebuild")
+async def rebuild_prediction_rollups(
+    model_id: Optional[uuid.UUID] = Query(None),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Recompute the daily prediction rollup from the predictions table"""
+    try:
+        rows = await prediction_rollup_service.rebuild(db, model_id)
+        await db.commit()
+        
+        logger.info(f"Prediction rollup rebuilt by user {current_user.email}")
+        
+        return {
+            "message": "Prediction rollup rebuilt",
+            "model_id": str(model_id) if model_id else None,
+            "rows": rows
+        }
+        
+    except Exception as e:
+        logger.error(f"Rebuild prediction rollups error: {str(e)}")
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to rebuild prediction rollups"
+        )
@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_, or_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import selectinload
 from typing import Optional, List
 from datetime import datetime
@@ -9,14 +10,21 @@ import logging
 
 from app.database import get_db
 from app.models.database import Match, Team, Season
-from app.schemas.matches import MatchCreate, MatchUpdate, Match as MatchSchema, MatchList, MatchStats
+from app.schemas.matches import MatchCreate, MatchUpdate, Match as MatchSchema, MatchList, MatchStats, MatchBulkResult
 from app.core.security import get_current_user
+from app.core.cache import response_cache, TAG_MATCHES
+from app.core.conditional import ConditionalGet
+from app.core.pagination import paginate, InvalidCursor
 from app.models.database import User
+from app.services.feature_store import feature_store
+from app.services.match_history import match_history_index
+from app.services.match_import import match_importer, ndjson_lines
+from app.services.team_stats_service import team_stats_service, match_outcome
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-@router.get("/", response_model=MatchList)
+@router.get("/", response_model=MatchList, dependencies=[Depends(ConditionalGet(Match, Team, Season))])
 async def get_matches(
     page: int = Query(1, ge=1),
     size: int = Query(20, ge=1, le=100),
@@ -25,6 +33,8 @@ async def get_matches(
     season_id: Optional[uuid.UUID] = Query(None),
     date_from: Optional[datetime] = Query(None),
     date_to: Optional[datetime] = Query(None),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    include_total: bool = Query(False, description="Exact total instead of the planner estimate"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -55,27 +65,27 @@ async def get_matches(
         if date_to:
             query = query.where(Match.match_date <= date_to)
         
-        # Get total count
-        count_query = select(func.count()).select_from(query.subquery())
-        total_result = await db.execute(count_query)
-        total = total_result.scalar()
-        
-        # Apply pagination
-        query = query.order_by(Match.match_date.desc())
-        query = query.offset((page - 1) * size).limit(size)
-        
-        # Execute query
-        result = await db.execute(query)
-        matches = result.scalars().all()
+        # Keyset pagination on (match_date, id); the total is estimated unless requested
+        result = await paginate(
+            db, query, [Match.match_date, Match.id], size,
+            page=page, cursor=cursor, include_total=include_total
+        )
         
         return MatchList(
-            matches=matches,
-            total=total,
+            matches=result.items,
+            total=result.total,
             page=page,
             size=size,
-            pages=(total + size - 1) // size
+            pages=(result.total + size - 1) // size,
+            total_is_estimate=result.total_is_estimate,
+            next_cursor=result.next_cursor
         )
         
+    except InvalidCursor as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         logger.error(f"Get matches error: {str(e)}")
         raise HTTPException(
@@ -154,7 +164,11 @@ async def create_match(
         
         # Create match
         match = Match(**match_data.dict())
+        if match.status == 'finished':
+            match.finished_at = func.now()
         db.add(match)
+        await team_stats_service.apply_match_transition(db, None, match_outcome(match))
+        await feature_store.invalidate(db, [(match.home_team_id, match.away_team_id, match.match_date)])
         await db.commit()
         await db.refresh(match)
         
@@ -167,12 +181,21 @@ async def create_match(
             ).where(Match.id == match.id)
         )
         match = result.scalar_one()
+        match_history_index.upsert_match(match)
+        await response_cache.invalidate(TAG_MATCHES)
         
         logger.info(f"Match created: {match.id}")
         return match
         
     except HTTPException:
         raise
+    except IntegrityError:
+        # uq_matches_fixture: a live match already has these teams and kick-off
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A match between these teams at this date already exists"
+        )
     except Exception as e:
         logger.error(f"Create match error: {str(e)}")
         await db.rollback()
@@ -181,6 +204,52 @@ async def create_match(
             detail="Failed to create match"
         )
 
+@router.post("/bulk", response_model=MatchBulkResult)
+async def create_matches_bulk(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Create or update many matches in one request
+
+    The body is a JSON array of match objects, or NDJSON (one object per
+    line) with ``Content-Type: application/x-ndjson``. A match with the same
+    home team, away team and date as an existing one updates it. Rows that
+    fail validation are skipped and listed in ``errors``.
+    """
+    try:
+        content_type = request.headers.get("content-type", "")
+        if content_type.startswith(("application/x-ndjson", "application/jsonl")):
+            rows = ndjson_lines(request.stream())
+        else:
+            try:
+                rows = await request.json()
+            except ValueError:
+                rows = None
+            if not isinstance(rows, list):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Body must be a JSON array of matches or NDJSON"
+                )
+        
+        summary = await match_importer.import_rows(db, rows)
+        
+        logger.info(
+            f"Bulk match import by user {current_user.email}: {summary['inserted']} created, "
+            f"{summary['updated']} updated, {len(summary['errors'])} rejected"
+        )
+        return summary
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Bulk create matches error: {str(e)}")
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to import matches"
+        )
+
 @router.put("/{match_id}", response_model=MatchSchema)
 async def update_match(
     match_id: uuid.UUID,
@@ -190,9 +259,9 @@ async def update_match(
 ):
     """Update match"""
     try:
-        # Get existing match
+        # Get existing match, locked so a concurrent write cannot change the result read as ``before``
         result = await db.execute(
-            select(Match).where(Match.id == match_id, Match.is_deleted == False)
+            select(Match).where(Match.id == match_id, Match.is_deleted == False).with_for_update()
         )
         match = result.scalar_one_or_none()
         
@@ -203,10 +272,23 @@ async def update_match(
             )
         
         # Update fields
+        before = match_outcome(match)
+        was_finished = match.status == 'finished'
+        fixtures = [(match.home_team_id, match.away_team_id, match.match_date)]
         update_data = match_data.dict(exclude_unset=True)
         for field, value in update_data.items():
             setattr(match, field, value)
+        fixtures.append((match.home_team_id, match.away_team_id, match.match_date))
+        
+        # Result time: stamped when the match becomes finished, kept through later edits
+        if match.status != 'finished':
+            match.finished_at = None
+        elif not was_finished:
+            match.finished_at = func.now()
         
+        # Apply the result change to team_stats and stored features in the same transaction
+        await team_stats_service.apply_match_transition(db, before, match_outcome(match))
+        await feature_store.invalidate(db, fixtures)
         await db.commit()
         await db.refresh(match)
         
@@ -219,12 +301,20 @@ async def update_match(
             ).where(Match.id == match.id)
         )
         match = result.scalar_one()
+        match_history_index.upsert_match(match)
+        await response_cache.invalidate(TAG_MATCHES)
         
         logger.info(f"Match updated: {match.id}")
         return match
         
     except HTTPException:
         raise
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A match between these teams at this date already exists"
+        )
     except Exception as e:
         logger.error(f"Update match error: {str(e)}")
         await db.rollback()
@@ -241,8 +331,9 @@ async def delete_match(
 ):
     """Delete match (soft delete)"""
     try:
+        # Locked, as in update_match, so the removed result is the one stored
         result = await db.execute(
-            select(Match).where(Match.id == match_id, Match.is_deleted == False)
+            select(Match).where(Match.id == match_id, Match.is_deleted == False).with_for_update()
         )
         match = result.scalar_one_or_none()
         
@@ -252,8 +343,13 @@ async def delete_match(
                 detail="Match not found"
             )
         
+        before = match_outcome(match)
         match.is_deleted = True
+        await team_stats_service.apply_match_transition(db, before, None)
+        await feature_store.invalidate(db, [(match.home_team_id, match.away_team_id, match.match_date)])
         await db.commit()
+        match_history_index.remove(match.id)
+        await response_cache.invalidate(TAG_MATCHES)
         
         logger.info(f"Match deleted: {match.id}")
         return {"message": "Match deleted successfully"}
@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, or_
+from sqlalchemy import select, update, func, and_, or_
 from sqlalchemy.orm import selectinload
 from typing import Optional, List
 from datetime import datetime
@@ -16,7 +16,9 @@ from app.schemas.models import (
     ModelStats, TrainModelRequest
 )
 from app.core.security import get_current_user
+from app.core.pagination import paginate, InvalidCursor
 from app.services.ml_service import MLService
+from app.services.model_registry import model_registry
 from app.tasks.model_tasks import train_model_task
 from app.core.config import settings
 
@@ -29,6 +31,8 @@ async def get_models(
     size: int = Query(20, ge=1, le=100),
     is_active: Optional[bool] = Query(None),
     algorithm: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    include_total: bool = Query(False, description="Exact total instead of the planner estimate"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -44,27 +48,27 @@ async def get_models(
         if algorithm:
             query = query.where(Model.algorithm == algorithm)
         
-        # Get total count
-        count_query = select(func.count()).select_from(query.subquery())
-        total_result = await db.execute(count_query)
-        total = total_result.scalar()
-        
-        # Apply pagination
-        query = query.order_by(Model.created_at.desc())
-        query = query.offset((page - 1) * size).limit(size)
-        
-        # Execute query
-        result = await db.execute(query)
-        models = result.scalars().all()
+        # Keyset pagination on (created_at, id); the total is estimated unless requested
+        result = await paginate(
+            db, query, [Model.created_at, Model.id], size,
+            page=page, cursor=cursor, include_total=include_total
+        )
         
         return ModelList(
-            models=models,
-            total=total,
+            models=result.items,
+            total=result.total,
             page=page,
             size=size,
-            pages=(total + size - 1) // size
+            pages=(result.total + size - 1) // size,
+            total_is_estimate=result.total_is_estimate,
+            next_cursor=result.next_cursor
         )
         
+    except InvalidCursor as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         logger.error(f"Get models error: {str(e)}")
         raise HTTPException(
@@ -186,11 +190,10 @@ async def create_model(
 @router.post("/train")
 async def train_model(
     request: TrainModelRequest,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Start model training"""
+    """Queue model training on the training worker; progress is recorded in the training log"""
     try:
         # Validate model exists
         model_result = await db.execute(
@@ -210,25 +213,30 @@ async def train_model(
         # Create training log
         training_log = TrainingLog(
             model_id=request.model_id,
-            training_config=request.training_config or {}
+            training_config=request.training_config or {},
+            status="queued",
+            stage="queued",
+            progress=0
         )
         db.add(training_log)
         await db.commit()
         await db.refresh(training_log)
         
-        # Add background task to train model
-        background_tasks.add_task(
-            train_model_task,
-            training_log.id,
-            request.training_data_config
-        )
+        # Training runs in the dedicated training worker, never in the API process
+        try:
+            train_model_task.delay(str(training_log.id), request.training_data_config)
+        except Exception:
+            training_log.status = "failed"
+            training_log.error_message = "Could not queue training"
+            await db.commit()
+            raise
         
-        logger.info(f"Model training started: {model.id}")
+        logger.info(f"Model training queued: {model.id}")
         
         return {
-            "message": "Model training started",
+            "message": "Model training queued",
             "training_log_id": training_log.id,
-            "status": "running"
+            "status": "queued"
         }
         
     except HTTPException:
@@ -268,7 +276,10 @@ async def update_model(
         # If setting as active, deactivate other models
         if model_data.is_active:
             await db.execute(
-                select(Model).where(Model.is_active == True).update({"is_active": False})
+                update(Model).where(
+                    Model.is_active == True,
+                    Model.id != model_id
+                ).values(is_active=False)
             )
         
         # Update fields
@@ -279,6 +290,13 @@ async def update_model(
         await db.commit()
         await db.refresh(model)
         
+        # Hot swap: load the newly activated model before it starts serving
+        if model_data.is_active:
+            try:
+                await model_registry.activate(str(model.id))
+            except Exception as e:
+                logger.error(f"Failed to load activated model {model.id}: {str(e)}")
+        
         logger.info(f"Model updated: {model.id}")
         return model
         
@@ -318,6 +336,8 @@ async def delete_model(
         model.is_active = False
         await db.commit()
         
+        model_registry.evict_model(str(model.id))
+        
         logger.info(f"Model deleted: {model.id}")
         return {"message": "Model deleted successfully"}
         
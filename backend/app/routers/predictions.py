@@ -12,10 +12,13 @@ from app.models.database import Prediction, PredictionBatch, Match, Model, Team,
 from app.schemas.predictions import (
     PredictionCreate, PredictionUpdate, Prediction as PredictionSchema,
     PredictionList, PredictionStats, GeneratePredictionsRequest,
-    EvaluatePredictionsRequest, PredictionBatchCreate, PredictionBatch as PredictionBatchSchema
+    EvaluatePredictionsRequest, PredictMatchesRequest, PredictionBatchCreate, PredictionBatch as PredictionBatchSchema
 )
 from app.core.security import get_current_user
+from app.core.pagination import paginate, InvalidCursor
 from app.services.ml_service import MLService
+from app.services.enhanced_ml_service import enhanced_ml_service
+from app.services.prediction_stats import CONFIDENCE_RANGES, confidence_bucket, status_counts, accuracy_percentage
 from app.tasks.prediction_tasks import generate_predictions_task, evaluate_predictions_task
 
 router = APIRouter()
@@ -31,6 +34,8 @@ async def get_predictions(
     match_id: Optional[uuid.UUID] = Query(None),
     confidence_min: Optional[float] = Query(None, ge=0, le=1),
     confidence_max: Optional[float] = Query(None, ge=0, le=1),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    include_total: bool = Query(False, description="Exact total instead of the planner estimate"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -62,18 +67,13 @@ async def get_predictions(
         if confidence_max is not None:
             query = query.where(Prediction.confidence_score <= confidence_max)
         
-        # Get total count
-        count_query = select(func.count()).select_from(query.subquery())
-        total_result = await db.execute(count_query)
-        total = total_result.scalar()
-        
-        # Apply pagination
-        query = query.order_by(Prediction.created_at.desc())
-        query = query.offset((page - 1) * size).limit(size)
-        
-        # Execute query
-        result = await db.execute(query)
-        predictions = result.scalars().all()
+        # Keyset pagination on (created_at, id); the total is estimated unless requested
+        page_result = await paginate(
+            db, query, [Prediction.created_at, Prediction.id], size,
+            page=page, cursor=cursor, include_total=include_total
+        )
+        predictions = page_result.items
+        total = page_result.total
         
         # Transform predictions to include match info
         prediction_list = []
@@ -110,9 +110,16 @@ async def get_predictions(
             total=total,
             page=page,
             size=size,
-            pages=(total + size - 1) // size
+            pages=(total + size - 1) // size,
+            total_is_estimate=page_result.total_is_estimate,
+            next_cursor=page_result.next_cursor
         )
         
+    except InvalidCursor as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         logger.error(f"Get predictions error: {str(e)}")
         raise HTTPException(
@@ -214,6 +221,53 @@ async def generate_predictions(
             detail="Failed to start prediction generation"
         )
 
+@router.post("/predict")
+async def predict_matches(
+    request: PredictMatchesRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Predict matches synchronously with one batched model call"""
+    try:
+        # Validate model exists and is active
+        model_result = await db.execute(
+            select(Model).where(
+                Model.id == request.model_id,
+                Model.is_active == True,
+                Model.is_deleted == False
+            )
+        )
+        model = model_result.scalar_one_or_none()
+        
+        if not model:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Model not found or not active"
+            )
+        
+        failed = []
+        predictions = await enhanced_ml_service.predict_matches_enhanced(
+            db, [str(match_id) for match_id in request.match_ids], str(model.id), failed
+        )
+        # Keep the feature rows materialized for these matches
+        await db.commit()
+        
+        return {
+            "model_id": model.id,
+            "predictions": predictions,
+            "total": len(predictions),
+            "failed": failed
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Predict matches error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to predict matches"
+        )
+
 @router.post("/evaluate")
 async def evaluate_predictions(
     request: EvaluatePredictionsRequest,
@@ -255,78 +309,79 @@ async def get_prediction_stats(
 ):
     """Get prediction statistics"""
     try:
-        # Build base query
-        query = select(Prediction)
-        
+        # Filters shared by the aggregate queries below
+        filters = []
         if model_id:
-            query = query.join(PredictionBatch).where(PredictionBatch.model_id == model_id)
+            filters.append(Prediction.batch_id.in_(
+                select(PredictionBatch.id).where(PredictionBatch.model_id == model_id)
+            ))
         
         if batch_id:
-            query = query.where(Prediction.batch_id == batch_id)
+            filters.append(Prediction.batch_id == batch_id)
         
         if date_from:
-            query = query.where(Prediction.created_at >= date_from)
+            filters.append(Prediction.created_at >= date_from)
         
         if date_to:
-            query = query.where(Prediction.created_at <= date_to)
+            filters.append(Prediction.created_at <= date_to)
         
-        # Get all predictions
-        result = await db.execute(query)
-        predictions = result.scalars().all()
-        
-        total_predictions = len(predictions)
-        correct_predictions = len([p for p in predictions if p.result_status == 'correct'])
-        wrong_predictions = len([p for p in predictions if p.result_status == 'wrong'])
-        pending_predictions = len([p for p in predictions if p.result_status == 'pending'])
-        
-        overall_accuracy = (correct_predictions / (correct_predictions + wrong_predictions)) * 100 if (correct_predictions + wrong_predictions) > 0 else 0
-        
-        # Accuracy by confidence ranges
-        confidence_ranges = {
-            "0.5-0.6": [p for p in predictions if 0.5 <= p.confidence_score < 0.6],
-            "0.6-0.7": [p for p in predictions if 0.6 <= p.confidence_score < 0.7],
-            "0.7-0.8": [p for p in predictions if 0.7 <= p.confidence_score < 0.8],
-            "0.8-0.9": [p for p in predictions if 0.8 <= p.confidence_score < 0.9],
-            "0.9-1.0": [p for p in predictions if 0.9 <= p.confidence_score <= 1.0]
-        }
+        # Status counts in one aggregate
+        counts = status_counts()
+        counts_result = await db.execute(
+            select(*[column.label(name) for name, column in counts.items()]).select_from(Prediction).where(*filters)
+        )
+        totals = counts_result.one()
+        
+        total_predictions = totals.total
+        correct_predictions = totals.correct
+        wrong_predictions = totals.wrong
+        pending_predictions = totals.pending
+        
+        overall_accuracy = accuracy_percentage(correct_predictions, wrong_predictions)
+        
+        # Accuracy by confidence ranges (one GROUP BY over width_bucket)
+        bucket = confidence_bucket().label('bucket')
+        bucket_result = await db.execute(
+            select(
+                bucket,
+                func.count().label('total'),
+                counts['correct'].label('correct'),
+                counts['wrong'].label('wrong')
+            ).where(
+                Prediction.confidence_score >= 0.5,
+                *filters
+            ).group_by(bucket)
+        )
         
         accuracy_by_confidence = {}
-        for range_name, range_predictions in confidence_ranges.items():
-            if range_predictions:
-                correct = len([p for p in range_predictions if p.result_status == 'correct'])
-                total = len([p for p in range_predictions if p.result_status in ['correct', 'wrong']])
-                accuracy = (correct / total) * 100 if total > 0 else 0
-                accuracy_by_confidence[range_name] = {
-                    "total": len(range_predictions),
-                    "correct": correct,
-                    "accuracy": round(accuracy, 1)
-                }
+        for row in sorted(bucket_result, key=lambda r: r.bucket):
+            accuracy_by_confidence[CONFIDENCE_RANGES[row.bucket]] = {
+                "total": row.total,
+                "correct": row.correct,
+                "accuracy": round(accuracy_percentage(row.correct, row.wrong), 1)
+            }
         
         # Accuracy by model (if not filtered by specific model)
         accuracy_by_model = {}
         if not model_id:
-            # Get predictions with model info
-            model_query = select(Prediction).options(
-                selectinload(Prediction.batch).selectinload(PredictionBatch.model)
+            model_result = await db.execute(
+                select(
+                    Model.name,
+                    Model.version,
+                    func.count().label('total'),
+                    counts['correct'].label('correct'),
+                    counts['wrong'].label('wrong')
+                ).select_from(Prediction)
+                .join(PredictionBatch, Prediction.batch_id == PredictionBatch.id)
+                .join(Model, PredictionBatch.model_id == Model.id)
+                .group_by(Model.name, Model.version)
             )
-            model_result = await db.execute(model_query)
-            model_predictions = model_result.scalars().all()
-            
-            model_groups = {}
-            for pred in model_predictions:
-                model_name = f"{pred.batch.model.name} {pred.batch.model.version}"
-                if model_name not in model_groups:
-                    model_groups[model_name] = []
-                model_groups[model_name].append(pred)
             
-            for model_name, model_preds in model_groups.items():
-                correct = len([p for p in model_preds if p.result_status == 'correct'])
-                total = len([p for p in model_preds if p.result_status in ['correct', 'wrong']])
-                accuracy = (correct / total) * 100 if total > 0 else 0
-                accuracy_by_model[model_name] = {
-                    "total": len(model_preds),
-                    "correct": correct,
-                    "accuracy": round(accuracy, 1)
+            for row in model_result:
+                accuracy_by_model[f"{row.name} {row.version}"] = {
+                    "total": row.total,
+                    "correct": row.correct,
+                    "accuracy": round(accuracy_percentage(row.correct, row.wrong), 1)
                 }
         
         return PredictionStats(
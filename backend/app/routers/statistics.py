@@ -10,6 +10,8 @@ import logging
 from app.database import get_db
 from app.models.database import Match, Team, Season, TeamStats, User
 from app.core.security import get_current_user
+from app.core.cache import response_cache
+from app.core.conditional import ConditionalGet
 from app.services.statistics_service import statistics_service
 from app.schemas.statistics import (
     TeamAnalysisResponse, PredictionResponse, TeamStatsResponse,
@@ -20,6 +22,7 @@ router = APIRouter()
 logger = logging.getLogger(__name__)
 
 @router.get("/team-analysis", response_model=TeamAnalysisResponse)
+@response_cache.cached("statistics:team-analysis", ttl=600)
 async def get_team_analysis(
     home_team_id: uuid.UUID = Query(..., description="Home team ID"),
     away_team_id: uuid.UUID = Query(..., description="Away team ID"),
@@ -73,6 +76,7 @@ async def get_match_prediction(
         )
 
 @router.get("/team-stats/{team_id}", response_model=TeamStatsResponse)
+@response_cache.cached("statistics:team-stats", ttl=300)
 async def get_team_stats(
     team_id: uuid.UUID,
     season_id: Optional[uuid.UUID] = Query(None),
@@ -194,7 +198,12 @@ async def get_team_stats(
             detail="Failed to get team statistics"
         )
 
-@router.get("/league-table", response_model=List[Dict[str, Any]])
+@router.get(
+    "/league-table",
+    response_model=List[Dict[str, Any]],
+    dependencies=[Depends(ConditionalGet(TeamStats, Team, Season))]
+)
+@response_cache.cached("statistics:league-table", ttl=300)
 async def get_league_table(
     season_id: Optional[uuid.UUID] = Query(None),
     db: AsyncSession = Depends(get_db),
@@ -259,6 +268,7 @@ async def get_league_table(
         )
 
 @router.get("/match-stats", response_model=MatchStatsResponse)
+@response_cache.cached("statistics:match-stats", ttl=300)
 async def get_match_statistics(
     season_id: Optional[uuid.UUID] = Query(None),
     team_id: Optional[uuid.UUID] = Query(None),
@@ -3,14 +3,15 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_, or_, text
 from sqlalchemy.orm import selectinload
 from typing import Optional, Dict, Any, List
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta, timezone
 import uuid
 import logging
 
 from app.database import get_db
-from app.models.database import Match, Prediction, Model, Team, TeamStats, PredictionBatch
+from app.models.database import Match, Prediction, Model, Team, TeamStats, PredictionBatch, PredictionDailyRollup
 from app.core.security import get_current_user
 from app.models.database import User
+from app.services.prediction_stats import CONFIDENCE_RANGES, status_counts, accuracy_percentage
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -26,70 +27,82 @@ async def get_overview_stats(
         stats = {}
         
         # Match statistics
-        match_query = select(Match).where(Match.is_deleted == False)
+        match_filters = [Match.is_deleted == False]
         if season_id:
-            match_query = match_query.where(Match.season_id == season_id)
-        
-        match_result = await db.execute(match_query)
-        matches = match_result.scalars().all()
+            match_filters.append(Match.season_id == season_id)
+        
+        match_result = await db.execute(
+            select(
+                func.count().label('total'),
+                func.count().filter(Match.status == 'finished').label('finished'),
+                func.count().filter(Match.status == 'scheduled').label('upcoming'),
+                func.count().filter(Match.status == 'live').label('live')
+            ).select_from(Match).where(*match_filters)
+        )
+        match_counts = match_result.one()
         
         stats["matches"] = {
-            "total": len(matches),
-            "finished": len([m for m in matches if m.status == 'finished']),
-            "upcoming": len([m for m in matches if m.status == 'scheduled']),
-            "live": len([m for m in matches if m.status == 'live'])
+            "total": match_counts.total,
+            "finished": match_counts.finished,
+            "upcoming": match_counts.upcoming,
+            "live": match_counts.live
         }
         
         # Prediction statistics
-        pred_result = await db.execute(select(Prediction))
-        predictions = pred_result.scalars().all()
-        
-        finished_predictions = [p for p in predictions if p.result_status in ['correct', 'wrong']]
-        correct_predictions = [p for p in predictions if p.result_status == 'correct']
+        pred_result = await db.execute(
+            select(*[column.label(name) for name, column in status_counts().items()]).select_from(Prediction)
+        )
+        pred_counts = pred_result.one()
         
         stats["predictions"] = {
-            "total": len(predictions),
-            "correct": len(correct_predictions),
-            "wrong": len([p for p in predictions if p.result_status == 'wrong']),
-            "pending": len([p for p in predictions if p.result_status == 'pending']),
-            "accuracy": (len(correct_predictions) / len(finished_predictions)) * 100 if finished_predictions else 0
+            "total": pred_counts.total,
+            "correct": pred_counts.correct,
+            "wrong": pred_counts.wrong,
+            "pending": pred_counts.pending,
+            "accuracy": accuracy_percentage(pred_counts.correct, pred_counts.wrong)
         }
         
         # Model statistics
         model_result = await db.execute(
-            select(Model).where(Model.is_deleted == False)
+            select(
+                func.count().label('total'),
+                func.count().filter(Model.is_active == True).label('active'),
+                func.avg(Model.accuracy).label('average_accuracy'),
+                func.max(Model.accuracy).label('best_accuracy')
+            ).select_from(Model).where(Model.is_deleted == False)
         )
-        models = model_result.scalars().all()
-        
-        active_models = [m for m in models if m.is_active]
-        trained_models = [m for m in models if m.accuracy is not None]
+        model_counts = model_result.one()
         
         stats["models"] = {
-            "total": len(models),
-            "active": len(active_models),
-            "average_accuracy": sum(float(m.accuracy) for m in trained_models) / len(trained_models) if trained_models else 0,
-            "best_accuracy": max(float(m.accuracy) for m in trained_models) if trained_models else 0
+            "total": model_counts.total,
+            "active": model_counts.active,
+            "average_accuracy": float(model_counts.average_accuracy or 0),
+            "best_accuracy": float(model_counts.best_accuracy or 0)
         }
         
         # Recent activity
-        recent_matches = sorted(
-            [m for m in matches if m.match_date >= datetime.utcnow() - timedelta(days=7)],
-            key=lambda x: x.match_date,
-            reverse=True
-        )[:5]
+        recent_matches_result = await db.execute(
+            select(Match).options(
+                selectinload(Match.home_team),
+                selectinload(Match.away_team)
+            ).where(
+                *match_filters,
+                Match.match_date >= datetime.now(timezone.utc) - timedelta(days=7)
+            ).order_by(Match.match_date.desc()).limit(5)
+        )
+        recent_matches = recent_matches_result.scalars().all()
         
-        recent_predictions = sorted(
-            predictions,
-            key=lambda x: x.created_at,
-            reverse=True
-        )[:5]
+        recent_predictions_result = await db.execute(
+            select(Prediction).order_by(Prediction.created_at.desc()).limit(5)
+        )
+        recent_predictions = recent_predictions_result.scalars().all()
         
         stats["recent_activity"] = {
             "matches": [
                 {
                     "id": str(m.id),
-                    "home_team": m.home_team.name if hasattr(m, 'home_team') else "Unknown",
-                    "away_team": m.away_team.name if hasattr(m, 'away_team') else "Unknown",
+                    "home_team": m.home_team.name if m.home_team else "Unknown",
+                    "away_team": m.away_team.name if m.away_team else "Unknown",
                     "date": m.match_date.isoformat(),
                     "status": m.status
                 } for m in recent_matches
@@ -185,93 +198,82 @@ async def get_model_stats(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get model performance statistics"""
+    """Get model performance statistics
+
+    Read from the daily rollup, so ``date_from``/``date_to`` select whole (UTC) days.
+    """
     try:
-        # Build prediction query
-        pred_query = select(Prediction).options(
-            selectinload(Prediction.batch).selectinload(PredictionBatch.model)
-        )
+        # Build rollup query
+        rollup_query = select(
+            PredictionDailyRollup,
+            Model.name,
+            Model.version,
+            Model.algorithm,
+            Model.is_active
+        ).join(Model, PredictionDailyRollup.model_id == Model.id)
         
         if model_id:
-            pred_query = pred_query.join(PredictionBatch).where(PredictionBatch.model_id == model_id)
+            rollup_query = rollup_query.where(PredictionDailyRollup.model_id == model_id)
         
         if date_from:
-            pred_query = pred_query.where(Prediction.created_at >= date_from)
+            rollup_query = rollup_query.where(PredictionDailyRollup.day >= _utc_day(date_from))
         
         if date_to:
-            pred_query = pred_query.where(Prediction.created_at <= date_to)
+            rollup_query = rollup_query.where(PredictionDailyRollup.day <= _utc_day(date_to))
         
-        pred_result = await db.execute(pred_query)
-        predictions = pred_result.scalars().all()
+        rollup_result = await db.execute(rollup_query.order_by(PredictionDailyRollup.day))
         
         # Group by model
         model_stats = {}
-        for pred in predictions:
-            model_name = f"{pred.batch.model.name} {pred.batch.model.version}"
+        confidence_sums = {}
+        for rollup, name, version, algorithm, is_active in rollup_result:
+            model_name = f"{name} {version}"
             
             if model_name not in model_stats:
                 model_stats[model_name] = {
-                    "model_id": str(pred.batch.model.id),
-                    "name": pred.batch.model.name,
-                    "version": pred.batch.model.version,
-                    "algorithm": pred.batch.model.algorithm,
-                    "is_active": pred.batch.model.is_active,
+                    "model_id": str(rollup.model_id),
+                    "name": name,
+                    "version": version,
+                    "algorithm": algorithm,
+                    "is_active": is_active,
                     "total_predictions": 0,
                     "correct_predictions": 0,
                     "wrong_predictions": 0,
                     "pending_predictions": 0,
                     "accuracy": 0,
                     "confidence_ranges": {
-                        "0.5-0.6": {"total": 0, "correct": 0},
-                        "0.6-0.7": {"total": 0, "correct": 0},
-                        "0.7-0.8": {"total": 0, "correct": 0},
-                        "0.8-0.9": {"total": 0, "correct": 0},
-                        "0.9-1.0": {"total": 0, "correct": 0}
+                        range_key: {"total": 0, "correct": 0} for range_key in CONFIDENCE_RANGES.values()
                     },
                     "average_confidence": 0,
                     "predictions_by_day": {}
                 }
+                confidence_sums[model_name] = 0.0
             
             stats = model_stats[model_name]
-            stats["total_predictions"] += 1
-            
-            if pred.result_status == 'correct':
-                stats["correct_predictions"] += 1
-            elif pred.result_status == 'wrong':
-                stats["wrong_predictions"] += 1
-            else:
-                stats["pending_predictions"] += 1
-            
-            # Confidence range analysis
-            confidence = float(pred.confidence_score)
-            if 0.5 <= confidence < 0.6:
-                range_key = "0.5-0.6"
-            elif 0.6 <= confidence < 0.7:
-                range_key = "0.6-0.7"
-            elif 0.7 <= confidence < 0.8:
-                range_key = "0.7-0.8"
-            elif 0.8 <= confidence < 0.9:
-                range_key = "0.8-0.9"
-            else:
-                range_key = "0.9-1.0"
+            stats["total_predictions"] += rollup.total
+            stats["correct_predictions"] += rollup.correct
+            stats["wrong_predictions"] += rollup.wrong
+            stats["pending_predictions"] += rollup.total - rollup.correct - rollup.wrong
+            confidence_sums[model_name] += float(rollup.confidence_sum)
             
-            stats["confidence_ranges"][range_key]["total"] += 1
-            if pred.result_status == 'correct':
-                stats["confidence_ranges"][range_key]["correct"] += 1
+            # Confidence range analysis (anything outside 0.5-0.9 is reported under 0.9-1.0)
+            range_key = CONFIDENCE_RANGES.get(rollup.confidence_bucket, CONFIDENCE_RANGES[5])
+            stats["confidence_ranges"][range_key]["total"] += rollup.total
+            stats["confidence_ranges"][range_key]["correct"] += rollup.correct
             
             # Daily predictions
-            day_key = pred.created_at.date().isoformat()
+            day_key = rollup.day.isoformat()
             if day_key not in stats["predictions_by_day"]:
                 stats["predictions_by_day"][day_key] = {"total": 0, "correct": 0}
             
-            stats["predictions_by_day"][day_key]["total"] += 1
-            if pred.result_status == 'correct':
-                stats["predictions_by_day"][day_key]["correct"] += 1
+            stats["predictions_by_day"][day_key]["total"] += rollup.total
+            stats["predictions_by_day"][day_key]["correct"] += rollup.correct
         
         # Calculate final statistics
         for model_name, stats in model_stats.items():
-            finished = stats["correct_predictions"] + stats["wrong_predictions"]
-            stats["accuracy"] = (stats["correct_predictions"] / finished) * 100 if finished > 0 else 0
+            stats["accuracy"] = accuracy_percentage(stats["correct_predictions"], stats["wrong_predictions"])
+            if stats["total_predictions"] > 0:
+                stats["average_confidence"] = confidence_sums[model_name] / stats["total_predictions"]
             
             # Calculate confidence range accuracies
             for range_key, range_stats in stats["confidence_ranges"].items():
@@ -311,57 +313,38 @@ async def get_performance_trends(
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=days)
         
-        # Build query
-        query = select(Prediction).options(
-            selectinload(Prediction.batch).selectinload(PredictionBatch.model)
+        # Daily totals across models (or for one model) from the rollup
+        query = select(
+            PredictionDailyRollup.day,
+            func.sum(PredictionDailyRollup.total).label('total'),
+            func.sum(PredictionDailyRollup.correct).label('correct'),
+            func.sum(PredictionDailyRollup.wrong).label('wrong'),
+            func.sum(PredictionDailyRollup.confidence_sum).label('confidence_sum')
         ).where(
-            Prediction.created_at >= start_date,
-            Prediction.created_at <= end_date
+            PredictionDailyRollup.day >= start_date.date(),
+            PredictionDailyRollup.day <= end_date.date()
         )
         
         if model_id:
-            query = query.join(PredictionBatch).where(PredictionBatch.model_id == model_id)
-        
-        result = await db.execute(query)
-        predictions = result.scalars().all()
-        
-        # Group by date
-        daily_stats = {}
-        for pred in predictions:
-            date_key = pred.created_at.date().isoformat()
-            
-            if date_key not in daily_stats:
-                daily_stats[date_key] = {
-                    "date": date_key,
-                    "total_predictions": 0,
-                    "correct_predictions": 0,
-                    "wrong_predictions": 0,
-                    "pending_predictions": 0,
-                    "accuracy": 0,
-                    "average_confidence": 0,
-                    "confidence_sum": 0
-                }
-            
-            stats = daily_stats[date_key]
-            stats["total_predictions"] += 1
-            stats["confidence_sum"] += float(pred.confidence_score)
-            
-            if pred.result_status == 'correct':
-                stats["correct_predictions"] += 1
-            elif pred.result_status == 'wrong':
-                stats["wrong_predictions"] += 1
-            else:
-                stats["pending_predictions"] += 1
+            query = query.where(PredictionDailyRollup.model_id == model_id)
         
-        # Calculate final statistics
-        for date_key, stats in daily_stats.items():
-            finished = stats["correct_predictions"] + stats["wrong_predictions"]
-            stats["accuracy"] = (stats["correct_predictions"] / finished) * 100 if finished > 0 else 0
-            stats["average_confidence"] = stats["confidence_sum"] / stats["total_predictions"]
-            del stats["confidence_sum"]  # Remove helper field
+        result = await db.execute(
+            query.group_by(PredictionDailyRollup.day).order_by(PredictionDailyRollup.day)
+        )
         
-        # Sort by date
-        trends = sorted(daily_stats.values(), key=lambda x: x["date"])
+        trends = []
+        for row in result:
+            if not row.total:
+                continue
+            trends.append({
+                "date": row.day.isoformat(),
+                "total_predictions": int(row.total),
+                "correct_predictions": int(row.correct),
+                "wrong_predictions": int(row.wrong),
+                "pending_predictions": int(row.total - row.correct - row.wrong),
+                "accuracy": accuracy_percentage(int(row.correct), int(row.wrong)),
+                "average_confidence": float(row.confidence_sum) / int(row.total)
+            })
         
         return {
             "trends": trends,
@@ -378,3 +361,9 @@ async def get_performance_trends(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to retrieve performance trends"
         )
+
+def _utc_day(value: datetime) -> date:
+    """Calendar day of a datetime in UTC (naive values are taken as UTC)"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.date()
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, validator
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import datetime
 import uuid
 
@@ -88,6 +88,23 @@ class MatchList(BaseModel):
     page: int
     size: int
     pages: int
+    total_is_estimate: bool = False
+    next_cursor: Optional[str] = None
+
+class MatchBulkError(BaseModel):
+    row: int
+    error: str
+
+class MatchBulkResult(BaseModel):
+    rows: int
+    staged: int
+    inserted: int
+    updated: int
+    duplicates: int
+    season_ids: List[str]
+    team_stats_rows_changed: int
+    errors: List[MatchBulkError]
+    seconds: float
 
 class MatchStats(BaseModel):
     total_matches: int
@@ -99,6 +99,8 @@ class PredictionList(BaseModel):
     page: int
     size: int
     pages: int
+    total_is_estimate: bool = False
+    next_cursor: Optional[str] = None
 
 class PredictionStats(BaseModel):
     total_predictions: int
@@ -114,6 +116,18 @@ class GeneratePredictionsRequest(BaseModel):
     match_ids: Optional[List[uuid.UUID]] = None
     description: Optional[str] = None
 
+class PredictMatchesRequest(BaseModel):
+    model_id: uuid.UUID
+    match_ids: List[uuid.UUID]
+
+    @validator('match_ids')
+    def validate_match_ids(cls, v):
+        if not v:
+            raise ValueError('At least one match ID is required')
+        if len(v) > 500:
+            raise ValueError('At most 500 matches can be predicted per request')
+        return v
+
 class EvaluatePredictionsRequest(BaseModel):
     prediction_ids: Optional[List[uuid.UUID]] = None
     batch_id: Optional[uuid.UUID] = None
@@ -0,0 +1,191 @@
+import asyncio
+import csv
+import io
+import itertools
+import json
+import logging
+import os
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.database import Match, Prediction, PredictionBatch, Season, TeamStats
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+except ImportError:  # optional: only the columnar export/import needs it
+    pa = ipc = pq = None
+
+PYARROW_AVAILABLE = pa is not None
+
+logger = logging.getLogger(__name__)
+
+# File extension per columnar format
+COLUMNAR_FORMATS = {"parquet": "parquet", "arrow": "arrow"}
+
+# Rows per server-side cursor batch and per written record batch
+COLUMNAR_BATCH_SIZE = 10000
+
+def require_pyarrow() -> None:
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError("pyarrow is required for Parquet/Arrow export and import")
+
+def _arrow_type(column) -> Any:
+    """Arrow type for a SQLAlchemy column (UUIDs and JSON as strings, decimals as float64)"""
+    python_type = None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        pass
+    if python_type is bool:
+        return pa.bool_()
+    if python_type is int:
+        return pa.int64()
+    if python_type in (float, Decimal):
+        return pa.float64()
+    if python_type is datetime:
+        return pa.timestamp("us", tz="UTC")
+    return pa.string()
+
+def _arrow_value(value: Any) -> Any:
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+def _matches_query(season_id):
+    return select(*Match.__table__.columns).where(
+        Match.season_id == season_id, Match.is_deleted == False
+    ).order_by(Match.match_date)
+
+def _predictions_query(season_id):
+    return select(*Prediction.__table__.columns, PredictionBatch.__table__.c.model_id).join(
+        Match, Prediction.match_id == Match.id
+    ).join(PredictionBatch, Prediction.batch_id == PredictionBatch.id).where(
+        Match.season_id == season_id, Match.is_deleted == False
+    ).order_by(Prediction.created_at)
+
+def _team_stats_query(season_id):
+    return select(*TeamStats.__table__.columns).where(TeamStats.season_id == season_id)
+
+# Exportable data types and the query returning one season of each
+EXPORT_TABLES = {
+    "matches": _matches_query,
+    "predictions": _predictions_query,
+    "team_stats": _team_stats_query
+}
+
+def _open_writer(path: str, schema, export_format: str):
+    """Incremental Parquet or Arrow IPC file writer; both take write_batch() and close()"""
+    if export_format == "parquet":
+        return pq.ParquetWriter(path, schema)
+    return ipc.new_file(path, schema)
+
+class ColumnarExporter:
+    """Writes matches, predictions and team stats as Parquet/Arrow files partitioned by season
+
+    Output follows the Hive layout ``<root>/<export id>/<data type>/season_id=<id>/part-0.<ext>``
+    so pyarrow.dataset, pandas, DuckDB or Spark read it as one partitioned
+    dataset. Each file is filled from a server-side cursor one record batch
+    at a time with a fixed schema, so memory does not grow with history.
+    """
+
+    async def export(
+        self,
+        db: AsyncSession,
+        data_types: List[str],
+        export_format: str = "parquet",
+        season_id: Optional[Any] = None,
+        root: Optional[str] = None
+    ) -> Dict[str, Any]:
+        require_pyarrow()
+        extension = COLUMNAR_FORMATS[export_format]
+        export_id = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+        export_dir = os.path.join(root or settings.EXPORT_STORAGE_PATH, export_id)
+
+        season_query = select(Season.id, Season.name).order_by(Season.start_date, Season.name)
+        if season_id:
+            season_query = season_query.where(Season.id == season_id)
+        seasons = (await db.execute(season_query)).all()
+
+        files = []
+        for data_type in data_types:
+            query_for = EXPORT_TABLES[data_type]
+            schema = pa.schema([(column.name, _arrow_type(column)) for column in query_for(None).selected_columns])
+            names = schema.names
+
+            for season in seasons:
+                directory = os.path.join(export_dir, data_type, f"season_id={season.id}")
+                os.makedirs(directory, exist_ok=True)
+                path = os.path.join(directory, f"part-0.{extension}")
+
+                writer = _open_writer(path, schema, export_format)
+                rows_written = 0
+                try:
+                    result = await db.stream(query_for(season.id).execution_options(yield_per=COLUMNAR_BATCH_SIZE))
+                    async for rows in result.partitions():
+                        batch = pa.RecordBatch.from_pylist(
+                            [dict(zip(names, (_arrow_value(value) for value in row))) for row in rows],
+                            schema=schema
+                        )
+                        await asyncio.to_thread(writer.write_batch, batch)
+                        rows_written += len(rows)
+                finally:
+                    await asyncio.to_thread(writer.close)
+
+                files.append({
+                    "data_type": data_type,
+                    "season_id": str(season.id),
+                    "season_name": season.name,
+                    "path": path,
+                    "rows": rows_written
+                })
+
+        logger.info(f"Columnar export {export_id}: {len(files)} files in {export_dir}")
+        return {"export_id": export_id, "directory": export_dir, "format": export_format, "files": files}
+
+def _record_batches(file, file_format: str) -> Iterator[List[Dict[str, Any]]]:
+    """Records of an uploaded Parquet, Arrow IPC or CSV file in lists of up to ``COLUMNAR_BATCH_SIZE``"""
+    if file_format == "csv":
+        reader = csv.DictReader(io.TextIOWrapper(file, encoding="utf-8"))
+        while True:
+            rows = list(itertools.islice(reader, COLUMNAR_BATCH_SIZE))
+            if not rows:
+                return
+            yield rows
+
+    require_pyarrow()
+    if file_format == "parquet":
+        batches = pq.ParquetFile(file).iter_batches(batch_size=COLUMNAR_BATCH_SIZE)
+    else:
+        reader = ipc.open_file(file)
+        batches = (reader.get_batch(index) for index in range(reader.num_record_batches))
+    for batch in batches:
+        yield batch.to_pylist()
+
+async def iter_records(file, file_format: str) -> AsyncIterator[Dict[str, Any]]:
+    """Records of an uploaded Parquet, Arrow IPC or CSV file, one batch in memory at a time
+
+    Each batch is read and decoded in a worker thread, as the exporter
+    writes them, so a large upload does not block the event loop.
+    """
+    batches = _record_batches(file, file_format)
+    while True:
+        rows = await asyncio.to_thread(next, batches, None)
+        if rows is None:
+            return
+        for row in rows:
+            yield row
+
+# Global columnar exporter instance
+columnar_exporter = ColumnarExporter()
@@ -0,0 +1,199 @@
+import csv
+import io
+import json
+import logging
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+
+from app.database import AsyncSessionLocal
+from app.models.database import Log, Match, Team, Season, Prediction, PredictionBatch, Model
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched per round trip from the server-side cursor (and written per chunk)
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_FORMATS = {
+    "json": ("application/x-ndjson", "ndjson"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv", "csv")
+}
+
+HomeTeam = aliased(Team, name="home_team")
+AwayTeam = aliased(Team, name="away_team")
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+def _float(value: Any) -> Optional[float]:
+    return float(value) if value is not None else None
+
+class ExportSource(NamedTuple):
+    """Flat query for one data type and the function turning its rows into records"""
+    query: Callable[[], Any]
+    record: Callable[[Any], Dict[str, Any]]
+
+def _matches_query():
+    return select(
+        Match.id,
+        HomeTeam.name.label("home_team"),
+        AwayTeam.name.label("away_team"),
+        Season.name.label("season"),
+        Match.match_date,
+        Match.home_goals,
+        Match.away_goals,
+        Match.status,
+        Match.winner,
+        Match.attendance,
+        Match.referee
+    ).join(HomeTeam, Match.home_team_id == HomeTeam.id).join(
+        AwayTeam, Match.away_team_id == AwayTeam.id
+    ).join(Season, Match.season_id == Season.id).where(Match.is_deleted == False)
+
+def _match_record(row) -> Dict[str, Any]:
+    return {
+        "id": str(row.id),
+        "home_team": row.home_team,
+        "away_team": row.away_team,
+        "season": row.season,
+        "match_date": _isoformat(row.match_date),
+        "home_goals": row.home_goals,
+        "away_goals": row.away_goals,
+        "status": row.status,
+        "winner": row.winner,
+        "attendance": row.attendance,
+        "referee": row.referee
+    }
+
+def _predictions_query():
+    return select(
+        Prediction.id,
+        HomeTeam.name.label("match_home_team"),
+        AwayTeam.name.label("match_away_team"),
+        Match.match_date,
+        Prediction.predicted_winner,
+        Prediction.home_expected_goals,
+        Prediction.away_expected_goals,
+        Prediction.confidence_score,
+        Prediction.result_status,
+        Model.name.label("model_name"),
+        Model.version.label("model_version"),
+        Prediction.created_at
+    ).join(Match, Prediction.match_id == Match.id).join(
+        HomeTeam, Match.home_team_id == HomeTeam.id
+    ).join(AwayTeam, Match.away_team_id == AwayTeam.id).join(
+        PredictionBatch, Prediction.batch_id == PredictionBatch.id
+    ).join(Model, PredictionBatch.model_id == Model.id)
+
+def _prediction_record(row) -> Dict[str, Any]:
+    return {
+        "id": str(row.id),
+        "match_home_team": row.match_home_team,
+        "match_away_team": row.match_away_team,
+        "match_date": _isoformat(row.match_date),
+        "predicted_winner": row.predicted_winner,
+        "home_expected_goals": _float(row.home_expected_goals),
+        "away_expected_goals": _float(row.away_expected_goals),
+        "confidence_score": _float(row.confidence_score),
+        "result_status": row.result_status,
+        "model_name": f"{row.model_name} {row.model_version}",
+        "created_at": _isoformat(row.created_at)
+    }
+
+def _models_query():
+    return select(Model).where(Model.is_deleted == False)
+
+def _model_record(row) -> Dict[str, Any]:
+    model = row.Model
+    return {
+        "id": str(model.id),
+        "name": model.name,
+        "version": model.version,
+        "algorithm": model.algorithm,
+        "parameters": model.parameters,
+        "features": model.features,
+        "accuracy": _float(model.accuracy),
+        "precision_score": _float(model.precision_score),
+        "recall_score": _float(model.recall_score),
+        "f1_score": _float(model.f1_score),
+        "is_active": model.is_active,
+        "trained_at": _isoformat(model.trained_at),
+        "created_at": _isoformat(model.created_at)
+    }
+
+# Exportable data types, in the order they are written
+EXPORT_SOURCES = {
+    "matches": ExportSource(_matches_query, _match_record),
+    "predictions": ExportSource(_predictions_query, _prediction_record),
+    "models": ExportSource(_models_query, _model_record)
+}
+
+def _csv_value(value: Any) -> Any:
+    return json.dumps(value) if isinstance(value, (dict, list)) else value
+
+class DataExporter:
+    """Streams exports straight from server-side cursors
+
+    Each data type is one flat query (joins instead of relationship
+    loading) read through ``AsyncSession.stream`` with ``yield_per``, so
+    the process holds one batch of rows and one encoded chunk at a time no
+    matter how large the tables are. The export uses its own session
+    because the body is produced after the endpoint has returned.
+
+    NDJSON lines carry a ``type`` field. CSV output has one section per
+    data type: a header row, the rows, and a blank line between sections.
+    """
+
+    async def stream(self, data_types: List[str], export_format: str, user_id: Any = None) -> AsyncIterator[bytes]:
+        record_counts: Dict[str, int] = {}
+        async with AsyncSessionLocal() as db:
+            try:
+                for index, data_type in enumerate(data_types):
+                    source = EXPORT_SOURCES[data_type]
+                    record_counts[data_type] = 0
+                    header_written = False
+
+                    result = await db.stream(source.query().execution_options(yield_per=EXPORT_BATCH_SIZE))
+                    async for rows in result.partitions():
+                        records = [source.record(row) for row in rows]
+                        record_counts[data_type] += len(records)
+
+                        if export_format == "csv":
+                            buffer = io.StringIO()
+                            writer = csv.writer(buffer)
+                            if not header_written:
+                                if index > 0:
+                                    buffer.write("\r\n")
+                                writer.writerow(records[0].keys())
+                                header_written = True
+                            writer.writerows([_csv_value(value) for value in record.values()] for record in records)
+                            yield buffer.getvalue().encode()
+                        else:
+                            yield "".join(
+                                json.dumps({"type": data_type, **record}, default=str) + "\n" for record in records
+                            ).encode()
+
+                # Log the export action once everything has been sent
+                db.add(Log(
+                    action_type="data_export",
+                    user_id=user_id,
+                    log_metadata={
+                        "data_types": data_types,
+                        "format": export_format,
+                        "record_counts": record_counts
+                    }
+                ))
+                await db.commit()
+                logger.info(f"Data export completed: {record_counts}")
+
+            except Exception as e:
+                # Headers are already sent; the client sees a truncated body
+                logger.error(f"Export stream error after {record_counts}: {str(e)}")
+                await db.rollback()
+                raise
+
+# Global data exporter instance
+data_exporter = DataExporter()
@@ -2,34 +2,47 @@ import numpy as np
 import pandas as pd
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
 from sklearn.linear_model import LogisticRegression
-from sklearn.model_selection import train_test_split, cross_val_score, GridSearchCV
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, classification_report
+from sklearn.model_selection import train_test_split, cross_val_score
+from sklearn.preprocessing import StandardScaler
+from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, classification_report, log_loss
 from sklearn.pipeline import Pipeline
-import joblib
+import copy
 import os
-from typing import Dict, Any, List, Tuple, Optional
-from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+from datetime import datetime
 import logging
 
 from app.core.config import settings
-from app.models.database import Match, Team, TeamStats, Model
-from app.services.statistics_service import statistics_service
+from app.models.database import Match
+from app.services import tree_inference
+from app.services.model_artifacts import save_artifact
+from app.services.model_registry import model_registry, enhanced_model_path
+from app.services.search_strategy import run_search, single_threaded
+from app.services.feature_store import feature_store, FEATURE_COLUMNS, FEATURE_VERSION
+from app.services.feature_cache import feature_matrix_cache, TrainingMatrix
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 logger = logging.getLogger(__name__)
 
+# Most recent finished matches used for training
+TRAINING_MATCH_LIMIT = 2000
+
 class EnhancedMLService:
     """Enhanced ML service with PHP statistical features integrated"""
     
     def __init__(self):
-        self.models = {}
-        self.scalers = {}
+        self.registry = model_registry
         self.label_encoders = {}
         
-    async def prepare_enhanced_features(self, db: AsyncSession, match_id: str = None, matches: List[Match] = None) -> pd.DataFrame:
-        """Prepare enhanced features including PHP-style statistics"""
+    async def prepare_enhanced_features(self, db: AsyncSession, match_id: str = None, matches: List[Match] = None, batch: bool = True) -> pd.DataFrame:
+        """Enhanced features (``FEATURE_COLUMNS``) for one match or a list, in order
+        
+        Delegates to the feature store, which supersedes the per-match and
+        batch builders: rows are point-in-time, materialized once and read
+        back. ``batch`` is kept for existing callers; the store always works
+        in bulk. Does not commit newly materialized rows.
+        """
         try:
             if matches is None:
                 result = await db.execute(
@@ -37,155 +50,53 @@ class EnhancedMLService:
                 )
                 matches = [result.scalar_one()]
             
-            features_list = []
-            
-            for match in matches:
-                # Basic features from original ML service
-                basic_features = await self._calculate_basic_features(db, match)
-                
-                # Enhanced statistical features from PHP system
-                enhanced_features = await self._calculate_enhanced_features(db, match)
-                
-                # Combine all features
-                all_features = {**basic_features, **enhanced_features}
-                features_list.append(all_features)
-            
-            return pd.DataFrame(features_list)
-            
+            if not matches:
+                return pd.DataFrame(columns=FEATURE_COLUMNS)
+            return await feature_store.get_features(db, matches)
+        
         except Exception as e:
             logger.error(f"Error preparing enhanced features: {str(e)}")
             raise
     
-    async def _calculate_basic_features(self, db: AsyncSession, match: Match) -> Dict[str, float]:
-        """Calculate basic features (from original ML service)"""
-        # Get team stats
-        home_stats_result = await db.execute(
-            select(TeamStats).where(
-                TeamStats.team_id == match.home_team_id,
-                TeamStats.season_id == match.season_id
-            )
-        )
-        home_stats = home_stats_result.scalar_one_or_none()
-        
-        away_stats_result = await db.execute(
-            select(TeamStats).where(
-                TeamStats.team_id == match.away_team_id,
-                TeamStats.season_id == match.season_id
-            )
-        )
-        away_stats = away_stats_result.scalar_one_or_none()
-        
-        features = {}
+    async def train_enhanced_model(
+        self,
+        db: AsyncSession,
+        model_config: Dict[str, Any],
+        progress: Optional[Callable[[str, int], Awaitable[None]]] = None
+    ) -> Dict[str, Any]:
+        """Train enhanced model with PHP-style features
         
-        if home_stats and away_stats:
-            features.update({
-                'home_points': home_stats.points,
-                'away_points': away_stats.points,
-                'points_difference': home_stats.points - away_stats.points,
-                'home_goals_for': home_stats.goals_for,
-                'home_goals_against': home_stats.goals_against,
-                'away_goals_for': away_stats.goals_for,
-                'away_goals_against': away_stats.goals_against,
-                'home_goal_difference': home_stats.goal_difference,
-                'away_goal_difference': away_stats.goal_difference,
-                'home_win_rate': home_stats.wins / home_stats.matches_played if home_stats.matches_played > 0 else 0,
-                'away_win_rate': away_stats.wins / away_stats.matches_played if away_stats.matches_played > 0 else 0,
-            })
-        else:
-            # Default values
-            for key in ['home_points', 'away_points', 'points_difference', 'home_goals_for', 
-                       'home_goals_against', 'away_goals_for', 'away_goals_against',
-                       'home_goal_difference', 'away_goal_difference', 'home_win_rate', 'away_win_rate']:
-                features[key] = 0.0
-        
-        return features
-    
-    async def _calculate_enhanced_features(self, db: AsyncSession, match: Match) -> Dict[str, float]:
-        """Calculate enhanced features using PHP-style statistics"""
-        features = {}
+        ``model_config['n_jobs']`` is the CPU budget for fitting, tuning and
+        cross-validation (default ``TRAINING_CPU_BUDGET``); ``progress`` is
+        awaited with ``(stage, percent)`` as training moves through its stages.
+        With ``tune_hyperparameters``, ``search_strategy`` picks grid, random
+        or halving search, bounded by ``search_max_candidates``,
+        ``search_time_budget`` (seconds) and ``search_max_fits``.
+        """
+        async def report(stage: str, percent: int):
+            if progress is not None:
+                await progress(stage, percent)
         
         try:
-            # Form indices (PHP-style)
-            home_form = await statistics_service.calculate_form_index(db, str(match.home_team_id), match.match_date)
-            away_form = await statistics_service.calculate_form_index(db, str(match.away_team_id), match.match_date)
-            
-            features['home_form_index'] = home_form
-            features['away_form_index'] = away_form
-            features['form_difference'] = home_form - away_form
-            
-            # Expected goals (PHP-style)
-            home_expected = await statistics_service.calculate_expected_goals(db, str(match.home_team_id), is_home=True)
-            away_expected = await statistics_service.calculate_expected_goals(db, str(match.away_team_id), is_home=False)
-            
-            features['home_expected_goals'] = home_expected
-            features['away_expected_goals'] = away_expected
-            features['expected_goals_difference'] = home_expected - away_expected
-            
-            # Head-to-head statistics
-            h2h_stats = await statistics_service.calculate_head_to_head_stats(
-                db, str(match.home_team_id), str(match.away_team_id)
+            n_jobs = max(1, int(model_config.get('n_jobs') or settings.TRAINING_CPU_BUDGET))
+            
+            # Training matrix, reused from the feature cache while matches and team stats are unchanged
+            await report('loading_data', 5)
+            matrix = await feature_matrix_cache.get_or_build(
+                db, 'enhanced', FEATURE_VERSION,
+                lambda: self._build_training_matrix(db, report),
+                refresh=model_config.get('refresh_features', False),
+                limit=TRAINING_MATCH_LIMIT,
+                columns=FEATURE_COLUMNS
             )
+            X, y = matrix.X, matrix.y
             
-            features['h2h_home_win_pct'] = h2h_stats['home_win_percentage'] / 100
-            features['h2h_away_win_pct'] = h2h_stats['away_win_percentage'] / 100
-            features['h2h_draw_pct'] = h2h_stats['draw_percentage'] / 100
-            features['h2h_total_matches'] = min(h2h_stats['total_matches'], 10)  # Cap at 10 for normalization
-            features['h2h_home_goals_avg'] = h2h_stats['home_goals_avg']
-            features['h2h_away_goals_avg'] = h2h_stats['away_goals_avg']
-            features['h2h_btts_pct'] = h2h_stats['both_teams_scored_percentage'] / 100
-            
-            # Both teams to score probability
-            btts_prob = await statistics_service.calculate_both_teams_to_score_probability(
-                db, str(match.home_team_id), str(match.away_team_id)
-            )
-            features['btts_probability'] = btts_prob / 100
-            
-            # Win probabilities from ELO-style calculation
-            win_probs = await statistics_service.calculate_win_probabilities(
-                db, str(match.home_team_id), str(match.away_team_id)
-            )
-            features['elo_home_win_prob'] = win_probs['home_win_prob']
-            features['elo_draw_prob'] = win_probs['draw_prob']
-            features['elo_away_win_prob'] = win_probs['away_win_prob']
-            
-            # Home advantage factor
-            features['home_advantage'] = 1.0
-            
-            # Season progress (0-1, where 1 is end of season)
-            # This could be calculated based on match date vs season dates
-            features['season_progress'] = 0.5  # Default mid-season
-            
-        except Exception as e:
-            logger.error(f"Error calculating enhanced features: {str(e)}")
-            # Set default values for all enhanced features
-            default_features = {
-                'home_form_index': 50.0, 'away_form_index': 50.0, 'form_difference': 0.0,
-                'home_expected_goals': 1.0, 'away_expected_goals': 1.0, 'expected_goals_difference': 0.0,
-                'h2h_home_win_pct': 0.33, 'h2h_away_win_pct': 0.33, 'h2h_draw_pct': 0.33,
-                'h2h_total_matches': 0, 'h2h_home_goals_avg': 1.0, 'h2h_away_goals_avg': 1.0,
-                'h2h_btts_pct': 0.5, 'btts_probability': 0.5,
-                'elo_home_win_prob': 0.33, 'elo_draw_prob': 0.33, 'elo_away_win_prob': 0.33,
-                'home_advantage': 1.0, 'season_progress': 0.5
-            }
-            features.update(default_features)
-        
-        return features
-    
-    async def train_enhanced_model(self, db: AsyncSession, model_config: Dict[str, Any]) -> Dict[str, Any]:
-        """Train enhanced model with PHP-style features"""
-        try:
-            # Get training data
-            training_matches = await self._get_training_matches(db)
-            
-            if len(training_matches) < 100:
+            if len(y) < 100:
                 raise ValueError("Not enough training data (minimum 100 matches required)")
             
-            # Prepare enhanced features and labels
-            X = await self.prepare_enhanced_features(db, matches=training_matches)
-            y = self._prepare_labels(training_matches)
-            
-            # Handle missing values
-            X = X.fillna(X.mean())
+            # Handle missing values (the same means impute prediction-time features)
+            feature_means = X.mean()
+            X = X.fillna(feature_means)
             
             # Split data
             X_train, X_test, y_train, y_test = train_test_split(
@@ -205,7 +116,7 @@ class EnhancedMLService:
                     min_samples_split=model_config.get('min_samples_split', 5),
                     min_samples_leaf=model_config.get('min_samples_leaf', 2),
                     random_state=42,
-                    n_jobs=-1
+                    n_jobs=n_jobs
                 )
             elif algorithm == 'GradientBoosting':
                 model = GradientBoostingClassifier(
@@ -229,14 +140,25 @@ class EnhancedMLService:
                 ('classifier', model)
             ])
             
-            # Hyperparameter tuning (optional)
+            # Hyperparameter tuning (optional); the search refits its winner on X_train
+            search = None
             if model_config.get('tune_hyperparameters', False):
-                pipeline = self._tune_hyperparameters(pipeline, X_train, y_train, algorithm)
+                await report('tuning_hyperparameters', 30)
+                search = self._tune_hyperparameters(pipeline, X_train, y_train, algorithm, model_config, n_jobs)
             
             # Train model
-            pipeline.fit(X_train, y_train)
+            await report('fitting', 60)
+            if search is not None:
+                pipeline = search.best_estimator
+            else:
+                pipeline.fit(X_train, y_train)
+            
+            # Persisted with the pipeline so inference uses the training columns and imputation
+            pipeline.feature_names_ = list(X.columns)
+            pipeline.feature_means_ = feature_means.fillna(0.0).to_dict()
             
             # Make predictions
+            await report('evaluating', 75)
             y_pred = pipeline.predict(X_test)
             y_pred_proba = pipeline.predict_proba(X_test)
             
@@ -246,8 +168,16 @@ class EnhancedMLService:
             recall = recall_score(y_test, y_pred, average='weighted')
             f1 = f1_score(y_test, y_pred, average='weighted')
             
-            # Cross-validation
-            cv_scores = cross_val_score(pipeline, X_train, y_train, cv=5, scoring='accuracy')
+            # Cross-validation: reuse the search's scores for the winner when it was
+            # validated on all of X_train, otherwise run the folds in parallel
+            await report('cross_validating', 80)
+            if search is not None and search.cv_samples == len(X_train):
+                cv_mean, cv_std = search.cv_mean, search.cv_std
+            else:
+                cv_scores = cross_val_score(
+                    single_threaded(pipeline), X_train, y_train, cv=5, scoring='accuracy', n_jobs=n_jobs
+                )
+                cv_mean, cv_std = cv_scores.mean(), cv_scores.std()
             
             # Feature importance (for tree-based models)
             feature_importance = None
@@ -260,22 +190,31 @@ class EnhancedMLService:
                 feature_importance = dict(sorted(feature_importance.items(), key=lambda x: x[1], reverse=True))
             
             # Save model
+            await report('saving', 95)
             model_id = model_config.get('model_id')
-            model_path = os.path.join(settings.MODEL_STORAGE_PATH, f"enhanced_model_{model_id}.joblib")
+            model_path = enhanced_model_path(model_id)
             
             os.makedirs(settings.MODEL_STORAGE_PATH, exist_ok=True)
-            joblib.dump(pipeline, model_path)
+            save_artifact(pipeline, model_path)
             
             # Store in memory for quick access
-            self.models[model_id] = pipeline
+            self.registry.put_enhanced(model_id, pipeline)
             
             return {
                 'accuracy': accuracy,
                 'precision': precision,
                 'recall': recall,
                 'f1_score': f1,
-                'cv_mean': cv_scores.mean(),
-                'cv_std': cv_scores.std(),
+                'cv_mean': cv_mean,
+                'cv_std': cv_std,
+                'search': {
+                    'strategy': search.strategy,
+                    'best_params': search.best_params,
+                    'candidates': search.candidates,
+                    'fits': search.fits,
+                    'seconds': round(search.seconds, 2),
+                    'stopped_early': search.stopped_early
+                } if search is not None else None,
                 'training_samples': len(X_train),
                 'test_samples': len(X_test),
                 'features_used': list(X.columns),
@@ -288,114 +227,263 @@ class EnhancedMLService:
             logger.error(f"Error training enhanced model: {str(e)}")
             raise
     
-    def _tune_hyperparameters(self, pipeline, X_train, y_train, algorithm: str):
-        """Tune hyperparameters using GridSearchCV"""
-        param_grids = {
-            'RandomForest': {
-                'classifier__n_estimators': [100, 200, 300],
-                'classifier__max_depth': [10, 15, 20, None],
-                'classifier__min_samples_split': [2, 5, 10],
-                'classifier__min_samples_leaf': [1, 2, 4]
-            },
-            'GradientBoosting': {
-                'classifier__n_estimators': [50, 100, 200],
-                'classifier__max_depth': [3, 6, 9],
-                'classifier__learning_rate': [0.01, 0.1, 0.2]
-            },
-            'LogisticRegression': {
-                'classifier__C': [0.1, 1.0, 10.0, 100.0],
-                'classifier__penalty': ['l1', 'l2'],
-                'classifier__solver': ['liblinear', 'saga']
-            }
-        }
-        
-        param_grid = param_grids.get(algorithm, {})
-        
-        if param_grid:
-            grid_search = GridSearchCV(
-                pipeline, param_grid, cv=3, scoring='accuracy', n_jobs=-1, verbose=1
-            )
-            grid_search.fit(X_train, y_train)
-            return grid_search.best_estimator_
-        
-        return pipeline
+    def _tune_hyperparameters(self, pipeline, X_train, y_train, algorithm: str, model_config: Dict[str, Any], n_jobs: int = 1):
+        """Search hyperparameters as configured in ``model_config``; None when the algorithm has no search space
+
+        The time budget is capped by ``TRAINING_SEARCH_TIME_BUDGET`` so the
+        search always ends inside the training task's time limit.
+        """
+        max_seconds = min(float(model_config.get('search_time_budget') or settings.TRAINING_SEARCH_TIME_BUDGET), settings.TRAINING_SEARCH_TIME_BUDGET)
+        max_fits = model_config.get('search_max_fits')
+        max_candidates = model_config.get('search_max_candidates')
+        return run_search(
+            pipeline, X_train, y_train, algorithm,
+            strategy=model_config.get('search_strategy', 'grid'),
+            n_jobs=n_jobs,
+            max_candidates=int(max_candidates) if max_candidates else None,
+            max_seconds=max_seconds,
+            max_fits=int(max_fits) if max_fits else None
+        )
     
     async def predict_match_enhanced(self, db: AsyncSession, match_id: str, model_id: str) -> Dict[str, Any]:
         """Make enhanced prediction for a single match"""
+        failures: List[Dict[str, str]] = []
+        predictions = await self.predict_matches_enhanced(db, [match_id], model_id, failures)
+        if failures:
+            raise ValueError(f"Match {match_id} could not be predicted: {failures[0]['error']}")
+        if not predictions:
+            raise ValueError(f"Match {match_id} not found")
+        
+        prediction = predictions[0]
+        prediction.pop('match_id')
+        return prediction
+    
+    async def predict_matches_enhanced(
+        self,
+        db: AsyncSession,
+        match_ids: List[str],
+        model_id: str,
+        failures: Optional[List[Dict[str, str]]] = None
+    ) -> List[Dict[str, Any]]:
+        """Make enhanced predictions for many matches from a single feature matrix
+        
+        Returns one prediction per found match, in ``match_ids`` order, each
+        with its ``match_id``. A match whose features cannot be computed or
+        scored is left out instead of failing the batch; it is logged and,
+        when ``failures`` is given, appended to it as ``{'match_id', 'error'}``.
+        """
+        if failures is None:
+            failures = []
         try:
-            # Load model if not in memory
-            if model_id not in self.models:
-                await self._load_enhanced_model(model_id)
-            
-            pipeline = self.models[model_id]
-            
-            # Prepare enhanced features
-            X = await self.prepare_enhanced_features(db, match_id=match_id)
+            if not match_ids:
+                return []
             
-            # Handle missing values
-            X = X.fillna(X.mean())
+            # Load model if not in memory
+            pipeline = await self.registry.get_enhanced(model_id)
             
-            # Make prediction
-            prediction = pipeline.predict(X)[0]
-            probabilities = pipeline.predict_proba(X)[0]
+            matches_result = await db.execute(
+                select(Match).where(Match.id.in_(match_ids))
+            )
+            by_id = {str(m.id): m for m in matches_result.scalars().all()}
+            matches = [by_id[str(match_id)] for match_id in match_ids if str(match_id) in by_id]
+            if not matches:
+                return []
+            
+            X, matches = await self._feature_matrix(db, matches, failures)
+            if not matches:
+                return []
+            
+            # Handle missing values with the training-time means; models saved
+            # before those were stored fall back to the batch means
+            feature_names = getattr(pipeline, 'feature_names_', None)
+            if feature_names is not None:
+                X = X.reindex(columns=feature_names)
+            feature_means = getattr(pipeline, 'feature_means_', None)
+            X = X.fillna(feature_means if feature_means is not None else X.mean())
+            
+            # Rows the model cannot take (non-numeric, infinite or still missing values) are reported, not scored
+            X = X.apply(pd.to_numeric, errors='coerce')
+            scorable = np.isfinite(X.to_numpy(dtype=float)).all(axis=1)
+            for match in (match for match, ok in zip(matches, scorable) if not ok):
+                self._skip(failures, match, "features are missing or not finite")
+            X = X[scorable].reset_index(drop=True)
+            matches = [match for match, ok in zip(matches, scorable) if ok]
+            if not matches:
+                return []
+            
+            # One predict_proba call; the winner is the most probable class
+            class_probabilities, X, matches = self._predict_proba(pipeline, X, matches, failures)
+            if not matches:
+                return []
+            classes = pipeline.classes_
+            predicted_labels = classes[np.argmax(class_probabilities, axis=1)]
+            
+            # Reorder columns to label order (0=home, 1=away, 2=draw)
+            probabilities = np.zeros((len(X), 3))
+            for column, label in enumerate(classes):
+                probabilities[:, int(label)] = class_probabilities[:, column]
             
-            # Convert prediction to readable format
             winner_map = {0: 'home', 1: 'away', 2: 'draw'}
-            predicted_winner = winner_map[prediction]
-            
-            # Calculate confidence (max probability)
-            confidence = max(probabilities)
+            feature_rows = X.to_dict(orient='records')
             
-            # Get feature values for analysis
-            feature_values = X.iloc[0].to_dict()
-            
-            # Estimate expected goals using enhanced features
-            home_expected_goals = feature_values.get('home_expected_goals', 1.0)
-            away_expected_goals = feature_values.get('away_expected_goals', 1.0)
-            
-            return {
-                'predicted_winner': predicted_winner,
-                'home_win_probability': probabilities[0],
-                'draw_probability': probabilities[2],
-                'away_win_probability': probabilities[1],
-                'confidence_score': confidence,
-                'home_expected_goals': home_expected_goals,
-                'away_expected_goals': away_expected_goals,
-                'features_used': feature_values,
-                'model_type': 'enhanced_ml',
-                'btts_probability': feature_values.get('btts_probability', 0.5),
-                'form_analysis': {
-                    'home_form': feature_values.get('home_form_index', 50.0),
-                    'away_form': feature_values.get('away_form_index', 50.0),
-                    'form_advantage': feature_values.get('form_difference', 0.0)
-                },
-                'h2h_analysis': {
-                    'home_win_rate': feature_values.get('h2h_home_win_pct', 0.33),
-                    'away_win_rate': feature_values.get('h2h_away_win_pct', 0.33),
-                    'draw_rate': feature_values.get('h2h_draw_pct', 0.33),
-                    'total_matches': feature_values.get('h2h_total_matches', 0)
+            return [
+                {
+                    'match_id': str(match.id),
+                    **self._prediction_payload(feature_rows[i], winner_map[int(predicted_labels[i])], probabilities[i])
                 }
-            }
+                for i, match in enumerate(matches)
+            ]
             
         except Exception as e:
-            logger.error(f"Error making enhanced prediction: {str(e)}")
+            logger.error(f"Error making batch enhanced predictions: {str(e)}")
             raise
     
-    async def _load_enhanced_model(self, model_id: str):
-        """Load enhanced model from disk"""
+    def _skip(self, failures: List[Dict[str, str]], match: Match, error: str) -> None:
+        logger.error(f"Skipping prediction for match {match.id}: {error}")
+        failures.append({'match_id': str(match.id), 'error': error})
+    
+    async def _feature_matrix(self, db: AsyncSession, matches: List[Match], failures: List[Dict[str, str]]):
+        """Feature rows and the matches they belong to; a failed batch is retried per match
+        
+        Each attempt runs in a savepoint, so a failed statement does not
+        abort the caller's transaction.
+        """
         try:
-            model_path = os.path.join(settings.MODEL_STORAGE_PATH, f"enhanced_model_{model_id}.joblib")
-            
-            if not os.path.exists(model_path):
-                raise FileNotFoundError(f"Enhanced model file not found for model {model_id}")
-            
-            self.models[model_id] = joblib.load(model_path)
-            
-            logger.info(f"Enhanced model {model_id} loaded successfully")
-            
+            async with db.begin_nested():
+                return await feature_store.get_features(db, matches), matches
         except Exception as e:
-            logger.error(f"Error loading enhanced model {model_id}: {str(e)}")
-            raise
+            logger.error(f"Features for {len(matches)} matches failed, retrying one at a time: {str(e)}")
+        
+        frames, computed = [], []
+        for match in matches:
+            try:
+                async with db.begin_nested():
+                    frames.append(await feature_store.get_features(db, [match]))
+                computed.append(match)
+            except Exception as e:
+                self._skip(failures, match, f"features could not be computed: {str(e)}")
+        X = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=FEATURE_COLUMNS)
+        return X, computed
+    
+    def _predict_proba(self, pipeline, X: pd.DataFrame, matches: List[Match], failures: List[Dict[str, str]]):
+        """Class probabilities for ``X`` in one call; if the batch fails, row by row to drop only the failing matches"""
+        try:
+            return tree_inference.predict_proba(pipeline, X), X, matches
+        except Exception as e:
+            logger.error(f"Inference for {len(matches)} matches failed, retrying one at a time: {str(e)}")
+        
+        rows, kept = [], []
+        for i, match in enumerate(matches):
+            try:
+                rows.append(tree_inference.predict_proba(pipeline, X.iloc[[i]])[0])
+                kept.append(i)
+            except Exception as e:
+                self._skip(failures, match, f"model could not score it: {str(e)}")
+        if not kept:
+            return np.empty((0, len(pipeline.classes_))), X.iloc[[]], []
+        return np.vstack(rows), X.iloc[kept].reset_index(drop=True), [matches[i] for i in kept]
+    
+    def _prediction_payload(self, feature_values: Dict[str, float], predicted_winner: str, probabilities) -> Dict[str, Any]:
+        """Shape one feature row and its class probabilities into the prediction response"""
+        # Calculate confidence (max probability)
+        confidence = max(probabilities)
+        
+        # Estimate expected goals using enhanced features
+        home_expected_goals = feature_values.get('home_expected_goals', 1.0)
+        away_expected_goals = feature_values.get('away_expected_goals', 1.0)
+        
+        return {
+            'predicted_winner': predicted_winner,
+            'home_win_probability': probabilities[0],
+            'draw_probability': probabilities[2],
+            'away_win_probability': probabilities[1],
+            'confidence_score': confidence,
+            'home_expected_goals': home_expected_goals,
+            'away_expected_goals': away_expected_goals,
+            'features_used': feature_values,
+            'model_type': 'enhanced_ml',
+            'btts_probability': feature_values.get('btts_probability', 0.5),
+            'form_analysis': {
+                'home_form': feature_values.get('home_form_index', 50.0),
+                'away_form': feature_values.get('away_form_index', 50.0),
+                'form_advantage': feature_values.get('form_difference', 0.0)
+            },
+            'h2h_analysis': {
+                'home_win_rate': feature_values.get('h2h_home_win_pct', 0.33),
+                'away_win_rate': feature_values.get('h2h_away_win_pct', 0.33),
+                'draw_rate': feature_values.get('h2h_draw_pct', 0.33),
+                'total_matches': feature_values.get('h2h_total_matches', 0)
+            }
+        }
+    
+    async def _build_training_matrix(self, db: AsyncSession, report: Callable[[str, int], Awaitable[None]]) -> TrainingMatrix:
+        """Point-in-time features from the feature store (computed once, then read back) and labels"""
+        training_matches = await self._get_training_matches(db)
+        await report('computing_features', 15)
+        X = await feature_store.get_features(db, training_matches) if training_matches else pd.DataFrame(columns=FEATURE_COLUMNS)
+        return TrainingMatrix.build(X, self._prepare_labels(training_matches), training_matches)
+    
+    def warm_start(self, pipeline, X: pd.DataFrame, y: np.ndarray, added_estimators: int, n_jobs: int = 1):
+        """Copy of a fitted pipeline trained further on ``X``/``y`` without refitting what it already learned
+        
+        Forests and gradient boosting keep their estimators and grow
+        ``added_estimators`` more on the new rows; models with ``partial_fit``
+        take one more pass. The scaler is not refit, so existing estimators
+        keep seeing inputs on the scale they were trained on.
+        """
+        candidate = copy.deepcopy(pipeline)
+        classifier = candidate.named_steps['classifier']
+        
+        # Refitting on fewer classes would change classes_ under the existing estimators
+        missing = set(classifier.classes_.tolist()) - set(np.unique(y).tolist())
+        if missing:
+            raise ValueError(f"New matches have no examples of outcome classes {sorted(missing)}")
+        
+        X_scaled = candidate[:-1].transform(X[pipeline.feature_names_])
+        if isinstance(classifier, (RandomForestClassifier, GradientBoostingClassifier)):
+            params = {'warm_start': True, 'n_estimators': classifier.n_estimators + added_estimators}
+            if 'n_jobs' in classifier.get_params():
+                params['n_jobs'] = n_jobs
+            classifier.set_params(**params)
+            classifier.fit(X_scaled, y)
+            classifier.set_params(warm_start=False)
+        elif hasattr(classifier, 'partial_fit'):
+            classifier.partial_fit(X_scaled, y, classes=classifier.classes_)
+        else:
+            raise ValueError(f"{type(classifier).__name__} cannot be trained incrementally")
+        
+        return candidate
+    
+    def holdout_metrics(self, pipeline, X: pd.DataFrame, y: np.ndarray) -> Dict[str, float]:
+        """Accuracy, weighted precision/recall/F1 and log loss of a fitted pipeline on held-out rows"""
+        X = X[pipeline.feature_names_]
+        y_pred = pipeline.predict(X)
+        return {
+            'accuracy': accuracy_score(y, y_pred),
+            'precision': precision_score(y, y_pred, average='weighted', zero_division=0),
+            'recall': recall_score(y, y_pred, average='weighted', zero_division=0),
+            'f1_score': f1_score(y, y_pred, average='weighted', zero_division=0),
+            'log_loss': log_loss(y, pipeline.predict_proba(X), labels=pipeline.classes_)
+        }
+    
+    async def _get_matches_finished_since(self, db: AsyncSession, since: datetime) -> List[Match]:
+        """Training-eligible matches whose result was recorded after ``since``, oldest first
+
+        Selected by ``finished_at``, not ``updated_at``: later edits or
+        re-imports of a result the model already saw must not bring it back
+        into the fit or the holdout.
+        """
+        result = await db.execute(
+            select(Match).where(
+                Match.status == 'finished',
+                Match.winner.isnot(None),
+                Match.is_deleted == False,
+                Match.home_goals.isnot(None),
+                Match.away_goals.isnot(None),
+                Match.finished_at > since
+            ).order_by(Match.finished_at, Match.id)
+        )
+        return result.scalars().all()
     
     async def _get_training_matches(self, db: AsyncSession) -> List[Match]:
         """Get matches for training (finished matches with results)"""
@@ -406,7 +494,7 @@ class EnhancedMLService:
                 Match.is_deleted == False,
                 Match.home_goals.isnot(None),
                 Match.away_goals.isnot(None)
-            ).order_by(Match.match_date.desc()).limit(2000)  # More training data
+            ).order_by(Match.match_date.desc()).limit(TRAINING_MATCH_LIMIT)
         )
         return result.scalars().all()
     
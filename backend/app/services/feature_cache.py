@@ -0,0 +1,145 @@
+import asyncio
+import glob
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.database import Match, TeamStats
+
+logger = logging.getLogger(__name__)
+
+class TrainingMatrix(NamedTuple):
+    """Feature matrix, labels and the match each row belongs to"""
+    X: pd.DataFrame
+    y: np.ndarray
+    match_ids: List[str]
+
+    @classmethod
+    def build(cls, X: pd.DataFrame, y, matches) -> 'TrainingMatrix':
+        # Float columns so a freshly built matrix and one read from disk are identical
+        return cls(
+            X=pd.DataFrame(X.to_numpy(dtype=np.float64), columns=[str(column) for column in X.columns]),
+            y=np.asarray(y, dtype=np.int64),
+            match_ids=[str(match.id) for match in matches]
+        )
+
+class FeatureMatrixCache:
+    """On-disk cache of training matrices, keyed by feature code and data version
+
+    A key hashes the caller's feature version and parameters with the
+    newest ``updated_at`` and the row counts of ``matches`` and
+    ``team_stats``, so any write to either table (or a bumped feature
+    version) yields a new key and the next training run rebuilds the
+    matrix. Entries are ``.npz`` files without pickled objects; each save
+    replaces older entries of the same namespace.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or settings.FEATURE_CACHE_PATH
+
+    async def data_version(self, db: AsyncSession) -> Dict[str, Any]:
+        """Watermarks of the tables training features are computed from"""
+        result = await db.execute(
+            select(
+                select(func.max(Match.updated_at)).scalar_subquery().label('matches_updated_at'),
+                select(func.count(Match.id)).scalar_subquery().label('matches'),
+                select(func.max(TeamStats.updated_at)).scalar_subquery().label('team_stats_updated_at'),
+                select(func.count(TeamStats.id)).scalar_subquery().label('team_stats')
+            )
+        )
+        row = result.one()
+        return {
+            'matches_updated_at': row.matches_updated_at.isoformat() if row.matches_updated_at else None,
+            'matches': row.matches,
+            'team_stats_updated_at': row.team_stats_updated_at.isoformat() if row.team_stats_updated_at else None,
+            'team_stats': row.team_stats
+        }
+
+    def key(self, feature_version: str, data_version: Dict[str, Any], **params) -> str:
+        payload = json.dumps(
+            {'feature_version': feature_version, 'data': data_version, 'params': params},
+            sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()[:24]
+
+    def path(self, namespace: str, key: str) -> str:
+        return os.path.join(self.root, f"{namespace}-{key}.npz")
+
+    def load(self, namespace: str, key: str) -> Optional[TrainingMatrix]:
+        path = self.path(namespace, key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                return TrainingMatrix(
+                    X=pd.DataFrame(data['X'], columns=data['columns'].tolist()),
+                    y=data['y'],
+                    match_ids=data['match_ids'].tolist()
+                )
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable feature cache entry {path}: {str(e)}")
+            return None
+
+    def save(self, namespace: str, key: str, matrix: TrainingMatrix) -> str:
+        """Write an entry next to its destination, rename it into place and drop stale ones"""
+        os.makedirs(self.root, exist_ok=True)
+        path = self.path(namespace, key)
+        tmp_path = f"{path}.tmp.{os.getpid()}.npz"
+        try:
+            np.savez(
+                tmp_path,
+                X=matrix.X.to_numpy(dtype=np.float64),
+                y=matrix.y,
+                columns=np.array(matrix.X.columns, dtype=str),
+                match_ids=np.array(matrix.match_ids, dtype=str)
+            )
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        for stale in glob.glob(os.path.join(self.root, f"{namespace}-*.npz")):
+            if stale != path and '.tmp.' not in stale:
+                try:
+                    os.remove(stale)
+                except OSError:
+                    pass
+        return path
+
+    async def get_or_build(
+        self,
+        db: AsyncSession,
+        namespace: str,
+        feature_version: str,
+        build: Callable[[], Awaitable[TrainingMatrix]],
+        refresh: bool = False,
+        **params
+    ) -> TrainingMatrix:
+        """Return the cached matrix for the current data, building and storing it on a miss"""
+        if not settings.FEATURE_CACHE_ENABLED:
+            return await build()
+
+        key = self.key(feature_version, await self.data_version(db), **params)
+        if not refresh:
+            matrix = await asyncio.to_thread(self.load, namespace, key)
+            if matrix is not None:
+                logger.info(f"Feature cache hit for {namespace} ({len(matrix.match_ids)} rows)")
+                return matrix
+
+        matrix = await build()
+        try:
+            await asyncio.to_thread(self.save, namespace, key, matrix)
+        except OSError as e:
+            logger.warning(f"Could not write feature cache entry for {namespace}: {str(e)}")
+        return matrix
+
+# Global feature matrix cache instance
+feature_matrix_cache = FeatureMatrixCache()
@@ -0,0 +1,390 @@
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import pandas as pd
+from sqlalchemy import and_, delete, or_, select, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.database import Match, MatchFeatures, TeamStats
+from app.services.rolling_features import RollingFeatureEngine
+from app.services.statistics_service import statistics_service
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the definition of any feature changes; rows of older versions are ignored
+FEATURE_VERSION = "enhanced-v2"
+
+BASIC_FEATURE_KEYS = [
+    'home_points', 'away_points', 'points_difference', 'home_goals_for',
+    'home_goals_against', 'away_goals_for', 'away_goals_against',
+    'home_goal_difference', 'away_goal_difference', 'home_win_rate', 'away_win_rate'
+]
+
+DEFAULT_ENHANCED_FEATURES = {
+    'home_form_index': 50.0, 'away_form_index': 50.0, 'form_difference': 0.0,
+    'home_expected_goals': 1.0, 'away_expected_goals': 1.0, 'expected_goals_difference': 0.0,
+    'h2h_home_win_pct': 0.33, 'h2h_away_win_pct': 0.33, 'h2h_draw_pct': 0.33,
+    'h2h_total_matches': 0, 'h2h_home_goals_avg': 1.0, 'h2h_away_goals_avg': 1.0,
+    'h2h_btts_pct': 0.5, 'btts_probability': 0.5,
+    'elo_home_win_prob': 0.33, 'elo_draw_prob': 0.33, 'elo_away_win_prob': 0.33,
+    'home_advantage': 1.0, 'season_progress': 0.5
+}
+
+def basic_features_from_stats(home_stats: Optional[TeamStats], away_stats: Optional[TeamStats]) -> Dict[str, float]:
+    """Build basic features from the two teams' TeamStats rows"""
+    features = {}
+
+    if home_stats and away_stats:
+        features.update({
+            'home_points': home_stats.points,
+            'away_points': away_stats.points,
+            'points_difference': home_stats.points - away_stats.points,
+            'home_goals_for': home_stats.goals_for,
+            'home_goals_against': home_stats.goals_against,
+            'away_goals_for': away_stats.goals_for,
+            'away_goals_against': away_stats.goals_against,
+            'home_goal_difference': home_stats.goal_difference,
+            'away_goal_difference': away_stats.goal_difference,
+            'home_win_rate': home_stats.wins / home_stats.matches_played if home_stats.matches_played > 0 else 0,
+            'away_win_rate': away_stats.wins / away_stats.matches_played if away_stats.matches_played > 0 else 0,
+        })
+    else:
+        # Default values
+        for key in BASIC_FEATURE_KEYS:
+            features[key] = 0.0
+
+    return features
+
+def build_enhanced_features(home_form: float, away_form: float, home_expected: float, away_expected: float,
+                            h2h_stats: Dict[str, Any], btts_prob: float, win_probs: Dict[str, float]) -> Dict[str, float]:
+    """Assemble the enhanced feature dict in its canonical column order"""
+    features = {}
+
+    features['home_form_index'] = home_form
+    features['away_form_index'] = away_form
+    features['form_difference'] = home_form - away_form
+
+    features['home_expected_goals'] = home_expected
+    features['away_expected_goals'] = away_expected
+    features['expected_goals_difference'] = home_expected - away_expected
+
+    features['h2h_home_win_pct'] = h2h_stats['home_win_percentage'] / 100
+    features['h2h_away_win_pct'] = h2h_stats['away_win_percentage'] / 100
+    features['h2h_draw_pct'] = h2h_stats['draw_percentage'] / 100
+    features['h2h_total_matches'] = min(h2h_stats['total_matches'], 10)  # Cap at 10 for normalization
+    features['h2h_home_goals_avg'] = h2h_stats['home_goals_avg']
+    features['h2h_away_goals_avg'] = h2h_stats['away_goals_avg']
+    features['h2h_btts_pct'] = h2h_stats['both_teams_scored_percentage'] / 100
+
+    features['btts_probability'] = btts_prob / 100
+
+    features['elo_home_win_prob'] = win_probs['home_win_prob']
+    features['elo_draw_prob'] = win_probs['draw_prob']
+    features['elo_away_win_prob'] = win_probs['away_win_prob']
+
+    # Home advantage factor
+    features['home_advantage'] = 1.0
+
+    # Season progress (0-1, where 1 is end of season)
+    # This could be calculated based on match date vs season dates
+    features['season_progress'] = 0.5  # Default mid-season
+
+    return features
+
+# Below this many matches per-match index lookups are cheaper than building the columnar engine
+ROLLING_ENGINE_MIN_BATCH = 32
+
+# Teams per DELETE when invalidating stored rows
+INVALIDATE_TEAMS_CHUNK_SIZE = 500
+
+FEATURE_COLUMNS = BASIC_FEATURE_KEYS + list(DEFAULT_ENHANCED_FEATURES.keys())
+
+class TeamStatsSnapshot(NamedTuple):
+    """TeamStats as they stood at a point in time, rebuilt from match history"""
+    matches_played: int
+    wins: int
+    draws: int
+    losses: int
+    goals_for: int
+    goals_against: int
+    goal_difference: int
+    points: int
+
+class FeatureStore:
+    """Materialized, point-in-time correct match features
+
+    Every feature of a match is computed as of its kick-off: team stats are
+    rebuilt from the season's results before ``match_date`` and the rolling
+    aggregates (form, expected goals, H2H, BTTS) only see earlier matches, so
+    training rows never contain information from the future. Rows are keyed
+    by ``(match_id, feature_version)`` and read back with a single indexed scan.
+    Writers of matches call :meth:`invalidate` so rows that could have seen a
+    changed result are dropped and recomputed on the next read.
+    """
+    
+    def __init__(self):
+        self.history = statistics_service.history
+    
+    def _team_snapshot(self, team_id: str, season_id: str, as_of: datetime) -> TeamStatsSnapshot:
+        """Rebuild a team's season stats from finished matches before ``as_of``
+        
+        Like ``TeamStats``, results come from ``winner``; a match without one
+        is played but neither won, drawn nor lost.
+        """
+        played = wins = draws = losses = goals_for = goals_against = 0
+        for match in self.history.team_matches(team_id, before=as_of):
+            if match.season_id != season_id:
+                continue
+            is_home = match.home_team_id == team_id
+            scored = (match.home_goals if is_home else match.away_goals) or 0
+            conceded = (match.away_goals if is_home else match.home_goals) or 0
+            played += 1
+            goals_for += scored
+            goals_against += conceded
+            if match.winner == ('home' if is_home else 'away'):
+                wins += 1
+            elif match.winner == 'draw':
+                draws += 1
+            elif match.winner in ('home', 'away'):
+                losses += 1
+        
+        return TeamStatsSnapshot(
+            matches_played=played,
+            wins=wins,
+            draws=draws,
+            losses=losses,
+            goals_for=goals_for,
+            goals_against=goals_against,
+            goal_difference=goals_for - goals_against,
+            points=wins * 3 + draws
+        )
+    
+    def compute_features(self, match: Match) -> Dict[str, float]:
+        """Compute the feature row of a match as of its kick-off from the history index"""
+        home_key, away_key = str(match.home_team_id), str(match.away_team_id)
+        season_key = str(match.season_id)
+        as_of = match.match_date
+        
+        home_stats = self._team_snapshot(home_key, season_key, as_of)
+        away_stats = self._team_snapshot(away_key, season_key, as_of)
+        basic_features = basic_features_from_stats(home_stats, away_stats)
+        
+        try:
+            enhanced_features = build_enhanced_features(
+                home_form=statistics_service._form_index_from_matches(
+                    home_key, self.history.team_matches(home_key, before=as_of, limit=5)
+                ),
+                away_form=statistics_service._form_index_from_matches(
+                    away_key, self.history.team_matches(away_key, before=as_of, limit=5)
+                ),
+                home_expected=statistics_service._expected_goals_from_matches(
+                    self.history.team_matches(home_key, before=as_of, limit=10, venue='home'), is_home=True
+                ),
+                away_expected=statistics_service._expected_goals_from_matches(
+                    self.history.team_matches(away_key, before=as_of, limit=10, venue='away'), is_home=False
+                ),
+                h2h_stats=statistics_service._head_to_head_from_matches(
+                    home_key, self.history.head_to_head(home_key, away_key, before=as_of, limit=10)
+                ),
+                btts_prob=statistics_service._btts_from_matches(
+                    self.history.team_matches(home_key, before=as_of, limit=10),
+                    self.history.team_matches(away_key, before=as_of, limit=10)
+                ),
+                win_probs=statistics_service._win_probabilities_from_stats(home_stats, away_stats)
+            )
+        except Exception as e:
+            logger.error(f"Error calculating point-in-time features for match {match.id}: {str(e)}")
+            enhanced_features = dict(DEFAULT_ENHANCED_FEATURES)
+        
+        return {**basic_features, **enhanced_features}
+    
+    def compute_features_batch(self, matches: List[Match]) -> List[Dict[str, float]]:
+        """Point-in-time feature rows for many matches with one vectorized pass
+        
+        Form, expected goals, BTTS and the season-to-date team stats come from
+        a :class:`RollingFeatureEngine` built over the whole history index;
+        only the head-to-head summary still uses per-match index lookups.
+        """
+        if len(matches) < ROLLING_ENGINE_MIN_BATCH:
+            return [self.compute_features(match) for match in matches]
+        
+        engine = RollingFeatureEngine.from_records(
+            self.history.records(),
+            extra_team_ids=[m.home_team_id for m in matches] + [m.away_team_id for m in matches],
+            extra_season_ids=[m.season_id for m in matches]
+        )
+        rolling = engine.compute_for(matches)
+        
+        rows = []
+        for i, match in enumerate(matches):
+            home_key, away_key = str(match.home_team_id), str(match.away_team_id)
+            home_stats, away_stats = (
+                self._snapshot_from_columns(rolling, side, i) for side in ('home', 'away')
+            )
+            basic_features = basic_features_from_stats(home_stats, away_stats)
+            
+            try:
+                enhanced_features = build_enhanced_features(
+                    home_form=float(rolling['home_form_index'][i]),
+                    away_form=float(rolling['away_form_index'][i]),
+                    home_expected=float(rolling['home_expected_goals'][i]),
+                    away_expected=float(rolling['away_expected_goals'][i]),
+                    h2h_stats=statistics_service._head_to_head_from_matches(
+                        home_key, self.history.head_to_head(home_key, away_key, before=match.match_date, limit=10)
+                    ),
+                    btts_prob=float(rolling['btts_probability'][i]),
+                    win_probs=statistics_service._win_probabilities_from_stats(home_stats, away_stats)
+                )
+            except Exception as e:
+                logger.error(f"Error calculating point-in-time features for match {match.id}: {str(e)}")
+                enhanced_features = dict(DEFAULT_ENHANCED_FEATURES)
+            
+            rows.append({**basic_features, **enhanced_features})
+        
+        return rows
+    
+    @staticmethod
+    def _snapshot_from_columns(rolling: Dict[str, Any], side: str, i: int) -> TeamStatsSnapshot:
+        wins = int(rolling[f'{side}_season_wins'][i])
+        draws = int(rolling[f'{side}_season_draws'][i])
+        losses = int(rolling[f'{side}_season_losses'][i])
+        goals_for = int(rolling[f'{side}_season_goals_for'][i])
+        goals_against = int(rolling[f'{side}_season_goals_against'][i])
+        return TeamStatsSnapshot(
+            matches_played=int(rolling[f'{side}_season_matches_played'][i]),
+            wins=wins,
+            draws=draws,
+            losses=losses,
+            goals_for=goals_for,
+            goals_against=goals_against,
+            goal_difference=goals_for - goals_against,
+            points=wins * 3 + draws
+        )
+    
+    async def materialize(self, db: AsyncSession, matches: List[Match], refresh: bool = False, chunk_size: int = 1000) -> int:
+        """Compute and upsert feature rows; returns the number of rows written
+        
+        Without ``refresh`` only matches that have no row for the current
+        ``FEATURE_VERSION`` are computed. Rows of matches that have not been
+        played yet are also recomputed once newer results have reached the
+        history index, since their as-of snapshot is "now". Does not commit;
+        the caller owns the transaction.
+        """
+        if not matches:
+            return 0
+        
+        # Always catch up: a row computed from an index that missed a recent
+        # result would be stored, and served, as if it were current
+        await self.history.refresh(db)
+        
+        to_compute = list(matches)
+        if not refresh:
+            existing_result = await db.execute(
+                select(MatchFeatures.match_id, MatchFeatures.computed_at).where(
+                    MatchFeatures.feature_version == FEATURE_VERSION,
+                    MatchFeatures.match_id.in_([m.id for m in matches])
+                )
+            )
+            computed_at = {str(row.match_id): row.computed_at for row in existing_result}
+            watermark = self.history.watermark
+            
+            to_compute = [
+                m for m in matches
+                if str(m.id) not in computed_at
+                or (
+                    m.status != 'finished'
+                    and watermark is not None
+                    and computed_at[str(m.id)] is not None
+                    and computed_at[str(m.id)] < watermark
+                )
+            ]
+        
+        rows = [
+            {
+                'match_id': match.id,
+                'feature_version': FEATURE_VERSION,
+                'as_of': match.match_date,
+                'features': features
+            }
+            for match, features in zip(to_compute, self.compute_features_batch(to_compute))
+        ]
+        
+        for start in range(0, len(rows), chunk_size):
+            stmt = insert(MatchFeatures).values(rows[start:start + chunk_size])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[MatchFeatures.match_id, MatchFeatures.feature_version],
+                set_={
+                    'as_of': stmt.excluded.as_of,
+                    'features': stmt.excluded.features,
+                    'computed_at': func.now()
+                }
+            )
+            await db.execute(stmt)
+        
+        if rows:
+            logger.info(f"Materialized {len(rows)} feature rows ({FEATURE_VERSION})")
+        
+        return len(rows)
+    
+    async def invalidate(self, db: AsyncSession, fixtures: Iterable[Tuple[Any, Any, datetime]]) -> int:
+        """Drop stored rows that may have seen the results of ``(home_team_id, away_team_id, match_date)`` fixtures
+        
+        Every row of a match of either team on or after the fixture's date
+        goes (season stats, form, expected goals, BTTS and head-to-head all
+        look back from there); pass both the old and the new state of a
+        changed match. Does not commit: call it in the transaction that
+        writes the matches. Returns the number of rows deleted.
+        """
+        since: Dict[Any, datetime] = {}
+        for home_team_id, away_team_id, match_date in fixtures:
+            for team_id in (home_team_id, away_team_id):
+                if team_id is not None and match_date is not None and (team_id not in since or match_date < since[team_id]):
+                    since[team_id] = match_date
+        
+        deleted = 0
+        teams = list(since.items())
+        for start in range(0, len(teams), INVALIDATE_TEAMS_CHUNK_SIZE):
+            affected = select(Match.id).where(or_(*[
+                and_(or_(Match.home_team_id == team_id, Match.away_team_id == team_id), Match.match_date >= match_date)
+                for team_id, match_date in teams[start:start + INVALIDATE_TEAMS_CHUNK_SIZE]
+            ]))
+            result = await db.execute(
+                delete(MatchFeatures).where(
+                    MatchFeatures.feature_version == FEATURE_VERSION,
+                    MatchFeatures.match_id.in_(affected)
+                )
+            )
+            deleted += result.rowcount or 0
+        
+        if deleted:
+            logger.info(f"Invalidated {deleted} feature rows after changes to {len(since)} teams' matches")
+        return deleted
+    
+    async def load(self, db: AsyncSession, match_ids: List[Any]) -> pd.DataFrame:
+        """Read stored feature rows in ``match_ids`` order with a single indexed scan"""
+        result = await db.execute(
+            select(MatchFeatures.match_id, MatchFeatures.features).where(
+                MatchFeatures.feature_version == FEATURE_VERSION,
+                MatchFeatures.match_id.in_(match_ids)
+            )
+        )
+        by_match = {str(row.match_id): row.features for row in result}
+        
+        missing = [match_id for match_id in match_ids if str(match_id) not in by_match]
+        if missing:
+            raise ValueError(f"No {FEATURE_VERSION} features stored for {len(missing)} matches")
+        
+        return pd.DataFrame(
+            [by_match[str(match_id)] for match_id in match_ids],
+            columns=FEATURE_COLUMNS
+        )
+    
+    async def get_features(self, db: AsyncSession, matches: List[Match], refresh: bool = False) -> pd.DataFrame:
+        """Materialize whatever is missing or stale, then read the feature matrix"""
+        await self.materialize(db, matches, refresh=refresh)
+        return await self.load(db, [m.id for m in matches])
+
+# Global feature store instance
+feature_store = FeatureStore()
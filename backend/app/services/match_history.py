@@ -0,0 +1,247 @@
+import asyncio
+import logging
+import time
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.database import Match
+
+logger = logging.getLogger(__name__)
+
+class MatchRecord(NamedTuple):
+    """Lightweight, immutable copy of a finished match"""
+    id: str
+    home_team_id: str
+    away_team_id: str
+    season_id: str
+    match_date: datetime
+    home_goals: Optional[int]
+    away_goals: Optional[int]
+    winner: Optional[str]
+
+class _Series:
+    """Matches kept in ascending (match_date, id) order with a parallel key list for bisecting"""
+
+    __slots__ = ('keys', 'records')
+
+    def __init__(self):
+        self.keys: List[Tuple[datetime, str]] = []
+        self.records: List[MatchRecord] = []
+
+    def add(self, record: MatchRecord):
+        key = (record.match_date, record.id)
+        position = bisect_left(self.keys, key)
+        self.keys.insert(position, key)
+        self.records.insert(position, record)
+
+    def remove(self, record: MatchRecord):
+        key = (record.match_date, record.id)
+        position = bisect_left(self.keys, key)
+        if position < len(self.keys) and self.keys[position] == key:
+            del self.keys[position]
+            del self.records[position]
+
+    def latest(self, before: Optional[datetime] = None, limit: Optional[int] = None) -> List[MatchRecord]:
+        """Most recent matches strictly before ``before``, newest first"""
+        end = bisect_left(self.keys, (before,)) if before is not None else len(self.records)
+        start = max(0, end - limit) if limit is not None else 0
+        return self.records[start:end][::-1]
+
+def _as_utc(value: datetime) -> datetime:
+    """Treat naive datetimes as UTC so they compare with timestamptz values"""
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+class MatchHistoryIndex:
+    """In-process index of finished matches keyed by team and by unordered team pair
+
+    Answers "last N matches before date D" with a binary search instead of a
+    database round trip. The index is loaded once, patched in place when a
+    match is written through the API and refreshed incrementally from
+    ``matches.updated_at`` so that changes made by other processes show up
+    within ``MATCH_HISTORY_REFRESH_SECONDS``.
+
+    ``updated_at`` is stamped at transaction start, so a row can commit
+    after a refresh has already moved past its timestamp; each refresh
+    re-reads ``MATCH_HISTORY_REFRESH_OVERLAP_SECONDS`` before the watermark
+    and re-applies those rows (idempotent by id). ``version`` changes
+    whenever the indexed content does, including such late rows.
+    """
+
+    def __init__(self):
+        self._reset()
+        self._lock = None
+        self._lock_loop = None
+
+    def _reset(self):
+        self._by_id: Dict[str, MatchRecord] = {}
+        self._team: Dict[str, _Series] = {}
+        self._home: Dict[str, _Series] = {}
+        self._away: Dict[str, _Series] = {}
+        self._pair: Dict[frozenset, _Series] = {}
+        self._season: Dict[str, _Series] = {}
+        self._watermark: Optional[datetime] = None
+        self._version = getattr(self, '_version', 0) + 1
+        self._last_refresh = 0.0
+        self.is_loaded = False
+
+    @property
+    def watermark(self) -> Optional[datetime]:
+        """Latest ``matches.updated_at`` applied from the database"""
+        return self._watermark
+
+    @property
+    def version(self) -> int:
+        """Counter bumped whenever a match is added, changed or removed"""
+        return self._version
+
+    def _get_lock(self) -> asyncio.Lock:
+        # Celery tasks run each job in a fresh event loop; a lock cannot be shared across loops
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    def _series_for(self, record: MatchRecord):
+        yield self._team.setdefault(record.home_team_id, _Series())
+        yield self._team.setdefault(record.away_team_id, _Series())
+        yield self._home.setdefault(record.home_team_id, _Series())
+        yield self._away.setdefault(record.away_team_id, _Series())
+        yield self._pair.setdefault(frozenset((record.home_team_id, record.away_team_id)), _Series())
+        yield self._season.setdefault(record.season_id, _Series())
+
+    def _add(self, record: MatchRecord):
+        self._by_id[record.id] = record
+        for series in self._series_for(record):
+            series.add(record)
+        self._version += 1
+
+    def remove(self, match_id) -> None:
+        """Drop a match from the index (deleted or no longer finished)"""
+        record = self._by_id.pop(str(match_id), None)
+        if record is None:
+            return
+        for series in self._series_for(record):
+            series.remove(record)
+        self._version += 1
+
+    def upsert_match(self, match: Match) -> bool:
+        """Apply the current state of a match row to the index; True if the index changed"""
+        record = None
+        if match.status == 'finished' and not match.is_deleted:
+            record = MatchRecord(
+                id=str(match.id),
+                home_team_id=str(match.home_team_id),
+                away_team_id=str(match.away_team_id),
+                season_id=str(match.season_id),
+                match_date=_as_utc(match.match_date),
+                home_goals=match.home_goals,
+                away_goals=match.away_goals,
+                winner=match.winner
+            )
+        if self._by_id.get(str(match.id)) == record:
+            return False
+
+        self.remove(match.id)
+        if record is not None:
+            self._add(record)
+        return True
+
+    async def load(self, db: AsyncSession) -> None:
+        """Build the index from scratch with a single query"""
+        async with self._get_lock():
+            await self._load(db)
+
+    async def _load(self, db: AsyncSession) -> None:
+        started = time.perf_counter()
+        result = await db.execute(
+            select(Match).where(
+                Match.status == 'finished',
+                Match.is_deleted == False
+            )
+        )
+        matches = result.scalars().all()
+
+        self._reset()
+        for match in matches:
+            self.upsert_match(match)
+            self._advance_watermark(match)
+
+        self.is_loaded = True
+        self._last_refresh = time.monotonic()
+        logger.info(f"Match history index loaded: {len(self._by_id)} matches in {time.perf_counter() - started:.3f}s")
+
+    def _advance_watermark(self, match: Match):
+        # Only rows read from the database move the watermark; local upserts from
+        # the API must not hide concurrent changes made by other processes
+        if match.updated_at is not None and (self._watermark is None or match.updated_at > self._watermark):
+            self._watermark = match.updated_at
+
+    async def refresh(self, db: AsyncSession) -> int:
+        """Apply matches changed since the last load/refresh; returns the number of rows that changed the index"""
+        async with self._get_lock():
+            if not self.is_loaded or self._watermark is None:
+                await self._load(db)
+                return len(self._by_id)
+
+            since = self._watermark - timedelta(seconds=settings.MATCH_HISTORY_REFRESH_OVERLAP_SECONDS)
+            result = await db.execute(
+                select(Match).where(Match.updated_at >= since)
+            )
+
+            changed = 0
+            for match in result.scalars().all():
+                if self.upsert_match(match):
+                    changed += 1
+                self._advance_watermark(match)
+
+            self._last_refresh = time.monotonic()
+            if changed:
+                logger.debug(f"Match history index refreshed with {changed} changed matches")
+            return changed
+
+    async def ensure_fresh(self, db: AsyncSession, max_age: float = None) -> None:
+        """Load the index on first use and refresh it when older than ``max_age`` seconds"""
+        if max_age is None:
+            max_age = settings.MATCH_HISTORY_REFRESH_SECONDS
+        if not self.is_loaded or time.monotonic() - self._last_refresh > max_age:
+            await self.refresh(db)
+
+    def team_matches(self, team_id, before: datetime = None, limit: int = None, venue: str = None) -> List[MatchRecord]:
+        """Last ``limit`` matches of a team before ``before``, newest first
+
+        ``venue`` restricts the lookup to the team's ``'home'`` or ``'away'`` matches.
+        """
+        index = {'home': self._home, 'away': self._away}.get(venue, self._team)
+        series = index.get(str(team_id))
+        if series is None:
+            return []
+        return series.latest(_as_utc(before), limit)
+
+    def head_to_head(self, team_a, team_b, before: datetime = None, limit: int = None) -> List[MatchRecord]:
+        """Last ``limit`` meetings between two teams (either venue) before ``before``, newest first"""
+        series = self._pair.get(frozenset((str(team_a), str(team_b))))
+        if series is None:
+            return []
+        return series.latest(_as_utc(before), limit)
+
+    def records(self) -> List[MatchRecord]:
+        """Every indexed match, in no particular order"""
+        return list(self._by_id.values())
+
+    def season_matches(self, season_id, before: datetime = None) -> List[MatchRecord]:
+        """All finished matches of a season before ``before``, newest first"""
+        series = self._season.get(str(season_id))
+        if series is None:
+            return []
+        return series.latest(_as_utc(before))
+
+# Global match history index instance
+match_history_index = MatchHistoryIndex()
@@ -0,0 +1,420 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, AsyncIterable, AsyncIterator, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple, Union
+
+from sqlalchemy import literal, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import response_cache, TAG_MATCHES
+from app.models.database import Season, Team
+from app.services.feature_store import feature_store
+from app.services.match_history import match_history_index
+from app.services.team_stats_service import team_stats_service
+
+logger = logging.getLogger(__name__)
+
+MATCH_STATUSES = ('scheduled', 'live', 'finished', 'postponed', 'cancelled')
+MATCH_WINNERS = ('home', 'away', 'draw')
+
+# Columns accepted by the bulk import, in staging-table order (after row_no)
+IMPORT_COLUMNS = [
+    'home_team_id', 'away_team_id', 'season_id', 'match_date', 'home_goals', 'away_goals',
+    'status', 'winner', 'attendance', 'referee', 'weather_conditions', 'is_deleted'
+]
+
+# Rows per COPY into the staging table
+IMPORT_COPY_CHUNK_SIZE = 10000
+
+STAGING_TABLE = "match_import_staging"
+
+# Seconds the team/season ID lookup is reused between imports
+REFERENCE_IDS_MAX_AGE = 300
+
+CREATE_STAGING_SQL = f"""
+CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} (
+    row_no INTEGER NOT NULL,
+    home_team_id UUID NOT NULL,
+    away_team_id UUID NOT NULL,
+    season_id UUID NOT NULL,
+    match_date TIMESTAMP WITH TIME ZONE NOT NULL,
+    home_goals INTEGER,
+    away_goals INTEGER,
+    status TEXT NOT NULL,
+    winner TEXT,
+    attendance INTEGER,
+    referee TEXT,
+    weather_conditions JSONB,
+    is_deleted BOOLEAN
+) ON COMMIT DROP
+"""
+
+# One statement moves the staged rows into matches; within the file the last row of a fixture wins.
+# ``previous`` reads the rows as they were before the upsert (same statement snapshot), so a
+# fixture moved to another season also reports the season it left. Rows merge into the live
+# match of their fixture (uq_matches_fixture is partial); a soft-deleted one is left as it is and
+# the fixture is created again. Rows that ask for is_deleted are applied by SET_DELETED_SQL.
+MERGE_SQL = f"""
+WITH staged AS (
+    SELECT DISTINCT ON (home_team_id, away_team_id, match_date) *
+    FROM {STAGING_TABLE}
+    ORDER BY home_team_id, away_team_id, match_date, row_no DESC
+), previous AS (
+    SELECT matches.home_team_id, matches.away_team_id, matches.match_date, matches.season_id
+    FROM matches
+    JOIN staged USING (home_team_id, away_team_id, match_date)
+    WHERE matches.is_deleted = false
+), merged AS (
+    INSERT INTO matches (
+        id, home_team_id, away_team_id, season_id, match_date, home_goals, away_goals,
+        status, winner, attendance, referee, weather_conditions, is_deleted, finished_at
+    )
+    SELECT
+        gen_random_uuid(), home_team_id, away_team_id, season_id, match_date, home_goals, away_goals,
+        status, winner, attendance, referee, weather_conditions, false,
+        CASE WHEN status = 'finished' THEN now() END
+    FROM staged
+    ON CONFLICT (home_team_id, away_team_id, match_date) WHERE is_deleted = false DO UPDATE SET
+        season_id = EXCLUDED.season_id,
+        home_goals = EXCLUDED.home_goals,
+        away_goals = EXCLUDED.away_goals,
+        status = EXCLUDED.status,
+        winner = EXCLUDED.winner,
+        -- Result time: stamped when the fixture becomes finished, kept through re-imports
+        finished_at = CASE
+            WHEN EXCLUDED.status <> 'finished' THEN NULL
+            WHEN matches.status = 'finished' THEN matches.finished_at
+            ELSE now()
+        END,
+        attendance = COALESCE(EXCLUDED.attendance, matches.attendance),
+        referee = COALESCE(EXCLUDED.referee, matches.referee),
+        weather_conditions = COALESCE(EXCLUDED.weather_conditions, matches.weather_conditions),
+        updated_at = now()
+    RETURNING home_team_id, away_team_id, match_date, season_id, (xmax = 0) AS inserted
+)
+SELECT
+    merged.home_team_id, merged.away_team_id, merged.match_date, merged.season_id,
+    previous.season_id AS previous_season_id, merged.inserted
+FROM merged
+LEFT JOIN previous USING (home_team_id, away_team_id, match_date)
+"""
+
+# Soft-deletes the live match of fixtures whose last staged row sets is_deleted; run after MERGE_SQL
+SET_DELETED_SQL = f"""
+UPDATE matches
+SET is_deleted = true, updated_at = now()
+FROM (
+    SELECT DISTINCT ON (home_team_id, away_team_id, match_date) home_team_id, away_team_id, match_date, is_deleted
+    FROM {STAGING_TABLE}
+    ORDER BY home_team_id, away_team_id, match_date, row_no DESC
+) AS staged
+WHERE matches.home_team_id = staged.home_team_id
+    AND matches.away_team_id = staged.away_team_id
+    AND matches.match_date = staged.match_date
+    AND staged.is_deleted
+    AND matches.is_deleted = false
+"""
+
+def _optional_int(value: Any, field: str):
+    if value is None or value == '':
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{field} must be an integer")
+    if number != int(number) or number < 0:
+        raise ValueError(f"{field} must be a non-negative integer")
+    return int(number)
+
+def _optional_bool(value: Any, field: str) -> Optional[bool]:
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool):
+        return value
+    text_value = str(value).strip().lower()
+    if text_value in ('true', 't', '1', 'yes'):
+        return True
+    if text_value in ('false', 'f', '0', 'no'):
+        return False
+    raise ValueError(f"{field} must be true or false")
+
+def _uuid(value: Any, field: str) -> uuid.UUID:
+    if value is None or value == '':
+        raise ValueError(f"{field} is required")
+    try:
+        return value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
+    except ValueError:
+        raise ValueError(f"{field} is not a valid UUID")
+
+def _datetime(value: Any, field: str) -> datetime:
+    if value is None or value == '':
+        raise ValueError(f"{field} is required")
+    if not isinstance(value, datetime):
+        try:
+            value = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        except ValueError:
+            raise ValueError(f"{field} is not an ISO 8601 datetime")
+    # Naive values are taken as UTC
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+def coerce_match_row(raw: Dict[str, Any]) -> Tuple:
+    """Validate one input record and return it as a staging tuple (without row_no)
+
+    Raises ValueError with a message suitable for a per-row error report.
+    """
+    if isinstance(raw, (str, bytes)):
+        # One NDJSON line
+        try:
+            raw = json.loads(raw)
+        except ValueError:
+            raise ValueError("row is not valid JSON")
+    if not isinstance(raw, dict):
+        raise ValueError("row must be an object")
+
+    home_team_id = _uuid(raw.get('home_team_id'), 'home_team_id')
+    away_team_id = _uuid(raw.get('away_team_id'), 'away_team_id')
+    if home_team_id == away_team_id:
+        raise ValueError("home_team_id and away_team_id must differ")
+
+    status = raw.get('status') or 'scheduled'
+    if status not in MATCH_STATUSES:
+        raise ValueError(f"status must be one of: {MATCH_STATUSES}")
+
+    winner = raw.get('winner') or None
+    if winner is not None and winner not in MATCH_WINNERS:
+        raise ValueError(f"winner must be one of: {MATCH_WINNERS}")
+
+    weather = raw.get('weather_conditions')
+    if weather in ('', None):
+        weather = None
+    elif isinstance(weather, str):
+        try:
+            json.loads(weather)
+        except ValueError:
+            raise ValueError("weather_conditions must be a JSON object")
+    else:
+        weather = json.dumps(weather)
+
+    return (
+        home_team_id,
+        away_team_id,
+        _uuid(raw.get('season_id'), 'season_id'),
+        _datetime(raw.get('match_date'), 'match_date'),
+        _optional_int(raw.get('home_goals'), 'home_goals'),
+        _optional_int(raw.get('away_goals'), 'away_goals'),
+        status,
+        winner,
+        _optional_int(raw.get('attendance'), 'attendance'),
+        raw.get('referee') or None,
+        weather,
+        _optional_bool(raw.get('is_deleted'), 'is_deleted')
+    )
+
+async def ndjson_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    """Non-empty lines of an NDJSON byte stream, without holding the whole body"""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if buffer.strip():
+        yield buffer
+
+async def _records(rows: Union[Iterable[Any], AsyncIterable[Any]]) -> AsyncIterator[Any]:
+    if hasattr(rows, "__aiter__"):
+        async for raw in rows:
+            yield raw
+    else:
+        for raw in rows:
+            yield raw
+
+class ReferenceIds:
+    """Cached sets of live team IDs and season IDs used to validate imported rows
+
+    One query loads both sets; they are reused for ``REFERENCE_IDS_MAX_AGE``
+    seconds. An import that meets an unknown ID reloads them once before
+    rejecting the row, so teams or seasons added in the meantime are found.
+    """
+
+    def __init__(self):
+        self.team_ids: FrozenSet[uuid.UUID] = frozenset()
+        self.season_ids: FrozenSet[uuid.UUID] = frozenset()
+        self._loaded_at: Optional[float] = None
+        self._lock = None
+        self._lock_loop = None
+
+    def _get_lock(self) -> asyncio.Lock:
+        # Celery tasks run each job in a fresh event loop; a lock cannot be shared across loops
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    async def load(self, db: AsyncSession, force: bool = False) -> None:
+        async with self._get_lock():
+            if not force and self._loaded_at is not None and time.monotonic() - self._loaded_at < REFERENCE_IDS_MAX_AGE:
+                return
+            result = await db.execute(
+                select(Team.id, literal('team')).where(Team.is_deleted == False).union_all(
+                    select(Season.id, literal('season'))
+                )
+            )
+            rows = result.all()
+            self.team_ids = frozenset(row[0] for row in rows if row[1] == 'team')
+            self.season_ids = frozenset(row[0] for row in rows if row[1] == 'season')
+            self._loaded_at = time.monotonic()
+
+    def missing(self, values: Tuple) -> Optional[str]:
+        """Error message for a staging tuple whose teams or season are unknown"""
+        home_team_id, away_team_id, season_id = values[:3]
+        unknown = [
+            field for field, value, known in (
+                ('home_team_id', home_team_id, self.team_ids),
+                ('away_team_id', away_team_id, self.team_ids),
+                ('season_id', season_id, self.season_ids)
+            ) if value not in known
+        ]
+        return f"unknown {', '.join(unknown)}" if unknown else None
+
+class MatchImporter:
+    """Bulk upsert of matches through a COPY-loaded staging table
+
+    Rows are validated in Python, streamed with COPY (asyncpg's binary
+    ``copy_records_to_table`` on the session's own connection) into a
+    temporary table that is dropped at commit, and merged with a single
+    ``INSERT ... SELECT ... ON CONFLICT`` on the fixture key
+    ``(home_team_id, away_team_id, match_date)`` of live matches; a
+    soft-deleted match stays deleted and its fixture is created again.
+    A row with ``is_deleted`` true soft-deletes its fixture. Afterwards the affected
+    seasons' team stats are recomputed in the same transaction; the match
+    history index and the response cache are refreshed after the commit.
+    """
+
+    def __init__(self):
+        self.references = ReferenceIds()
+
+    async def _driver_connection(self, db: AsyncSession):
+        connection = await db.connection()
+        raw = await connection.get_raw_connection()
+        return raw.driver_connection
+
+    async def begin(self, db: AsyncSession) -> None:
+        """Create (or empty) the staging table in the current transaction"""
+        await db.execute(text(CREATE_STAGING_SQL))
+        await db.execute(text(f"TRUNCATE {STAGING_TABLE}"))
+
+    async def stage(self, db: AsyncSession, rows: List[Tuple[int, Tuple]]) -> int:
+        """COPY ``(row_no, staging tuple)`` pairs into the staging table"""
+        if not rows:
+            return 0
+        driver = await self._driver_connection(db)
+        await driver.copy_records_to_table(
+            STAGING_TABLE,
+            records=[(row_no, *values) for row_no, values in rows],
+            columns=['row_no', *IMPORT_COLUMNS]
+        )
+        return len(rows)
+
+    async def merge(self, db: AsyncSession) -> Dict[str, Any]:
+        """Upsert the staged rows into matches, recompute the affected seasons' team stats and drop stale feature rows"""
+        result = await db.execute(text(MERGE_SQL))
+        merged = result.all()
+        await db.execute(text(SET_DELETED_SQL))
+
+        # A fixture that changed season affects the standings of both
+        season_ids: Set[Any] = {row.season_id for row in merged}
+        season_ids.update(row.previous_season_id for row in merged if row.previous_season_id is not None)
+        inserted = sum(1 for row in merged if row.inserted)
+
+        drifted_teams = 0
+        for season_id in season_ids:
+            report = await team_stats_service.recompute_season(db, season_id)
+            drifted_teams += report['drifted_teams']
+        await feature_store.invalidate(db, [(row.home_team_id, row.away_team_id, row.match_date) for row in merged])
+
+        return {
+            'inserted': inserted,
+            'updated': len(merged) - inserted,
+            'season_ids': [str(season_id) for season_id in season_ids],
+            'team_stats_rows_changed': drifted_teams
+        }
+
+    async def after_commit(self, db: AsyncSession) -> None:
+        """Bring in-process and shared caches up to date with the committed import"""
+        try:
+            await match_history_index.refresh(db)
+        except Exception as e:
+            logger.error(f"Failed to refresh match history index after import: {str(e)}")
+        await response_cache.invalidate(TAG_MATCHES)
+
+    async def import_rows(
+        self,
+        db: AsyncSession,
+        rows: Union[Iterable[Any], AsyncIterable[Any]],
+        validate_references: bool = True
+    ) -> Dict[str, Any]:
+        """Validate, stage and merge raw match records; commits on success
+
+        ``rows`` may be a sync or async iterable of dicts or NDJSON lines.
+        Invalid rows, including rows naming an unknown team or season, are
+        skipped and reported as ``{'row': n, 'error': ...}`` with ``n``
+        counting from 1 in input order.
+        """
+        started = time.perf_counter()
+        await self.begin(db)
+        if validate_references:
+            await self.references.load(db)
+        references_reloaded = False
+
+        errors: List[Dict[str, Any]] = []
+        pending: List[Tuple[int, Tuple]] = []
+        staged = 0
+        row_no = 0
+        async for raw in _records(rows):
+            row_no += 1
+            try:
+                values = coerce_match_row(raw)
+            except ValueError as e:
+                errors.append({'row': row_no, 'error': str(e)})
+                continue
+
+            if validate_references:
+                missing = self.references.missing(values)
+                if missing and not references_reloaded:
+                    await self.references.load(db, force=True)
+                    references_reloaded = True
+                    missing = self.references.missing(values)
+                if missing:
+                    errors.append({'row': row_no, 'error': missing})
+                    continue
+
+            pending.append((row_no, values))
+            if len(pending) >= IMPORT_COPY_CHUNK_SIZE:
+                staged += await self.stage(db, pending)
+                pending = []
+        staged += await self.stage(db, pending)
+
+        summary = {'rows': row_no, 'staged': staged, 'inserted': 0, 'updated': 0, 'season_ids': [], 'team_stats_rows_changed': 0}
+        if staged:
+            summary.update(await self.merge(db))
+        await db.commit()
+        if staged:
+            await self.after_commit(db)
+
+        summary['duplicates'] = staged - summary['inserted'] - summary['updated']
+        summary['errors'] = errors
+        summary['seconds'] = round(time.perf_counter() - started, 3)
+        logger.info(
+            f"Match import: {summary['inserted']} inserted, {summary['updated']} updated, "
+            f"{len(errors)} rejected in {summary['seconds']}s"
+        )
+        return summary
+
+# Global match importer instance
+match_importer = MatchImporter()
@@ -5,7 +5,6 @@ from sklearn.linear_model import LogisticRegression
 from sklearn.model_selection import train_test_split, cross_val_score
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
-import joblib
 import os
 from typing import Dict, Any, List, Tuple, Optional
 from datetime import datetime, timedelta
@@ -13,17 +12,26 @@ import logging
 
 from app.core.config import settings
 from app.models.database import Match, Team, TeamStats, Model
+from app.services import tree_inference
+from app.services.model_artifacts import save_artifact
+from app.services.model_registry import model_registry, basic_model_paths
+from app.services.feature_cache import feature_matrix_cache, TrainingMatrix
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever _calculate_match_features changes; cached training matrices of older versions are rebuilt
+BASIC_FEATURE_VERSION = "basic-v1"
+
+# Most recent finished matches used for training
+TRAINING_MATCH_LIMIT = 1000
+
 class MLService:
     """Machine Learning service for football predictions"""
     
     def __init__(self):
-        self.models = {}
-        self.scalers = {}
+        self.registry = model_registry
         
     async def prepare_features(self, db: AsyncSession, match_id: str = None, matches: List[Match] = None) -> pd.DataFrame:
         """Prepare features for training or prediction"""
@@ -136,7 +144,8 @@ class MLService:
                 select(Match).where(
                     ((Match.home_team_id == home_team_id) & (Match.away_team_id == away_team_id)) |
                     ((Match.home_team_id == away_team_id) & (Match.away_team_id == home_team_id)),
-                    Match.status == 'finished'
+                    Match.status == 'finished',
+                    Match.is_deleted == False
                 ).order_by(Match.match_date.desc()).limit(5)
             )
             h2h_matches = h2h_result.scalars().all()
@@ -207,7 +216,8 @@ class MLService:
                 select(Match).where(
                     ((Match.home_team_id == team_id) | (Match.away_team_id == team_id)),
                     Match.match_date < before_date,
-                    Match.status == 'finished'
+                    Match.status == 'finished',
+                    Match.is_deleted == False
                 ).order_by(Match.match_date.desc()).limit(5)
             )
             recent_matches = recent_matches_result.scalars().all()
@@ -240,16 +250,18 @@ class MLService:
     async def train_model(self, db: AsyncSession, model_config: Dict[str, Any]) -> Dict[str, Any]:
         """Train a machine learning model"""
         try:
-            # Get training data
-            training_matches = await self._get_training_matches(db)
+            # Training matrix, reused from the feature cache while matches and team stats are unchanged
+            matrix = await feature_matrix_cache.get_or_build(
+                db, 'basic', BASIC_FEATURE_VERSION,
+                lambda: self._build_training_matrix(db),
+                refresh=model_config.get('refresh_features', False),
+                limit=TRAINING_MATCH_LIMIT
+            )
+            X, y = matrix.X, matrix.y
             
-            if len(training_matches) < 50:
+            if len(y) < 50:
                 raise ValueError("Not enough training data (minimum 50 matches required)")
             
-            # Prepare features and labels
-            X = await self.prepare_features(db, matches=training_matches)
-            y = self._prepare_labels(training_matches)
-            
             # Split data
             X_train, X_test, y_train, y_test = train_test_split(
                 X, y, test_size=0.2, random_state=42, stratify=y
@@ -294,16 +306,14 @@ class MLService:
             
             # Save model and scaler
             model_id = model_config.get('model_id')
-            model_path = os.path.join(settings.MODEL_STORAGE_PATH, f"model_{model_id}.joblib")
-            scaler_path = os.path.join(settings.MODEL_STORAGE_PATH, f"scaler_{model_id}.joblib")
+            model_path, scaler_path = basic_model_paths(model_id)
             
             os.makedirs(settings.MODEL_STORAGE_PATH, exist_ok=True)
-            joblib.dump(model, model_path)
-            joblib.dump(scaler, scaler_path)
+            save_artifact(model, model_path)
+            save_artifact(scaler, scaler_path)
             
             # Store in memory for quick access
-            self.models[model_id] = model
-            self.scalers[model_id] = scaler
+            self.registry.put_basic(model_id, model, scaler)
             
             return {
                 'accuracy': accuracy,
@@ -322,6 +332,12 @@ class MLService:
             logger.error(f"Error training model: {str(e)}")
             raise
     
+    async def _build_training_matrix(self, db: AsyncSession) -> TrainingMatrix:
+        """Features and labels of the training matches"""
+        training_matches = await self._get_training_matches(db)
+        X = await self.prepare_features(db, matches=training_matches)
+        return TrainingMatrix.build(X, self._prepare_labels(training_matches), training_matches)
+    
     async def _get_training_matches(self, db: AsyncSession) -> List[Match]:
         """Get matches for training (finished matches with results)"""
         result = await db.execute(
@@ -329,7 +345,7 @@ class MLService:
                 Match.status == 'finished',
                 Match.winner.isnot(None),
                 Match.is_deleted == False
-            ).order_by(Match.match_date.desc()).limit(1000)  # Last 1000 matches
+            ).order_by(Match.match_date.desc()).limit(TRAINING_MATCH_LIMIT)
         )
         return result.scalars().all()
     
@@ -349,19 +365,14 @@ class MLService:
         """Make prediction for a single match"""
         try:
             # Load model if not in memory
-            if model_id not in self.models:
-                await self._load_model(model_id)
-            
-            model = self.models[model_id]
-            scaler = self.scalers[model_id]
+            model, scaler = await self.registry.get_basic(model_id)
             
             # Prepare features
             X = await self.prepare_features(db, match_id=match_id)
-            X_scaled = scaler.transform(X)
             
             # Make prediction
-            prediction = model.predict(X_scaled)[0]
-            probabilities = model.predict_proba(X_scaled)[0]
+            probabilities = tree_inference.predict_proba(model, X, scaler=scaler)[0]
+            prediction = model.classes_[np.argmax(probabilities)]
             
             # Convert prediction to readable format
             winner_map = {0: 'home', 1: 'away', 2: 'draw'}
@@ -403,24 +414,6 @@ class MLService:
         # Simple calculation based on historical performance and form
         expected_goals = goals_per_match * (1 + form / 3) + home_advantage
         return max(0.1, min(5.0, expected_goals))  # Clamp between 0.1 and 5.0
-    
-    async def _load_model(self, model_id: str):
-        """Load model and scaler from disk"""
-        try:
-            model_path = os.path.join(settings.MODEL_STORAGE_PATH, f"model_{model_id}.joblib")
-            scaler_path = os.path.join(settings.MODEL_STORAGE_PATH, f"scaler_{model_id}.joblib")
-            
-            if not os.path.exists(model_path) or not os.path.exists(scaler_path):
-                raise FileNotFoundError(f"Model files not found for model {model_id}")
-            
-            self.models[model_id] = joblib.load(model_path)
-            self.scalers[model_id] = joblib.load(scaler_path)
-            
-            logger.info(f"Model {model_id} loaded successfully")
-            
-        except Exception as e:
-            logger.error(f"Error loading model {model_id}: {str(e)}")
-            raise
 
 # Global ML service instance
 ml_service = MLService()
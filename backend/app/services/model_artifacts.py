@@ -0,0 +1,41 @@
+import logging
+import os
+from typing import Any
+
+import joblib
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+def save_artifact(obj: Any, path: str) -> str:
+    """Write a model artifact in joblib's uncompressed layout
+
+    Uncompressed pickles store every NumPy array as a raw, aligned buffer
+    that ``load_artifact`` can memory-map instead of copying. The file is
+    written next to its destination and renamed into place, so a worker
+    loading the model never sees a half-written artifact.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    try:
+        joblib.dump(obj, tmp_path, compress=0)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return path
+
+def load_artifact(path: str, mmap: bool = None) -> Any:
+    """Load a model artifact, memory-mapping its arrays read-only when enabled
+
+    Mapped arrays live in the page cache and are shared by every process
+    that maps the same file (uvicorn and Celery workers alike). Objects that
+    copy their arrays while unpickling, such as scikit-learn's ``Tree``,
+    still end up in private memory, and compressed artifacts are loaded
+    normally since joblib cannot map them.
+    """
+    if mmap is None:
+        mmap = settings.MODEL_MMAP_ARTIFACTS
+    return joblib.load(path, mmap_mode='r' if mmap else None)
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+from typing import Any, Callable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.database import Model
+from app.services.model_artifacts import load_artifact
+
+logger = logging.getLogger(__name__)
+
+def enhanced_model_path(model_id: str) -> str:
+    """Artifact path of an EnhancedMLService pipeline"""
+    return os.path.join(settings.MODEL_STORAGE_PATH, f"enhanced_model_{model_id}.joblib")
+
+def basic_model_paths(model_id: str) -> Tuple[str, str]:
+    """Artifact paths of an MLService model and its scaler"""
+    return (
+        os.path.join(settings.MODEL_STORAGE_PATH, f"model_{model_id}.joblib"),
+        os.path.join(settings.MODEL_STORAGE_PATH, f"scaler_{model_id}.joblib")
+    )
+
+def _artifact_stamp(paths: List[str]) -> Optional[Tuple[Tuple[int, int], ...]]:
+    """(mtime_ns, size) of each artifact file; None if any is missing"""
+    try:
+        return tuple((stat.st_mtime_ns, stat.st_size) for stat in (os.stat(path) for path in paths))
+    except OSError:
+        return None
+
+class _Entry(NamedTuple):
+    value: Any
+    size: int
+    paths: Tuple[str, ...]
+    stamp: Optional[Tuple[Tuple[int, int], ...]]
+
+    def is_stale(self) -> bool:
+        # A retrain rewrites the artifact in place (possibly from another process); a
+        # deleted file is not a newer version, so the cached copy keeps serving
+        current = _artifact_stamp(list(self.paths))
+        return current is not None and current != self.stamp
+
+class ModelRegistry:
+    """Process-wide LRU cache of loaded model artifacts with a memory budget
+
+    Entries are sized by their artifact size on disk, which tracks the
+    unpickled footprint closely for tree ensembles. Loading runs in a worker
+    thread so the event loop never blocks on ``joblib.load``. Each entry
+    remembers the mtime and size of its files, and a hit whose artifact has
+    since been rewritten (a retrain in the training worker) reloads it. The
+    active model is pinned and never evicted; activating another model loads
+    it first and only then swaps the pin, so requests keep being served by
+    the old model until the new one is ready.
+    """
+
+    def __init__(self, max_bytes: int = None):
+        self.max_bytes = max_bytes if max_bytes is not None else settings.MODEL_CACHE_MAX_BYTES
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._pinned: Optional[str] = None
+        self.active_model_id: Optional[str] = None
+        self._lock = None
+        self._lock_loop = None
+
+    def _get_lock(self) -> asyncio.Lock:
+        # Celery tasks run each job in a fresh event loop; a lock cannot be shared across loops
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(entry.size for entry in self._entries.values())
+
+    def keys(self) -> List[str]:
+        """Cached keys, least recently used first"""
+        return list(self._entries.keys())
+
+    def put(self, key: str, value: Any, paths: List[str], stamp=None) -> None:
+        """Insert or replace an entry sized by its artifact files and evict down to the budget"""
+        stamp = stamp if stamp is not None else _artifact_stamp(paths)
+        size = sum(file_size for _, file_size in stamp) if stamp else 0
+        self._entries[key] = _Entry(value, size, tuple(paths), stamp)
+        self._entries.move_to_end(key)
+        self._evict()
+
+    def evict(self, key: str) -> None:
+        """Drop an entry (e.g. when its model is deleted)"""
+        self._entries.pop(key, None)
+        if self._pinned == key:
+            self._pinned = None
+
+    def _evict(self):
+        total = self.total_bytes
+        for key in list(self._entries.keys()):
+            if total <= self.max_bytes:
+                break
+            # Never evict the pinned (active) model or the entry just inserted
+            if key == self._pinned or key == next(reversed(self._entries)):
+                continue
+            total -= self._entries.pop(key).size
+            logger.info(f"Evicted model {key} from registry ({total} of {self.max_bytes} bytes in use)")
+
+    async def get(self, key: str, loader: Callable[[], Any], paths: List[str]) -> Any:
+        """Return a cached artifact, loading it in a worker thread on a miss or when its files changed"""
+        entry = self._entries.get(key)
+        if entry is not None and not entry.is_stale():
+            self._entries.move_to_end(key)
+            return entry.value
+
+        async with self._get_lock():
+            # Another coroutine may have (re)loaded it while we waited
+            entry = self._entries.get(key)
+            if entry is not None and not entry.is_stale():
+                self._entries.move_to_end(key)
+                return entry.value
+
+            # Stamp before loading, so a rewrite during the load is caught by the next get
+            stamp = _artifact_stamp(paths)
+            if stamp is None:
+                raise FileNotFoundError(f"Model files not found for {key}")
+
+            value = await asyncio.to_thread(loader)
+            self.put(key, value, paths, stamp)
+            logger.info(f"Model {key} {'reloaded after its artifact changed' if entry is not None else 'loaded'} into registry")
+            return value
+
+    async def get_enhanced(self, model_id: str):
+        """Pipeline trained by EnhancedMLService"""
+        path = enhanced_model_path(model_id)
+        return await self.get(f"enhanced:{model_id}", lambda: load_artifact(path), [path])
+
+    async def get_basic(self, model_id: str) -> Tuple[Any, Any]:
+        """(model, scaler) trained by MLService"""
+        model_path, scaler_path = basic_model_paths(model_id)
+        return await self.get(
+            f"basic:{model_id}",
+            lambda: (load_artifact(model_path), load_artifact(scaler_path)),
+            [model_path, scaler_path]
+        )
+
+    def put_enhanced(self, model_id: str, pipeline) -> None:
+        self.put(f"enhanced:{model_id}", pipeline, [enhanced_model_path(model_id)])
+
+    def put_basic(self, model_id: str, model, scaler) -> None:
+        self.put(f"basic:{model_id}", (model, scaler), list(basic_model_paths(model_id)))
+
+    def evict_model(self, model_id: str) -> None:
+        self.evict(f"enhanced:{model_id}")
+        self.evict(f"basic:{model_id}")
+        if self.active_model_id == str(model_id):
+            self.active_model_id = None
+
+    async def activate(self, model_id: str) -> bool:
+        """Load a model and make it the pinned active one; returns False if it has no artifact"""
+        model_id = str(model_id)
+        if os.path.exists(enhanced_model_path(model_id)):
+            await self.get_enhanced(model_id)
+            key = f"enhanced:{model_id}"
+        elif all(os.path.exists(path) for path in basic_model_paths(model_id)):
+            await self.get_basic(model_id)
+            key = f"basic:{model_id}"
+        else:
+            logger.warning(f"No artifact on disk for model {model_id}; nothing to preload")
+            return False
+
+        self._pinned = key
+        self.active_model_id = model_id
+        self._evict()
+        logger.info(f"Model {model_id} is now the active model in the registry")
+        return True
+
+    async def preload_active(self, db: AsyncSession) -> Optional[str]:
+        """Warm the registry with the model flagged ``is_active``"""
+        result = await db.execute(
+            select(Model.id).where(
+                Model.is_active == True,
+                Model.is_deleted == False
+            ).order_by(Model.created_at.desc())
+        )
+        model_id = result.scalars().first()
+        if model_id is None:
+            logger.info("No active model to preload")
+            return None
+
+        if await self.activate(str(model_id)):
+            return str(model_id)
+        return None
+
+# Global model registry instance
+model_registry = ModelRegistry()
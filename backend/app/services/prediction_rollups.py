@@ -0,0 +1,122 @@
+import logging
+from typing import Any, List, Optional
+
+from sqlalchemy import select, delete, func, cast, literal, Date, Numeric
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.database import Prediction, PredictionBatch, PredictionDailyRollup
+from app.services.prediction_stats import confidence_bucket, status_counts
+
+logger = logging.getLogger(__name__)
+
+# Counters kept per (day, model, confidence bucket)
+ROLLUP_COUNTERS = ['total', 'correct', 'wrong', 'pending', 'confidence_sum']
+
+# Prediction ids per statement when applying rollup changes
+ROLLUP_CHUNK_SIZE = 500
+
+def prediction_day():
+    """UTC calendar day of Prediction.created_at"""
+    return cast(func.timezone('UTC', Prediction.created_at), Date)
+
+class PredictionRollupService:
+    """Keeps ``prediction_daily_rollups`` in step with the predictions table
+
+    Every change is a single ``INSERT ... SELECT ... GROUP BY ... ON CONFLICT
+    DO UPDATE`` that adds the grouped counts of the affected predictions to
+    the existing rows, so the work is proportional to the predictions that
+    changed. None of the methods commit: call them inside the transaction
+    that writes the predictions. ``rebuild`` recomputes everything from the
+    raw table for backfills or after out-of-band writes.
+    """
+
+    def _grouped(self, filters: List[Any], counters: List[Any]):
+        day = prediction_day().label('day')
+        bucket = confidence_bucket().label('confidence_bucket')
+        return select(
+            day,
+            PredictionBatch.model_id,
+            bucket,
+            *[column.label(name) for name, column in zip(ROLLUP_COUNTERS, counters)]
+        ).select_from(Prediction).join(PredictionBatch, Prediction.batch_id == PredictionBatch.id).where(
+            *filters
+        ).group_by(day, PredictionBatch.model_id, bucket)
+
+    def _counts(self, sign: int) -> List[Any]:
+        counts = status_counts()
+        return [
+            counts['total'] * sign,
+            counts['correct'] * sign,
+            counts['wrong'] * sign,
+            counts['pending'] * sign,
+            func.sum(Prediction.confidence_score) * sign
+        ]
+
+    async def _add(self, db: AsyncSession, grouped) -> int:
+        stmt = insert(PredictionDailyRollup).from_select(
+            ['day', 'model_id', 'confidence_bucket', *ROLLUP_COUNTERS], grouped
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[
+                PredictionDailyRollup.day,
+                PredictionDailyRollup.model_id,
+                PredictionDailyRollup.confidence_bucket
+            ],
+            set_={
+                **{column: getattr(PredictionDailyRollup, column) + stmt.excluded[column] for column in ROLLUP_COUNTERS},
+                'updated_at': func.now()
+            }
+        )
+        result = await db.execute(stmt)
+        return result.rowcount
+
+    async def record_inserted(self, db: AsyncSession, prediction_ids: List[Any]) -> int:
+        """Add newly inserted predictions; returns the number of rollup rows touched"""
+        touched = 0
+        for start in range(0, len(prediction_ids), ROLLUP_CHUNK_SIZE):
+            chunk = prediction_ids[start:start + ROLLUP_CHUNK_SIZE]
+            touched += await self._add(db, self._grouped([Prediction.id.in_(chunk)], self._counts(1)))
+        return touched
+
+    async def record_settled(self, db: AsyncSession, prediction_ids: List[Any]) -> int:
+        """Move predictions that were just evaluated from pending to correct/wrong
+
+        Call it after the new ``result_status`` values have been flushed and
+        only with ids that were pending before.
+        """
+        counts = status_counts()
+        counters = [
+            literal(0),
+            counts['correct'],
+            counts['wrong'],
+            -(counts['correct'] + counts['wrong']),
+            literal(0, Numeric())
+        ]
+
+        touched = 0
+        for start in range(0, len(prediction_ids), ROLLUP_CHUNK_SIZE):
+            chunk = prediction_ids[start:start + ROLLUP_CHUNK_SIZE]
+            touched += await self._add(db, self._grouped([Prediction.id.in_(chunk)], counters))
+        return touched
+
+    async def record_deleted(self, db: AsyncSession, *filters: Any) -> int:
+        """Subtract the predictions matching ``filters``; call it before deleting them"""
+        touched = await self._add(db, self._grouped(list(filters), self._counts(-1)))
+        await db.execute(delete(PredictionDailyRollup).where(PredictionDailyRollup.total <= 0))
+        return touched
+
+    async def rebuild(self, db: AsyncSession, model_id: Optional[Any] = None) -> int:
+        """Recompute the rollup (of one model, or all) from the predictions table"""
+        rollup_filters, prediction_filters = [], []
+        if model_id:
+            rollup_filters.append(PredictionDailyRollup.model_id == model_id)
+            prediction_filters.append(PredictionBatch.model_id == model_id)
+
+        await db.execute(delete(PredictionDailyRollup).where(*rollup_filters))
+        rows = await self._add(db, self._grouped(prediction_filters, self._counts(1)))
+        logger.info(f"Prediction rollup rebuilt: {rows} rows")
+        return rows
+
+# Global prediction rollup service instance
+prediction_rollup_service = PredictionRollupService()
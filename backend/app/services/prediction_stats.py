@@ -0,0 +1,40 @@
+from decimal import Decimal
+from typing import Any, Dict
+
+from sqlalchemy import func, literal, Numeric
+
+from app.models.database import Prediction
+
+# Confidence ranges reported by the stats endpoints, indexed by bucket number 1..5
+CONFIDENCE_RANGES = {
+    1: "0.5-0.6",
+    2: "0.6-0.7",
+    3: "0.7-0.8",
+    4: "0.8-0.9",
+    5: "0.9-1.0"
+}
+
+def confidence_bucket(column=Prediction.confidence_score):
+    """SQL bucket number (0 below 0.5, 1..5 for the ranges above, with 1.0 in the last one)
+
+    The bounds are numeric literals so the comparison stays exact on the
+    DECIMAL column; float bounds would put e.g. 0.6 into the 0.5-0.6 bucket.
+    """
+    return func.least(
+        func.width_bucket(column, literal(Decimal("0.5"), Numeric()), literal(Decimal("1.0"), Numeric()), 5),
+        5
+    )
+
+def status_counts() -> Dict[str, Any]:
+    """Aggregate columns counting predictions by result status"""
+    return {
+        'total': func.count(),
+        'correct': func.count().filter(Prediction.result_status == 'correct'),
+        'wrong': func.count().filter(Prediction.result_status == 'wrong'),
+        'pending': func.count().filter(Prediction.result_status == 'pending')
+    }
+
+def accuracy_percentage(correct: int, wrong: int) -> float:
+    """Share of settled predictions that were correct, in percent"""
+    finished = correct + wrong
+    return (correct / finished) * 100 if finished > 0 else 0
@@ -0,0 +1,221 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+def _to_epoch_us(values: Iterable[datetime]) -> np.ndarray:
+    """Datetimes as int64 microseconds since the epoch (naive values are taken as UTC)"""
+    return np.array(
+        [
+            int((v if v.tzinfo is not None else v.replace(tzinfo=timezone.utc)).timestamp() * 1_000_000)
+            for v in values
+        ],
+        dtype=np.int64
+    )
+
+def _exclusive_prefix(values: np.ndarray) -> np.ndarray:
+    """prefix[k] == values[:k].sum(), so any slice sum is prefix[end] - prefix[start]"""
+    prefix = np.zeros(len(values) + 1, dtype=np.float64)
+    np.cumsum(values, out=prefix[1:])
+    return prefix
+
+class _GroupedPrefix:
+    """Rows sorted by (group, date rank) with prefix sums per column
+
+    A window "last N rows of group g strictly before date rank r" is the
+    index range ``[max(group_start, end - N), end)`` where ``end`` is the
+    first row with key >= (g, r); both bounds come from one vectorized
+    ``searchsorted`` over the composite keys.
+    """
+
+    def __init__(self, groups: np.ndarray, ranks: np.ndarray, radix: int, columns: Dict[str, np.ndarray]):
+        keys = groups * radix + ranks
+        order = np.argsort(keys, kind='stable')
+        self.radix = radix
+        self.keys = keys[order]
+        self.ranks = ranks[order]
+        self.prefix = {name: _exclusive_prefix(values[order].astype(np.float64)) for name, values in columns.items()}
+
+    def window(self, groups: np.ndarray, ranks: np.ndarray, size: Optional[int] = None,
+               min_ranks: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        end = np.searchsorted(self.keys, groups * self.radix + ranks, side='left')
+        lower = groups * self.radix + (min_ranks if min_ranks is not None else 0)
+        start = np.minimum(np.searchsorted(self.keys, lower, side='left'), end)
+        if size is not None:
+            start = np.maximum(start, end - size)
+        return start, end
+
+    def total(self, name: str, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+        return self.prefix[name][end] - self.prefix[name][start]
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray, scale: float = 1.0) -> np.ndarray:
+    """numerator / denominator * scale rounded to 2 decimals, 0 where the denominator is 0"""
+    out = np.zeros(len(numerator), dtype=np.float64)
+    np.divide(numerator * scale, denominator, out=out, where=denominator > 0)
+    return np.round(out, 2)
+
+class RollingFeatureEngine:
+    """Columnar engine for rolling form, expected goals, BTTS and season-to-date stats
+
+    Built once from the finished matches as NumPy arrays (team indices,
+    season indices, dates and goals); every query then answers for a whole
+    batch of fixtures at once, each seeing only matches strictly before its
+    own date. Results are taken from ``winner``, like ``TeamStats`` and the
+    per-match path in ``FeatureStore``: a finished match without a winner
+    counts as played but as neither a win, a draw nor a loss. The numbers
+    follow the definitions in ``StatisticsService``:
+
+    * form index: points from the last ``form_window`` matches as % of the maximum
+    * expected goals: mean goals in the last ``xg_window`` home (away) matches
+    * BTTS: % of both-teams-scored over the union of both teams' last ``btts_window`` matches
+    """
+
+    def __init__(self, home_team: np.ndarray, away_team: np.ndarray, season: np.ndarray, match_date: np.ndarray,
+                 home_goals: np.ndarray, away_goals: np.ndarray, winner: np.ndarray, n_teams: int = None, n_seasons: int = None,
+                 form_window: int = 5, xg_window: int = 10, btts_window: int = 10):
+        home_team = np.asarray(home_team, dtype=np.int64)
+        away_team = np.asarray(away_team, dtype=np.int64)
+        season = np.asarray(season, dtype=np.int64)
+        match_date = np.asarray(match_date, dtype=np.int64)
+        home_goals = np.nan_to_num(np.asarray(home_goals, dtype=np.float64))
+        away_goals = np.nan_to_num(np.asarray(away_goals, dtype=np.float64))
+        winner = np.asarray(winner, dtype=object)
+
+        self.form_window = form_window
+        self.xg_window = xg_window
+        self.btts_window = btts_window
+        self.n_teams = n_teams if n_teams is not None else int(max(home_team.max(initial=-1), away_team.max(initial=-1)) + 1)
+        self.n_seasons = n_seasons if n_seasons is not None else int(season.max(initial=-1) + 1)
+
+        # Dates become dense ranks so (group, date) packs into a single int64 key
+        self._dates = np.unique(match_date)
+        rank = np.searchsorted(self._dates, match_date)
+        radix = len(self._dates) + 1
+
+        # Team-perspective ("long") table: one row per team per match
+        team = np.concatenate([home_team, away_team])
+        team_season = team * max(self.n_seasons, 1) + np.concatenate([season, season])
+        long_rank = np.concatenate([rank, rank])
+        goals_for = np.concatenate([home_goals, away_goals])
+        goals_against = np.concatenate([away_goals, home_goals])
+        home_won, drawn, away_won = winner == 'home', winner == 'draw', winner == 'away'
+        wins = np.concatenate([home_won, away_won]).astype(np.float64)
+        draws = np.concatenate([drawn, drawn]).astype(np.float64)
+        losses = np.concatenate([away_won, home_won]).astype(np.float64)
+        both_scored = ((home_goals > 0) & (away_goals > 0)).astype(np.float64)
+        ones = np.ones(len(team), dtype=np.float64)
+
+        self._team = _GroupedPrefix(team, long_rank, radix, {
+            'points': wins * 3 + draws,
+            'btts': np.concatenate([both_scored, both_scored]),
+            'count': ones
+        })
+        self._season = _GroupedPrefix(team_season, long_rank, radix, {
+            'wins': wins, 'draws': draws, 'losses': losses,
+            'goals_for': goals_for, 'goals_against': goals_against,
+            'count': ones
+        })
+        self._home = _GroupedPrefix(home_team, rank, radix, {'goals': home_goals, 'count': ones[:len(home_team)]})
+        self._away = _GroupedPrefix(away_team, rank, radix, {'goals': away_goals, 'count': ones[:len(away_team)]})
+        self._pair = _GroupedPrefix(self._pair_key(home_team, away_team), rank, radix, {
+            'btts': both_scored, 'count': ones[:len(home_team)]
+        })
+
+    def _pair_key(self, team_a: np.ndarray, team_b: np.ndarray) -> np.ndarray:
+        """Unordered team pair as a single integer"""
+        return np.minimum(team_a, team_b) * max(self.n_teams, 1) + np.maximum(team_a, team_b)
+
+    def compute(self, home_team: np.ndarray, away_team: np.ndarray, season: np.ndarray, match_date: np.ndarray) -> Dict[str, np.ndarray]:
+        """Rolling features for a batch of fixtures, each as of its own ``match_date``"""
+        home_team = np.asarray(home_team, dtype=np.int64)
+        away_team = np.asarray(away_team, dtype=np.int64)
+        season = np.asarray(season, dtype=np.int64)
+        rank = np.searchsorted(self._dates, np.asarray(match_date, dtype=np.int64), side='left')
+
+        features = {}
+
+        # Form index over the last N matches at any venue
+        for side, team in (('home', home_team), ('away', away_team)):
+            start, end = self._team.window(team, rank, self.form_window)
+            features[f'{side}_form_index'] = _ratio(
+                self._team.total('points', start, end), (end - start) * 3.0, scale=100.0
+            )
+
+        # Expected goals: home team's recent home matches, away team's recent away matches
+        start, end = self._home.window(home_team, rank, self.xg_window)
+        features['home_expected_goals'] = _ratio(self._home.total('goals', start, end), (end - start).astype(np.float64))
+        start, end = self._away.window(away_team, rank, self.xg_window)
+        features['away_expected_goals'] = _ratio(self._away.total('goals', start, end), (end - start).astype(np.float64))
+
+        # BTTS over the union of both teams' windows: meetings of the two teams that
+        # fall inside both windows are counted once via the pair series
+        home_start, home_end = self._team.window(home_team, rank, self.btts_window)
+        away_start, away_end = self._team.window(away_team, rank, self.btts_window)
+        home_count = home_end - home_start
+        away_count = away_end - away_start
+        both = (home_count > 0) & (away_count > 0)
+        oldest_home = self._team.ranks[np.minimum(home_start, len(self._team.ranks) - 1)] if len(self._team.ranks) else np.zeros_like(rank)
+        oldest_away = self._team.ranks[np.minimum(away_start, len(self._team.ranks) - 1)] if len(self._team.ranks) else np.zeros_like(rank)
+        overlap_start, overlap_end = self._pair.window(
+            self._pair_key(home_team, away_team), rank, min_ranks=np.maximum(oldest_home, oldest_away)
+        )
+        overlap_count = np.where(both, overlap_end - overlap_start, 0)
+        overlap_btts = np.where(both, self._pair.total('btts', overlap_start, overlap_end), 0.0)
+        features['btts_probability'] = _ratio(
+            self._team.total('btts', home_start, home_end) + self._team.total('btts', away_start, away_end) - overlap_btts,
+            (home_count + away_count - overlap_count).astype(np.float64),
+            scale=100.0
+        )
+
+        # Season-to-date table rows (expanding window within the fixture's season)
+        for side, team in (('home', home_team), ('away', away_team)):
+            start, end = self._season.window(team * max(self.n_seasons, 1) + season, rank)
+            for column in ('wins', 'draws', 'losses', 'goals_for', 'goals_against'):
+                features[f'{side}_season_{column}'] = self._season.total(column, start, end)
+            features[f'{side}_season_matches_played'] = (end - start).astype(np.float64)
+
+        return features
+
+    @classmethod
+    def from_records(cls, records: List[Any], extra_team_ids: Iterable[Any] = (), extra_season_ids: Iterable[Any] = (),
+                     **windows) -> 'RollingFeatureEngine':
+        """Build an engine from match records (``MatchRecord`` or ``Match`` rows)
+
+        ``team_index`` and ``season_index`` on the returned engine map IDs to the
+        integer indices used by :meth:`compute_for`.
+        """
+        team_index: Dict[str, int] = {}
+        season_index: Dict[str, int] = {}
+        for record in records:
+            team_index.setdefault(str(record.home_team_id), len(team_index))
+            team_index.setdefault(str(record.away_team_id), len(team_index))
+            season_index.setdefault(str(record.season_id), len(season_index))
+        for team_id in extra_team_ids:
+            team_index.setdefault(str(team_id), len(team_index))
+        for season_id in extra_season_ids:
+            season_index.setdefault(str(season_id), len(season_index))
+
+        engine = cls(
+            home_team=np.array([team_index[str(r.home_team_id)] for r in records], dtype=np.int64),
+            away_team=np.array([team_index[str(r.away_team_id)] for r in records], dtype=np.int64),
+            season=np.array([season_index[str(r.season_id)] for r in records], dtype=np.int64),
+            match_date=_to_epoch_us(r.match_date for r in records),
+            home_goals=np.array([r.home_goals if r.home_goals is not None else 0 for r in records], dtype=np.float64),
+            away_goals=np.array([r.away_goals if r.away_goals is not None else 0 for r in records], dtype=np.float64),
+            winner=np.array([r.winner for r in records], dtype=object),
+            n_teams=len(team_index),
+            n_seasons=len(season_index),
+            **windows
+        )
+        engine.team_index = team_index
+        engine.season_index = season_index
+        return engine
+
+    def compute_for(self, matches: List[Any]) -> Dict[str, np.ndarray]:
+        """:meth:`compute` for match objects whose teams and seasons were registered in ``from_records``"""
+        return self.compute(
+            home_team=np.array([self.team_index[str(m.home_team_id)] for m in matches], dtype=np.int64),
+            away_team=np.array([self.team_index[str(m.away_team_id)] for m in matches], dtype=np.int64),
+            season=np.array([self.season_index[str(m.season_id)] for m in matches], dtype=np.int64),
+            match_date=_to_epoch_us(m.match_date for m in matches)
+        )
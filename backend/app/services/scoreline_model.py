@@ -0,0 +1,320 @@
+import asyncio
+import logging
+import time
+from datetime import timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.optimize import minimize
+from scipy.special import gammaln
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.match_history import match_history_index
+
+logger = logging.getLogger(__name__)
+
+# Older results count less: weight = exp(-decay * days before the latest result), a ~1 year half-life
+SCORELINE_DECAY_PER_DAY = 0.0019
+
+# Results weighted below this are left out of the fit
+SCORELINE_MIN_WEIGHT = 0.01
+
+# Fewer finished matches than this and no model is fitted
+SCORELINE_MIN_MATCHES = 50
+
+# Shrinks the strengths of teams with few results towards the league average
+SCORELINE_RIDGE = 1e-3
+
+# Score matrices cover 0..MAX_GOALS goals per side and are renormalized for the truncated tail
+SCORELINE_MAX_GOALS = 10
+
+OVER_UNDER_LINES = (1.5, 2.5, 3.5)
+CORRECT_SCORES = 5
+
+# Dixon-Coles correlation parameter bounds, which keep the low-score correction positive for usual rates
+RHO_BOUNDS = (-0.2, 0.2)
+
+def _tau(home_goals: np.ndarray, away_goals: np.ndarray, lam: np.ndarray, mu: np.ndarray, rho: float):
+    """Dixon-Coles low-score correction and its partial derivatives (d/dlog lam, d/dlog mu, d/drho) of log tau"""
+    tau = np.ones_like(lam)
+    d_lam = np.zeros_like(lam)
+    d_mu = np.zeros_like(lam)
+    d_rho = np.zeros_like(lam)
+
+    nil_nil = (home_goals == 0) & (away_goals == 0)
+    nil_one = (home_goals == 0) & (away_goals == 1)
+    one_nil = (home_goals == 1) & (away_goals == 0)
+    one_one = (home_goals == 1) & (away_goals == 1)
+
+    product = lam * mu
+    tau[nil_nil] = 1 - product[nil_nil] * rho
+    tau[nil_one] = 1 + lam[nil_one] * rho
+    tau[one_nil] = 1 + mu[one_nil] * rho
+    tau[one_one] = 1 - rho
+    tau = np.maximum(tau, 1e-10)
+
+    d_lam[nil_nil] = -product[nil_nil] * rho / tau[nil_nil]
+    d_mu[nil_nil] = d_lam[nil_nil]
+    d_lam[nil_one] = lam[nil_one] * rho / tau[nil_one]
+    d_mu[one_nil] = mu[one_nil] * rho / tau[one_nil]
+
+    d_rho[nil_nil] = -product[nil_nil] / tau[nil_nil]
+    d_rho[nil_one] = lam[nil_one] / tau[nil_one]
+    d_rho[one_nil] = mu[one_nil] / tau[one_nil]
+    d_rho[one_one] = -1 / tau[one_one]
+    return tau, d_lam, d_mu, d_rho
+
+class DixonColesModel:
+    """Dixon-Coles scoreline model: Poisson goals with team attack/defence strengths
+
+    Home goals are Poisson with rate ``exp(home_advantage + attack[home] +
+    defence[away])`` and away goals with ``exp(attack[away] + defence[home])``;
+    ``rho`` corrects the joint probability of 0-0, 1-0, 0-1 and 1-1. Teams
+    not seen in the fit play with league-average strengths.
+    """
+
+    def __init__(self, team_index: Dict[str, int], attack: np.ndarray, defence: np.ndarray,
+                 home_advantage: float, rho: float, matches: int):
+        self.team_index = team_index
+        self.attack = attack
+        self.defence = defence
+        self.home_advantage = home_advantage
+        self.rho = rho
+        self.matches = matches
+
+    @classmethod
+    def fit(cls, team_index: Dict[str, int], home: np.ndarray, away: np.ndarray, home_goals: np.ndarray,
+            away_goals: np.ndarray, weights: np.ndarray, initial: Optional['DixonColesModel'] = None) -> 'DixonColesModel':
+        """Weighted maximum likelihood with an analytic gradient (L-BFGS-B)
+
+        Strengths of ``initial`` (a previous fit) seed the optimizer, so a
+        refit after a match day converges in a few iterations.
+        """
+        n_teams = len(team_index)
+        weights = weights / weights.sum()
+        log_factorials = gammaln(home_goals + 1) + gammaln(away_goals + 1)
+
+        def objective(params):
+            attack, defence = params[:n_teams], params[n_teams:2 * n_teams]
+            home_advantage, rho = params[-2], params[-1]
+
+            log_lam = home_advantage + attack[home] + defence[away]
+            log_mu = attack[away] + defence[home]
+            lam, mu = np.exp(log_lam), np.exp(log_mu)
+            tau, d_lam, d_mu, d_rho = _tau(home_goals, away_goals, lam, mu, rho)
+
+            log_likelihood = (
+                home_goals * log_lam - lam + away_goals * log_mu - mu - log_factorials + np.log(tau)
+            )
+            # Sum of attacks pinned at zero; defence absorbs the league's scoring level
+            attack_sum = attack.sum()
+            loss = (
+                -np.dot(weights, log_likelihood)
+                + SCORELINE_RIDGE * (np.dot(attack, attack) + np.dot(defence, defence))
+                + attack_sum ** 2
+            )
+
+            g_lam = weights * (home_goals - lam + d_lam)
+            g_mu = weights * (away_goals - mu + d_mu)
+            grad = np.empty_like(params)
+            grad[:n_teams] = -(np.bincount(home, g_lam, n_teams) + np.bincount(away, g_mu, n_teams))
+            grad[n_teams:2 * n_teams] = -(np.bincount(away, g_lam, n_teams) + np.bincount(home, g_mu, n_teams))
+            grad[:n_teams] += 2 * SCORELINE_RIDGE * attack + 2 * attack_sum
+            grad[n_teams:2 * n_teams] += 2 * SCORELINE_RIDGE * defence
+            grad[-2] = -g_lam.sum()
+            grad[-1] = -np.dot(weights, d_rho)
+            return loss, grad
+
+        params = np.zeros(2 * n_teams + 2)
+        params[n_teams:2 * n_teams] = np.log(max(np.dot(weights, away_goals), 0.1))
+        params[-2] = np.log(max(np.dot(weights, home_goals), 0.1) / max(np.dot(weights, away_goals), 0.1))
+        if initial is not None:
+            for team_id, i in team_index.items():
+                j = initial.team_index.get(team_id)
+                if j is not None:
+                    params[i], params[n_teams + i] = initial.attack[j], initial.defence[j]
+            params[-2], params[-1] = initial.home_advantage, initial.rho
+
+        bounds = [(None, None)] * (2 * n_teams + 1) + [RHO_BOUNDS]
+        result = minimize(objective, params, jac=True, method='L-BFGS-B', bounds=bounds)
+        if not result.success:
+            logger.warning(f"Scoreline model fit did not fully converge: {result.message}")
+
+        params = result.x
+        return cls(
+            team_index=dict(team_index),
+            attack=params[:n_teams].copy(),
+            defence=params[n_teams:2 * n_teams].copy(),
+            home_advantage=float(params[-2]),
+            rho=float(params[-1]),
+            matches=len(home)
+        )
+
+    def expected_goals(self, home_team_ids: Sequence[Any], away_team_ids: Sequence[Any]) -> Tuple[np.ndarray, np.ndarray]:
+        """Goal rates of every fixture, as two arrays"""
+        # Row n is the league-average team for teams the fit has not seen
+        n_teams = len(self.team_index)
+        attack = np.append(self.attack, 0.0)
+        defence = np.append(self.defence, self.defence.mean())
+        home = np.array([self.team_index.get(str(team_id), n_teams) for team_id in home_team_ids], dtype=np.int64)
+        away = np.array([self.team_index.get(str(team_id), n_teams) for team_id in away_team_ids], dtype=np.int64)
+        lam = np.exp(self.home_advantage + attack[home] + defence[away])
+        mu = np.exp(attack[away] + defence[home])
+        return lam, mu
+
+    def score_matrices(self, lam: np.ndarray, mu: np.ndarray, max_goals: int = SCORELINE_MAX_GOALS) -> np.ndarray:
+        """P(home = i, away = j) for every fixture as one (fixtures, max_goals + 1, max_goals + 1) array"""
+        goals = np.arange(max_goals + 1)
+        log_pmf = goals * np.log(lam)[:, None] - lam[:, None] - gammaln(goals + 1)
+        home_pmf = np.exp(log_pmf)
+        away_pmf = np.exp(goals * np.log(mu)[:, None] - mu[:, None] - gammaln(goals + 1))
+
+        matrices = home_pmf[:, :, None] * away_pmf[:, None, :]
+        rho = self.rho
+        matrices[:, 0, 0] *= np.maximum(1 - lam * mu * rho, 0.0)
+        matrices[:, 0, 1] *= np.maximum(1 + lam * rho, 0.0)
+        matrices[:, 1, 0] *= np.maximum(1 + mu * rho, 0.0)
+        matrices[:, 1, 1] *= max(1 - rho, 0.0)
+        return matrices / matrices.sum(axis=(1, 2), keepdims=True)
+
+def scoreline_markets(matrices: np.ndarray) -> Dict[str, np.ndarray]:
+    """1X2, BTTS, over/under and the most likely correct scores of every score matrix"""
+    n_fixtures, size, _ = matrices.shape
+    home_goals = np.arange(size)[:, None]
+    away_goals = np.arange(size)[None, :]
+    total_goals = home_goals + away_goals
+
+    markets = {
+        'home_win_prob': matrices[:, home_goals > away_goals].sum(axis=1),
+        'draw_prob': np.trace(matrices, axis1=1, axis2=2),
+        'away_win_prob': matrices[:, home_goals < away_goals].sum(axis=1),
+        'btts_prob': matrices[:, 1:, 1:].sum(axis=(1, 2))
+    }
+    for line in OVER_UNDER_LINES:
+        over = matrices[:, total_goals > line].sum(axis=1)
+        markets[f'over_{line}'.replace('.', '_')] = over
+        markets[f'under_{line}'.replace('.', '_')] = 1 - over
+
+    flat = matrices.reshape(n_fixtures, -1)
+    top = np.argsort(-flat, axis=1)[:, :CORRECT_SCORES]
+    markets['correct_score_home'] = top // size
+    markets['correct_score_away'] = top % size
+    markets['correct_score_prob'] = np.take_along_axis(flat, top, axis=1)
+    return markets
+
+class ScorelineService:
+    """Dixon-Coles model over the match history index, refit whenever new results arrive
+
+    The fit is keyed by the history index's version, so the first
+    prediction after a match day's results are recorded refits (warm-started
+    from the previous strengths, in a worker thread) and every other call
+    reuses the fitted model.
+    """
+
+    def __init__(self):
+        self.history = match_history_index
+        self.model: Optional[DixonColesModel] = None
+        self._fitted_version = None
+        self._lock = None
+        self._lock_loop = None
+
+    def _get_lock(self) -> asyncio.Lock:
+        # Celery tasks run each job in a fresh event loop; a lock cannot be shared across loops
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    def fit_records(self, records: List[Any]) -> Optional[DixonColesModel]:
+        """Fit on finished match records (``MatchRecord`` or ``Match``); None when there are too few"""
+        records = [r for r in records if r.home_goals is not None and r.away_goals is not None]
+        if len(records) < SCORELINE_MIN_MATCHES:
+            return None
+
+        dates = np.array([
+            (r.match_date if r.match_date.tzinfo is not None else r.match_date.replace(tzinfo=timezone.utc)).timestamp()
+            for r in records
+        ])
+        weights = np.exp(-SCORELINE_DECAY_PER_DAY * (dates.max() - dates) / 86400)
+        keep = weights >= SCORELINE_MIN_WEIGHT
+        records = [r for r, kept in zip(records, keep) if kept]
+
+        team_index: Dict[str, int] = {}
+        for record in records:
+            team_index.setdefault(str(record.home_team_id), len(team_index))
+            team_index.setdefault(str(record.away_team_id), len(team_index))
+
+        return DixonColesModel.fit(
+            team_index,
+            home=np.array([team_index[str(r.home_team_id)] for r in records], dtype=np.int64),
+            away=np.array([team_index[str(r.away_team_id)] for r in records], dtype=np.int64),
+            home_goals=np.array([r.home_goals for r in records], dtype=np.float64),
+            away_goals=np.array([r.away_goals for r in records], dtype=np.float64),
+            weights=weights[keep],
+            initial=self.model
+        )
+
+    async def ensure_fitted(self, db: AsyncSession) -> Optional[DixonColesModel]:
+        """The model for the current history, refitting first if results changed since the last fit"""
+        await self.history.ensure_fresh(db)
+        if self.model is not None and self._fitted_version == self.history.version:
+            return self.model
+
+        async with self._get_lock():
+            version = self.history.version
+            if self.model is None or self._fitted_version != version:
+                started = time.perf_counter()
+                model = await asyncio.to_thread(self.fit_records, self.history.records())
+                if model is not None:
+                    self.model = model
+                    logger.info(
+                        f"Scoreline model fitted on {model.matches} matches, {len(model.team_index)} teams "
+                        f"in {time.perf_counter() - started:.2f}s (home advantage {model.home_advantage:.3f}, rho {model.rho:.3f})"
+                    )
+                self._fitted_version = version
+            return self.model
+
+    async def predict_fixtures(self, db: AsyncSession, fixtures: List[Tuple[Any, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """Scoreline markets of (home_team_id, away_team_id) fixtures from one batched computation
+
+        Entries are None while there is too little history to fit a model.
+        """
+        model = await self.ensure_fitted(db)
+        if model is None or not fixtures:
+            return [None] * len(fixtures)
+
+        lam, mu = model.expected_goals([home for home, _ in fixtures], [away for _, away in fixtures])
+        markets = scoreline_markets(model.score_matrices(lam, mu))
+
+        predictions = []
+        for i in range(len(fixtures)):
+            prediction = {
+                'home_expected_goals': round(float(lam[i]), 2),
+                'away_expected_goals': round(float(mu[i]), 2),
+                'home_goals': int(markets['correct_score_home'][i, 0]),
+                'away_goals': int(markets['correct_score_away'][i, 0]),
+                'home_win_prob': round(float(markets['home_win_prob'][i]), 4),
+                'draw_prob': round(float(markets['draw_prob'][i]), 4),
+                'away_win_prob': round(float(markets['away_win_prob'][i]), 4),
+                'btts_prob': round(float(markets['btts_prob'][i]), 4),
+                'correct_scores': [
+                    {
+                        'score': f"{markets['correct_score_home'][i, k]}-{markets['correct_score_away'][i, k]}",
+                        'probability': round(float(markets['correct_score_prob'][i, k]), 4)
+                    }
+                    for k in range(CORRECT_SCORES)
+                ]
+            }
+            for line in OVER_UNDER_LINES:
+                for side in ('over', 'under'):
+                    key = f'{side}_{line}'.replace('.', '_')
+                    prediction[key] = round(float(markets[key][i]), 4)
+            predictions.append(prediction)
+        return predictions
+
+    async def predict_fixture(self, db: AsyncSession, home_team_id: Any, away_team_id: Any) -> Optional[Dict[str, Any]]:
+        return (await self.predict_fixtures(db, [(home_team_id, away_team_id)]))[0]
+
+# Global scoreline service instance
+scoreline_service = ScorelineService()
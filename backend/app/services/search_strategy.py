@@ -0,0 +1,248 @@
+import logging
+import math
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from scipy.stats import loguniform, randint, uniform
+from sklearn.base import clone
+from sklearn.model_selection import GridSearchCV, ParameterGrid, ParameterSampler, StratifiedKFold
+
+logger = logging.getLogger(__name__)
+
+SEARCH_STRATEGIES = ('grid', 'random', 'halving')
+
+# Folds used by every strategy; the winner's scores replace a separate cross_val_score
+SEARCH_CV_FOLDS = 5
+
+# Candidates sampled by 'random' and 'halving' when model_config gives no budget
+DEFAULT_SEARCH_CANDIDATES = 24
+
+# Survivors per successive-halving rung are 1/factor of the candidates; samples grow by factor
+HALVING_FACTOR = 3
+
+# Exhaustive grids (the historical GridSearchCV behaviour)
+PARAM_GRIDS = {
+    'RandomForest': {
+        'classifier__n_estimators': [100, 200, 300],
+        'classifier__max_depth': [10, 15, 20, None],
+        'classifier__min_samples_split': [2, 5, 10],
+        'classifier__min_samples_leaf': [1, 2, 4]
+    },
+    'GradientBoosting': {
+        'classifier__n_estimators': [50, 100, 200],
+        'classifier__max_depth': [3, 6, 9],
+        'classifier__learning_rate': [0.01, 0.1, 0.2]
+    },
+    'LogisticRegression': {
+        'classifier__C': [0.1, 1.0, 10.0, 100.0],
+        'classifier__penalty': ['l1', 'l2'],
+        'classifier__solver': ['liblinear', 'saga']
+    }
+}
+
+# Distributions sampled by the randomized strategies, covering the same ranges
+PARAM_DISTRIBUTIONS = {
+    'RandomForest': {
+        'classifier__n_estimators': randint(100, 401),
+        'classifier__max_depth': [8, 10, 12, 15, 20, None],
+        'classifier__min_samples_split': randint(2, 11),
+        'classifier__min_samples_leaf': randint(1, 5)
+    },
+    'GradientBoosting': {
+        'classifier__n_estimators': randint(50, 301),
+        'classifier__max_depth': randint(2, 10),
+        'classifier__learning_rate': loguniform(0.01, 0.3),
+        'classifier__subsample': uniform(0.6, 0.4)
+    },
+    'LogisticRegression': {
+        'classifier__C': loguniform(0.01, 100.0),
+        'classifier__penalty': ['l1', 'l2'],
+        'classifier__solver': ['liblinear', 'saga']
+    }
+}
+
+def single_threaded(pipeline):
+    """Unfitted copy whose classifier uses one core, for use under a parallel search or CV"""
+    pipeline = clone(pipeline)
+    if 'classifier__n_jobs' in pipeline.get_params():
+        pipeline.set_params(classifier__n_jobs=1)
+    return pipeline
+
+def _take(data, rows):
+    return data.iloc[rows] if hasattr(data, 'iloc') else data[rows]
+
+class SearchResult(NamedTuple):
+    """Outcome of a hyperparameter search; the estimator is refit on all the data"""
+    best_estimator: Any
+    best_params: Dict[str, Any]
+    cv_mean: float
+    cv_std: float
+    cv_samples: int  # rows the winner was cross-validated on (all rows unless halving stopped early)
+    strategy: str
+    candidates: int
+    fits: int
+    seconds: float
+    stopped_early: bool
+    trace: List[Tuple[float, float]]  # (elapsed seconds, best full-data CV score so far)
+
+class _Budget:
+    """Wall-clock and model-fit limits, checked before each round of candidates
+
+    The time limit shrinks a round to the candidates the seconds left can
+    afford at the pace so far, so a search overshoots by at most one small
+    round rather than a full one.
+    """
+
+    def __init__(self, max_seconds: Optional[float], max_fits: Optional[int]):
+        self.started = time.perf_counter()
+        self.max_seconds = max_seconds
+        self.max_fits = max_fits
+        self.fits = 0
+        self.evaluated = 0
+        self.exhausted = False
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def allow(self, candidates: int, folds: int) -> int:
+        """How many of the next ``candidates`` may still be evaluated"""
+        if self.max_seconds is not None:
+            remaining = self.max_seconds - self.elapsed
+            if remaining <= 0:
+                self.exhausted = True
+                return 0
+            if self.evaluated:
+                affordable = int(remaining / (self.elapsed / self.evaluated))
+                candidates = min(candidates, max(1, affordable))
+        if self.max_fits is not None:
+            candidates = min(candidates, max(0, (self.max_fits - self.fits) // folds))
+            if candidates == 0:
+                self.exhausted = True
+        return candidates
+
+def _evaluate(pipeline, candidates: List[Dict[str, Any]], X, y, splitter, n_jobs: int, budget: _Budget, round_size: int):
+    """CV scores of ``candidates`` as [(params, mean, std)], in rounds so the budget can stop the search"""
+    scored = []
+    for start in range(0, len(candidates), round_size):
+        batch = candidates[start:start + round_size]
+        batch = batch[:budget.allow(len(batch), splitter.get_n_splits())]
+        if not batch:
+            break
+
+        search = GridSearchCV(
+            pipeline, [{name: [value] for name, value in params.items()} for params in batch],
+            cv=splitter, scoring='accuracy', n_jobs=n_jobs, refit=False
+        )
+        search.fit(X, y)
+        budget.fits += len(batch) * splitter.get_n_splits()
+        budget.evaluated += len(batch)
+
+        results = search.cv_results_
+        for params, mean, std in zip(results['params'], results['mean_test_score'], results['std_test_score']):
+            # Failed fits score NaN and rank last
+            scored.append((params, float(mean) if np.isfinite(mean) else -np.inf, float(std) if np.isfinite(std) else 0.0))
+    return scored
+
+def _candidates(algorithm: str, strategy: str, max_candidates: Optional[int], random_state: int) -> List[Dict[str, Any]]:
+    if strategy == 'grid':
+        candidates = list(ParameterGrid(PARAM_GRIDS.get(algorithm, {})))
+        return candidates[:max_candidates] if max_candidates else candidates
+    distributions = PARAM_DISTRIBUTIONS.get(algorithm, {})
+    if not distributions:
+        return []
+    return list(ParameterSampler(distributions, n_iter=max_candidates or DEFAULT_SEARCH_CANDIDATES, random_state=random_state))
+
+def run_search(
+    pipeline,
+    X,
+    y,
+    algorithm: str,
+    strategy: str = 'grid',
+    n_jobs: int = 1,
+    max_candidates: Optional[int] = None,
+    max_seconds: Optional[float] = None,
+    max_fits: Optional[int] = None,
+    random_state: int = 42
+) -> Optional[SearchResult]:
+    """Search hyperparameters of ``pipeline`` for ``algorithm``; None when it has no search space
+
+    ``grid`` tries the exhaustive grid, ``random`` a fixed number of sampled
+    candidates, and ``halving`` samples candidates and successively halves
+    them (keeping the best 1/3) while the rows they are scored on triple,
+    so only the finalists see the full data. Every strategy scores with
+    the same stratified 5-fold split (candidates single-threaded, ``n_jobs``
+    of them in parallel), and candidates are evaluated in rounds so
+    ``max_seconds`` (wall clock) and ``max_fits`` (model fits) can end the
+    search early; the best candidate found so far wins.
+    """
+    if strategy not in SEARCH_STRATEGIES:
+        raise ValueError(f"Unknown search strategy: {strategy}")
+
+    candidates = _candidates(algorithm, strategy, max_candidates, random_state)
+    if not candidates:
+        return None
+
+    y = np.asarray(y)
+    scoring_pipeline = single_threaded(pipeline)
+    splitter = StratifiedKFold(n_splits=SEARCH_CV_FOLDS, shuffle=True, random_state=random_state)
+    budget = _Budget(max_seconds, max_fits)
+    round_size = max(2, n_jobs)
+    trace: List[Tuple[float, float]] = []
+
+    if strategy == 'halving':
+        rows = np.random.default_rng(random_state).permutation(len(X))
+        # Smallest rung still needs a few rows of every class in every fold
+        min_rows = SEARCH_CV_FOLDS * len(np.unique(y)) * 4
+        rungs = max(1, math.ceil(math.log(len(candidates), HALVING_FACTOR)))
+        while rungs > 1 and len(X) / HALVING_FACTOR ** (rungs - 1) < min_rows:
+            rungs -= 1
+
+        best, best_rows = None, 0
+        survivors = candidates
+        for rung in range(rungs):
+            n_rows = len(X) if rung == rungs - 1 else int(len(X) / HALVING_FACTOR ** (rungs - 1 - rung))
+            subset = rows[:n_rows]
+            scored = _evaluate(scoring_pipeline, survivors, _take(X, subset), y[subset], splitter, n_jobs, budget, round_size)
+            if not scored:
+                break
+            scored.sort(key=lambda item: item[1], reverse=True)
+            best, best_rows = scored[0], n_rows
+            if n_rows == len(X):
+                trace.append((budget.elapsed, best[1]))
+            if budget.exhausted:
+                break
+            survivors = [params for params, _, _ in scored[:max(1, len(scored) // HALVING_FACTOR)]]
+    else:
+        scored = _evaluate(scoring_pipeline, candidates, X, y, splitter, n_jobs, budget, round_size)
+        best, best_rows = None, len(X)
+        for params, mean, std in scored:
+            if best is None or mean > best[1]:
+                best = (params, mean, std)
+            trace.append((budget.elapsed, best[1]))
+
+    if best is None:
+        return None
+
+    params, cv_mean, cv_std = best
+    # The winner is refit on all rows with the pipeline's own n_jobs
+    estimator = clone(pipeline).set_params(**params).fit(X, y)
+    seconds = budget.elapsed
+    logger.info(
+        f"{strategy} search for {algorithm}: {budget.fits} fits in {seconds:.1f}s, "
+        f"best CV accuracy {cv_mean:.4f} with {params}"
+    )
+    return SearchResult(
+        best_estimator=estimator,
+        best_params=params,
+        cv_mean=cv_mean,
+        cv_std=cv_std,
+        cv_samples=best_rows,
+        strategy=strategy,
+        candidates=len(candidates),
+        fits=budget.fits,
+        seconds=seconds,
+        stopped_early=budget.exhausted,
+        trace=trace
+    )
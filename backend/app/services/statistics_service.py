@@ -8,6 +8,8 @@ from decimal import Decimal
 
 from app.models.database import Match, Team, TeamStats, Season
 from app.core.config import settings
+from app.services.match_history import match_history_index
+from app.services.scoreline_model import scoreline_service
 
 logger = logging.getLogger(__name__)
 
@@ -15,7 +17,8 @@ class StatisticsService:
     """Service for calculating football statistics and analytics"""
     
     def __init__(self):
-        pass
+        # Finished-match history shared by all "last N before date D" lookups
+        self.history = match_history_index
     
     async def calculate_both_teams_scored_percentage(self, db: AsyncSession, matches: List[Match]) -> float:
         """Calculate percentage of matches where both teams scored"""
@@ -56,40 +59,10 @@ class StatisticsService:
     async def calculate_form_index(self, db: AsyncSession, team_id: str, before_date: datetime = None, recent_games: int = 5) -> float:
         """Calculate team form index based on recent games"""
         try:
-            query = select(Match).where(
-                or_(Match.home_team_id == team_id, Match.away_team_id == team_id),
-                Match.status == 'finished',
-                Match.is_deleted == False
-            )
-            
-            if before_date:
-                query = query.where(Match.match_date < before_date)
-            
-            query = query.order_by(Match.match_date.desc()).limit(recent_games)
-            
-            result = await db.execute(query)
-            recent_matches = result.scalars().all()
-            
-            if not recent_matches:
-                return 0.0
-            
-            points = 0
-            for match in recent_matches:
-                if match.home_team_id == team_id:
-                    # Team was home
-                    if match.winner == 'home':
-                        points += 3
-                    elif match.winner == 'draw':
-                        points += 1
-                else:
-                    # Team was away
-                    if match.winner == 'away':
-                        points += 3
-                    elif match.winner == 'draw':
-                        points += 1
+            await self.history.ensure_fresh(db)
+            recent_matches = self.history.team_matches(team_id, before=before_date, limit=recent_games)
             
-            max_possible_points = len(recent_matches) * 3
-            return round((points / max_possible_points) * 100, 2) if max_possible_points > 0 else 0.0
+            return self._form_index_from_matches(team_id, recent_matches)
             
         except Exception as e:
             logger.error(f"Error calculating form index: {str(e)}")
@@ -99,81 +72,10 @@ class StatisticsService:
         """Calculate head-to-head statistics between two teams"""
         try:
             # Get head-to-head matches
-            result = await db.execute(
-                select(Match).where(
-                    or_(
-                        and_(Match.home_team_id == home_team_id, Match.away_team_id == away_team_id),
-                        and_(Match.home_team_id == away_team_id, Match.away_team_id == home_team_id)
-                    ),
-                    Match.status == 'finished',
-                    Match.is_deleted == False
-                ).order_by(Match.match_date.desc()).limit(limit)
-            )
-            h2h_matches = result.scalars().all()
-            
-            if not h2h_matches:
-                return {
-                    'total_matches': 0,
-                    'home_wins': 0,
-                    'away_wins': 0,
-                    'draws': 0,
-                    'home_win_percentage': 0.0,
-                    'away_win_percentage': 0.0,
-                    'draw_percentage': 0.0,
-                    'home_goals_avg': 0.0,
-                    'away_goals_avg': 0.0,
-                    'both_teams_scored_percentage': 0.0
-                }
+            await self.history.ensure_fresh(db)
+            h2h_matches = self.history.head_to_head(home_team_id, away_team_id, limit=limit)
             
-            home_wins = 0
-            away_wins = 0
-            draws = 0
-            home_goals_total = 0
-            away_goals_total = 0
-            both_scored_count = 0
-            
-            for match in h2h_matches:
-                if match.home_team_id == home_team_id:
-                    # Current home team was home in this H2H match
-                    home_goals_total += match.home_goals or 0
-                    away_goals_total += match.away_goals or 0
-                    
-                    if match.winner == 'home':
-                        home_wins += 1
-                    elif match.winner == 'away':
-                        away_wins += 1
-                    else:
-                        draws += 1
-                else:
-                    # Current home team was away in this H2H match
-                    home_goals_total += match.away_goals or 0
-                    away_goals_total += match.home_goals or 0
-                    
-                    if match.winner == 'away':
-                        home_wins += 1
-                    elif match.winner == 'home':
-                        away_wins += 1
-                    else:
-                        draws += 1
-                
-                # Check if both teams scored
-                if (match.home_goals or 0) > 0 and (match.away_goals or 0) > 0:
-                    both_scored_count += 1
-            
-            total_matches = len(h2h_matches)
-            
-            return {
-                'total_matches': total_matches,
-                'home_wins': home_wins,
-                'away_wins': away_wins,
-                'draws': draws,
-                'home_win_percentage': round((home_wins / total_matches) * 100, 2),
-                'away_win_percentage': round((away_wins / total_matches) * 100, 2),
-                'draw_percentage': round((draws / total_matches) * 100, 2),
-                'home_goals_avg': round(home_goals_total / total_matches, 2),
-                'away_goals_avg': round(away_goals_total / total_matches, 2),
-                'both_teams_scored_percentage': round((both_scored_count / total_matches) * 100, 2)
-            }
+            return self._head_to_head_from_matches(home_team_id, h2h_matches)
             
         except Exception as e:
             logger.error(f"Error calculating H2H stats: {str(e)}")
@@ -193,35 +95,10 @@ class StatisticsService:
     async def calculate_expected_goals(self, db: AsyncSession, team_id: str, is_home: bool = True, limit: int = 10) -> float:
         """Calculate expected goals for a team based on recent performance"""
         try:
-            if is_home:
-                query = select(Match).where(
-                    Match.home_team_id == team_id,
-                    Match.status == 'finished',
-                    Match.is_deleted == False
-                )
-            else:
-                query = select(Match).where(
-                    Match.away_team_id == team_id,
-                    Match.status == 'finished',
-                    Match.is_deleted == False
-                )
-            
-            query = query.order_by(Match.match_date.desc()).limit(limit)
-            
-            result = await db.execute(query)
-            recent_matches = result.scalars().all()
-            
-            if not recent_matches:
-                return 0.0
-            
-            total_goals = 0
-            for match in recent_matches:
-                if is_home:
-                    total_goals += match.home_goals or 0
-                else:
-                    total_goals += match.away_goals or 0
+            await self.history.ensure_fresh(db)
+            recent_matches = self.history.team_matches(team_id, limit=limit, venue='home' if is_home else 'away')
             
-            return round(total_goals / len(recent_matches), 2)
+            return self._expected_goals_from_matches(recent_matches, is_home)
             
         except Exception as e:
             logger.error(f"Error calculating expected goals: {str(e)}")
@@ -231,33 +108,11 @@ class StatisticsService:
         """Calculate probability of both teams to score based on recent matches"""
         try:
             # Get recent matches for both teams
-            home_matches_result = await db.execute(
-                select(Match).where(
-                    or_(Match.home_team_id == home_team_id, Match.away_team_id == home_team_id),
-                    Match.status == 'finished',
-                    Match.is_deleted == False
-                ).order_by(Match.match_date.desc()).limit(10)
-            )
-            home_matches = home_matches_result.scalars().all()
+            await self.history.ensure_fresh(db)
+            home_matches = self.history.team_matches(home_team_id, limit=10)
+            away_matches = self.history.team_matches(away_team_id, limit=10)
             
-            away_matches_result = await db.execute(
-                select(Match).where(
-                    or_(Match.home_team_id == away_team_id, Match.away_team_id == away_team_id),
-                    Match.status == 'finished',
-                    Match.is_deleted == False
-                ).order_by(Match.match_date.desc()).limit(10)
-            )
-            away_matches = away_matches_result.scalars().all()
-            
-            # Combine and get unique matches
-            all_matches = list(set(home_matches + away_matches))
-            
-            if not all_matches:
-                return 0.0
-            
-            both_scored_count = sum(1 for m in all_matches if (m.home_goals or 0) > 0 and (m.away_goals or 0) > 0)
-            
-            return round((both_scored_count / len(all_matches)) * 100, 2)
+            return self._btts_from_matches(home_matches, away_matches)
             
         except Exception as e:
             logger.error(f"Error calculating BTTS probability: {str(e)}")
@@ -315,8 +170,13 @@ class StatisticsService:
             logger.error(f"Error predicting winner: {str(e)}")
             return {'winner': 'unknown', 'confidence': 0.0}
     
-    async def run_comprehensive_prediction(self, db: AsyncSession, home_team_id: str, away_team_id: str) -> Dict[str, Any]:
-        """Run comprehensive prediction analysis similar to PHP version"""
+    async def run_comprehensive_prediction(self, db: AsyncSession, home_team_id: str, away_team_id: str,
+                                           scoreline: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Run comprehensive prediction analysis similar to PHP version
+        
+        ``scoreline`` is this fixture's entry from ``scoreline_service.predict_fixtures``
+        when the caller already scored a batch of fixtures.
+        """
         try:
             # Calculate expected goals
             home_expected_goals = await self.calculate_expected_goals(db, home_team_id, is_home=True)
@@ -331,6 +191,12 @@ class StatisticsService:
             # Calculate win probabilities (ELO-style)
             win_probabilities = await self.calculate_win_probabilities(db, home_team_id, away_team_id)
             
+            # Dixon-Coles score matrix; rounded expected goals until there is enough history to fit it
+            if scoreline is None:
+                scoreline = await scoreline_service.predict_fixture(db, home_team_id, away_team_id)
+            if scoreline is None:
+                scoreline = {'home_goals': round(home_expected_goals), 'away_goals': round(away_expected_goals)}
+            
             return {
                 'home_expected_goals': home_expected_goals,
                 'away_expected_goals': away_expected_goals,
@@ -342,10 +208,7 @@ class StatisticsService:
                         'winner': winner_prediction['winner'],
                         'confidence': winner_prediction['confidence']
                     },
-                    'poisson': {
-                        'home_goals': round(home_expected_goals),
-                        'away_goals': round(away_expected_goals)
-                    },
+                    'poisson': scoreline,
                     'elo': {
                         'home_win_prob': win_probabilities['home_win_prob'],
                         'draw_prob': win_probabilities['draw_prob'],
@@ -398,46 +261,7 @@ class StatisticsService:
             )
             away_stats = away_stats_result.scalar_one_or_none()
             
-            if not home_stats or not away_stats:
-                return {'home_win_prob': 0.33, 'draw_prob': 0.33, 'away_win_prob': 0.33}
-            
-            # Simple ELO-like calculation based on points and goal difference
-            home_rating = (home_stats.points * 2) + home_stats.goal_difference
-            away_rating = (away_stats.points * 2) + away_stats.goal_difference
-            
-            # Home advantage
-            home_rating += 3
-            
-            # Calculate probabilities
-            rating_diff = home_rating - away_rating
-            
-            # Sigmoid-like function for probabilities
-            if rating_diff > 10:
-                home_prob = 0.65
-                away_prob = 0.20
-                draw_prob = 0.15
-            elif rating_diff > 5:
-                home_prob = 0.55
-                away_prob = 0.25
-                draw_prob = 0.20
-            elif rating_diff > -5:
-                home_prob = 0.45
-                away_prob = 0.30
-                draw_prob = 0.25
-            elif rating_diff > -10:
-                home_prob = 0.30
-                away_prob = 0.50
-                draw_prob = 0.20
-            else:
-                home_prob = 0.20
-                away_prob = 0.65
-                draw_prob = 0.15
-            
-            return {
-                'home_win_prob': round(home_prob, 2),
-                'draw_prob': round(draw_prob, 2),
-                'away_win_prob': round(away_prob, 2)
-            }
+            return self._win_probabilities_from_stats(home_stats, away_stats)
             
         except Exception as e:
             logger.error(f"Error calculating win probabilities: {str(e)}")
@@ -494,6 +318,168 @@ class StatisticsService:
         except Exception as e:
             logger.error(f"Error getting team analysis: {str(e)}")
             return {}
+    
+    def _is_team(self, match_team_id, team_id) -> bool:
+        """Compare team IDs regardless of whether they are UUIDs or strings"""
+        return str(match_team_id) == str(team_id)
+    
+    def _form_index_from_matches(self, team_id, recent_matches: List[Match]) -> float:
+        """Form index (0-100) from a team's most recent finished matches"""
+        if not recent_matches:
+            return 0.0
+        
+        points = 0
+        for match in recent_matches:
+            if self._is_team(match.home_team_id, team_id):
+                # Team was home
+                if match.winner == 'home':
+                    points += 3
+                elif match.winner == 'draw':
+                    points += 1
+            else:
+                # Team was away
+                if match.winner == 'away':
+                    points += 3
+                elif match.winner == 'draw':
+                    points += 1
+        
+        max_possible_points = len(recent_matches) * 3
+        return round((points / max_possible_points) * 100, 2) if max_possible_points > 0 else 0.0
+    
+    def _head_to_head_from_matches(self, home_team_id, h2h_matches: List[Match]) -> Dict[str, Any]:
+        """Head-to-head statistics seen from the perspective of the current home team"""
+        if not h2h_matches:
+            return {
+                'total_matches': 0,
+                'home_wins': 0,
+                'away_wins': 0,
+                'draws': 0,
+                'home_win_percentage': 0.0,
+                'away_win_percentage': 0.0,
+                'draw_percentage': 0.0,
+                'home_goals_avg': 0.0,
+                'away_goals_avg': 0.0,
+                'both_teams_scored_percentage': 0.0
+            }
+        
+        home_wins = 0
+        away_wins = 0
+        draws = 0
+        home_goals_total = 0
+        away_goals_total = 0
+        both_scored_count = 0
+        
+        for match in h2h_matches:
+            if self._is_team(match.home_team_id, home_team_id):
+                # Current home team was home in this H2H match
+                home_goals_total += match.home_goals or 0
+                away_goals_total += match.away_goals or 0
+                
+                if match.winner == 'home':
+                    home_wins += 1
+                elif match.winner == 'away':
+                    away_wins += 1
+                else:
+                    draws += 1
+            else:
+                # Current home team was away in this H2H match
+                home_goals_total += match.away_goals or 0
+                away_goals_total += match.home_goals or 0
+                
+                if match.winner == 'away':
+                    home_wins += 1
+                elif match.winner == 'home':
+                    away_wins += 1
+                else:
+                    draws += 1
+            
+            # Check if both teams scored
+            if (match.home_goals or 0) > 0 and (match.away_goals or 0) > 0:
+                both_scored_count += 1
+        
+        total_matches = len(h2h_matches)
+        
+        return {
+            'total_matches': total_matches,
+            'home_wins': home_wins,
+            'away_wins': away_wins,
+            'draws': draws,
+            'home_win_percentage': round((home_wins / total_matches) * 100, 2),
+            'away_win_percentage': round((away_wins / total_matches) * 100, 2),
+            'draw_percentage': round((draws / total_matches) * 100, 2),
+            'home_goals_avg': round(home_goals_total / total_matches, 2),
+            'away_goals_avg': round(away_goals_total / total_matches, 2),
+            'both_teams_scored_percentage': round((both_scored_count / total_matches) * 100, 2)
+        }
+    
+    def _expected_goals_from_matches(self, recent_matches: List[Match], is_home: bool) -> float:
+        """Average goals scored in a team's recent home (or away) matches"""
+        if not recent_matches:
+            return 0.0
+        
+        total_goals = 0
+        for match in recent_matches:
+            if is_home:
+                total_goals += match.home_goals or 0
+            else:
+                total_goals += match.away_goals or 0
+        
+        return round(total_goals / len(recent_matches), 2)
+    
+    def _btts_from_matches(self, home_matches: List[Match], away_matches: List[Match]) -> float:
+        """Both-teams-to-score percentage over the union of both teams' recent matches"""
+        # Combine and get unique matches
+        all_matches = list(set(home_matches) | set(away_matches))
+        
+        if not all_matches:
+            return 0.0
+        
+        both_scored_count = sum(1 for m in all_matches if (m.home_goals or 0) > 0 and (m.away_goals or 0) > 0)
+        
+        return round((both_scored_count / len(all_matches)) * 100, 2)
+    
+    def _win_probabilities_from_stats(self, home_stats: Optional[TeamStats], away_stats: Optional[TeamStats]) -> Dict[str, float]:
+        """ELO-like win probabilities from two TeamStats rows"""
+        if not home_stats or not away_stats:
+            return {'home_win_prob': 0.33, 'draw_prob': 0.33, 'away_win_prob': 0.33}
+        
+        # Simple ELO-like calculation based on points and goal difference
+        home_rating = (home_stats.points * 2) + home_stats.goal_difference
+        away_rating = (away_stats.points * 2) + away_stats.goal_difference
+        
+        # Home advantage
+        home_rating += 3
+        
+        # Calculate probabilities
+        rating_diff = home_rating - away_rating
+        
+        # Sigmoid-like function for probabilities
+        if rating_diff > 10:
+            home_prob = 0.65
+            away_prob = 0.20
+            draw_prob = 0.15
+        elif rating_diff > 5:
+            home_prob = 0.55
+            away_prob = 0.25
+            draw_prob = 0.20
+        elif rating_diff > -5:
+            home_prob = 0.45
+            away_prob = 0.30
+            draw_prob = 0.25
+        elif rating_diff > -10:
+            home_prob = 0.30
+            away_prob = 0.50
+            draw_prob = 0.20
+        else:
+            home_prob = 0.20
+            away_prob = 0.65
+            draw_prob = 0.15
+        
+        return {
+            'home_win_prob': round(home_prob, 2),
+            'draw_prob': round(draw_prob, 2),
+            'away_win_prob': round(away_prob, 2)
+        }
 
 # Global statistics service instance
 statistics_service = StatisticsService()
@@ -0,0 +1,277 @@
+import logging
+from collections import defaultdict
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import select, func, case, literal, union_all, and_, or_
+from sqlalchemy.dialects.postgresql import insert, aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.database import Match, TeamStats
+
+logger = logging.getLogger(__name__)
+
+# Columns maintained from match results (everything except identity, form and timestamps)
+COUNTER_COLUMNS = [
+    'matches_played', 'wins', 'draws', 'losses', 'goals_for', 'goals_against', 'goal_difference', 'points',
+    'home_wins', 'home_draws', 'home_losses', 'away_wins', 'away_draws', 'away_losses'
+]
+
+class MatchOutcome(NamedTuple):
+    """The part of a match that contributes to TeamStats"""
+    home_team_id: Any
+    away_team_id: Any
+    season_id: Any
+    winner: Optional[str]
+    home_goals: Optional[int]
+    away_goals: Optional[int]
+
+def match_outcome(match: Match) -> Optional[MatchOutcome]:
+    """Contribution of a match row, or None when it does not count (not finished or deleted)"""
+    if match is None or match.status != 'finished' or match.is_deleted:
+        return None
+    return MatchOutcome(
+        home_team_id=match.home_team_id,
+        away_team_id=match.away_team_id,
+        season_id=match.season_id,
+        winner=match.winner,
+        home_goals=match.home_goals,
+        away_goals=match.away_goals
+    )
+
+def _result_letter(winner: Optional[str], venue: str) -> Optional[str]:
+    if winner == 'draw':
+        return 'D'
+    if winner == venue:
+        return 'W'
+    if winner in ('home', 'away'):
+        return 'L'
+    return None
+
+def _team_deltas(outcome: MatchOutcome, sign: int) -> Dict[Tuple[Any, Any], Dict[str, int]]:
+    """Per-(team, season) counter changes from adding (sign=1) or removing (sign=-1) a result"""
+    deltas = {}
+    for venue, team_id, scored, conceded in (
+        ('home', outcome.home_team_id, outcome.home_goals or 0, outcome.away_goals or 0),
+        ('away', outcome.away_team_id, outcome.away_goals or 0, outcome.home_goals or 0)
+    ):
+        result = _result_letter(outcome.winner, venue)
+        delta = dict.fromkeys(COUNTER_COLUMNS, 0)
+        delta['matches_played'] = 1
+        delta['goals_for'] = scored
+        delta['goals_against'] = conceded
+        delta['goal_difference'] = scored - conceded
+        if result == 'W':
+            delta['wins'] = delta[f'{venue}_wins'] = 1
+            delta['points'] = 3
+        elif result == 'D':
+            delta['draws'] = delta[f'{venue}_draws'] = 1
+            delta['points'] = 1
+        elif result == 'L':
+            delta['losses'] = delta[f'{venue}_losses'] = 1
+        deltas[(team_id, outcome.season_id)] = {column: value * sign for column, value in delta.items()}
+    return deltas
+
+class TeamStatsService:
+    """Keeps ``team_stats`` in step with finished matches
+
+    Writes through the API apply only the difference a match makes (adding
+    a newly finished result, removing one that was reopened or deleted, or
+    both when a final score is corrected) inside the same transaction as the
+    match update. ``recompute_season`` rebuilds a season from scratch with a
+    single GROUP BY and reports any drift from the incrementally kept rows.
+
+    ``form_last_5`` lists the team's last five results of the season in
+    chronological order, most recent last (e.g. ``'WWDLW'``).
+    """
+
+    async def apply_match_transition(self, db: AsyncSession, before: Optional[MatchOutcome], after: Optional[MatchOutcome]) -> int:
+        """Apply the change between two states of a match; returns the number of team rows touched
+
+        Does not commit: call it before the commit that persists the match.
+        """
+        if before == after:
+            return 0
+
+        combined: Dict[Tuple[Any, Any], Dict[str, int]] = defaultdict(lambda: dict.fromkeys(COUNTER_COLUMNS, 0))
+        for outcome, sign in ((before, -1), (after, 1)):
+            if outcome is None:
+                continue
+            for key, delta in _team_deltas(outcome, sign).items():
+                for column, value in delta.items():
+                    combined[key][column] += value
+
+        for (team_id, season_id), delta in combined.items():
+            stmt = insert(TeamStats).values(team_id=team_id, season_id=season_id, **delta)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[TeamStats.team_id, TeamStats.season_id],
+                set_={
+                    **{column: getattr(TeamStats, column) + stmt.excluded[column] for column in COUNTER_COLUMNS},
+                    'updated_at': func.now()
+                }
+            )
+            await db.execute(stmt)
+
+        for team_id, season_id in combined:
+            await self._refresh_form(db, team_id, season_id)
+
+        return len(combined)
+
+    async def _refresh_form(self, db: AsyncSession, team_id: Any, season_id: Any) -> None:
+        # Runs after the pending match change has been flushed by autoflush
+        result = await db.execute(
+            select(Match.home_team_id, Match.winner).where(
+                Match.season_id == season_id,
+                Match.status == 'finished',
+                Match.is_deleted == False,
+                or_(Match.home_team_id == team_id, Match.away_team_id == team_id)
+            ).order_by(Match.match_date.desc()).limit(5)
+        )
+        letters = [
+            _result_letter(row.winner, 'home' if row.home_team_id == team_id else 'away')
+            for row in result
+        ]
+        form = ''.join(letter for letter in reversed(letters) if letter) or None
+
+        await db.execute(
+            TeamStats.__table__.update().where(
+                TeamStats.team_id == team_id,
+                TeamStats.season_id == season_id
+            ).values(form_last_5=form)
+        )
+
+    def _perspective_rows(self, season_id: Any):
+        """One row per team per finished match of a season: venue, result letter, goals and date"""
+        rows = []
+        for venue, team_column, scored, conceded in (
+            ('home', Match.home_team_id, Match.home_goals, Match.away_goals),
+            ('away', Match.away_team_id, Match.away_goals, Match.home_goals)
+        ):
+            other = 'away' if venue == 'home' else 'home'
+            rows.append(
+                select(
+                    team_column.label('team_id'),
+                    literal(venue).label('venue'),
+                    case(
+                        (Match.winner == venue, 'W'),
+                        (Match.winner == 'draw', 'D'),
+                        (Match.winner == other, 'L'),
+                        else_=None
+                    ).label('result'),
+                    func.coalesce(scored, 0).label('goals_for'),
+                    func.coalesce(conceded, 0).label('goals_against'),
+                    Match.match_date.label('match_date')
+                ).where(
+                    Match.season_id == season_id,
+                    Match.status == 'finished',
+                    Match.is_deleted == False
+                )
+            )
+        return union_all(*rows).subquery('perspective')
+
+    async def compute_season(self, db: AsyncSession, season_id: Any) -> Dict[Any, Dict[str, Any]]:
+        """TeamStats values of every team in a season, computed from the matches table"""
+        rows = self._perspective_rows(season_id)
+        is_win, is_draw, is_loss = rows.c.result == 'W', rows.c.result == 'D', rows.c.result == 'L'
+        is_home, is_away = rows.c.venue == 'home', rows.c.venue == 'away'
+
+        aggregates = await db.execute(
+            select(
+                rows.c.team_id,
+                func.count().label('matches_played'),
+                func.count().filter(is_win).label('wins'),
+                func.count().filter(is_draw).label('draws'),
+                func.count().filter(is_loss).label('losses'),
+                func.sum(rows.c.goals_for).label('goals_for'),
+                func.sum(rows.c.goals_against).label('goals_against'),
+                func.count().filter(and_(is_home, is_win)).label('home_wins'),
+                func.count().filter(and_(is_home, is_draw)).label('home_draws'),
+                func.count().filter(and_(is_home, is_loss)).label('home_losses'),
+                func.count().filter(and_(is_away, is_win)).label('away_wins'),
+                func.count().filter(and_(is_away, is_draw)).label('away_draws'),
+                func.count().filter(and_(is_away, is_loss)).label('away_losses')
+            ).group_by(rows.c.team_id)
+        )
+
+        computed = {}
+        for row in aggregates:
+            values = dict(row._mapping)
+            team_id = values.pop('team_id')
+            values = {column: int(value or 0) for column, value in values.items()}
+            values['goal_difference'] = values['goals_for'] - values['goals_against']
+            values['points'] = values['wins'] * 3 + values['draws']
+            values['form_last_5'] = None
+            computed[team_id] = values
+
+        # Last five results per team, oldest first
+        ranked = select(
+            rows.c.team_id,
+            rows.c.result,
+            func.row_number().over(partition_by=rows.c.team_id, order_by=rows.c.match_date.desc()).label('recency')
+        ).subquery('ranked')
+        forms = await db.execute(
+            select(
+                ranked.c.team_id,
+                func.string_agg(ranked.c.result, aggregate_order_by(literal(''), ranked.c.recency.desc()))
+            ).where(ranked.c.recency <= 5).group_by(ranked.c.team_id)
+        )
+        for team_id, form in forms:
+            if team_id in computed:
+                computed[team_id]['form_last_5'] = form or None
+
+        return computed
+
+    async def recompute_season(self, db: AsyncSession, season_id: Any) -> Dict[str, Any]:
+        """Rebuild a season's TeamStats from scratch and report rows that had drifted"""
+        computed = await self.compute_season(db, season_id)
+
+        stored_result = await db.execute(
+            select(TeamStats).where(TeamStats.season_id == season_id)
+        )
+        stored = {row.team_id: row for row in stored_result.scalars().all()}
+
+        # Teams whose stored row no longer has any finished match are reset to zero
+        empty = dict.fromkeys(COUNTER_COLUMNS, 0)
+        empty['form_last_5'] = None
+        for team_id in stored.keys() - computed.keys():
+            computed[team_id] = dict(empty)
+
+        drift: List[Dict[str, Any]] = []
+        changed = {}
+        for team_id, values in computed.items():
+            row = stored.get(team_id)
+            differences = {
+                column: {'stored': getattr(row, column) if row is not None else None, 'computed': value}
+                for column, value in values.items()
+                if row is None or (getattr(row, column) or (None if column == 'form_last_5' else 0)) != value
+            }
+            if differences:
+                drift.append({'team_id': str(team_id), 'differences': differences})
+                changed[team_id] = values
+
+        # Only drifted rows are written, so updated_at (a cache/ETag watermark) moves only on real changes
+        if changed:
+            stmt = insert(TeamStats).values([
+                {'team_id': team_id, 'season_id': season_id, **values}
+                for team_id, values in changed.items()
+            ])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[TeamStats.team_id, TeamStats.season_id],
+                set_={
+                    **{column: stmt.excluded[column] for column in COUNTER_COLUMNS + ['form_last_5']},
+                    'updated_at': func.now()
+                }
+            )
+            await db.execute(stmt)
+
+        if drift:
+            logger.warning(f"TeamStats drift corrected for {len(drift)} teams in season {season_id}")
+
+        return {
+            'season_id': str(season_id),
+            'teams': len(computed),
+            'drifted_teams': len(drift),
+            'drift': drift
+        }
+
+# Global team stats service instance
+team_stats_service = TeamStatsService()
@@ -0,0 +1,205 @@
+import logging
+import weakref
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+from scipy.special import expit, softmax
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Compiled forms keyed by the fitted estimator they were built from (False when not compilable)
+_compiled_cache: "weakref.WeakKeyDictionary[Any, Any]" = weakref.WeakKeyDictionary()
+
+# Largest allowed difference from sklearn's predict_proba before a compiled model is rejected
+VERIFY_TOLERANCE = 1e-9
+
+class CompiledForest:
+    """Tree ensemble flattened into contiguous node arrays for batched inference
+
+    Every tree of the ensemble is appended to one set of arrays (``feature``,
+    ``threshold``, ``left``, ``right``, ``value``) with child indices offset
+    to the global position. Leaves point to themselves, so a batch walks all
+    trees in lock-step for ``max_depth`` vectorized steps without tracking
+    which rows have finished. Inputs are cast to float32 before comparing,
+    as sklearn's trees do, which keeps the split decisions identical.
+
+    Supports the ``RandomForestClassifier`` and ``GradientBoostingClassifier``
+    pipelines trained by ``EnhancedMLService`` (optionally preceded by a
+    ``StandardScaler``) and the bare estimators of ``MLService``.
+    """
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray, right: np.ndarray,
+                 value: np.ndarray, roots: np.ndarray, max_depth: int, classes: np.ndarray, kind: str,
+                 scaler=None, learning_rate: float = 1.0, init_raw: np.ndarray = None, n_outputs: int = 1):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.classes_ = classes
+        self.kind = kind
+        self.scaler = scaler
+        self.learning_rate = learning_rate
+        self.init_raw = init_raw
+        self.n_outputs = n_outputs
+
+    @staticmethod
+    def supports(estimator: Any) -> bool:
+        if isinstance(estimator, Pipeline):
+            estimator = estimator.steps[-1][1]
+        return isinstance(estimator, (RandomForestClassifier, GradientBoostingClassifier))
+
+    @classmethod
+    def from_estimator(cls, estimator: Any, scaler=None) -> 'CompiledForest':
+        """Flatten a fitted forest (or a pipeline ending in one)"""
+        if isinstance(estimator, Pipeline):
+            *preprocessing, (_, estimator) = estimator.steps
+            if len(preprocessing) > 1:
+                raise ValueError("Only a single preprocessing step is supported")
+            if preprocessing:
+                scaler = preprocessing[0][1]
+
+        if isinstance(estimator, RandomForestClassifier):
+            trees = [tree.tree_ for tree in estimator.estimators_]
+            kind = 'forest'
+        elif isinstance(estimator, GradientBoostingClassifier):
+            # estimators_ is (n_stages, K); tree k of each stage adds to class k's raw score
+            trees = [tree.tree_ for stage in estimator.estimators_ for tree in stage]
+            kind = 'boosting'
+        else:
+            raise ValueError(f"Unsupported estimator: {type(estimator).__name__}")
+
+        sizes = np.array([tree.node_count for tree in trees], dtype=np.int64)
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+
+        feature, threshold, left, right, value = [], [], [], [], []
+        for tree, offset in zip(trees, offsets):
+            nodes = np.arange(tree.node_count, dtype=np.int64) + offset
+            is_leaf = tree.children_left < 0
+            feature.append(np.where(is_leaf, 0, tree.feature).astype(np.int64))
+            threshold.append(np.where(is_leaf, np.inf, tree.threshold))
+            left.append(np.where(is_leaf, nodes, tree.children_left + offset))
+            right.append(np.where(is_leaf, nodes, tree.children_right + offset))
+
+            node_value = tree.value[:, 0, :].astype(np.float64)
+            if kind == 'forest':
+                # Per-tree class probabilities, exactly as DecisionTreeClassifier.predict_proba
+                normalizer = node_value.sum(axis=1, keepdims=True)
+                normalizer[normalizer == 0.0] = 1.0
+                node_value = node_value / normalizer
+            value.append(node_value)
+
+        if kind == 'forest':
+            init_raw, n_outputs, learning_rate = None, estimator.n_classes_, 1.0
+        else:
+            n_outputs = estimator.estimators_.shape[1]
+            learning_rate = estimator.learning_rate
+            # The initial raw prediction is a constant prior, independent of the input row
+            init_raw = estimator._raw_predict_init(np.zeros((1, estimator.n_features_in_), dtype=np.float32))[0]
+
+        return cls(
+            feature=np.concatenate(feature),
+            threshold=np.concatenate(threshold),
+            left=np.concatenate(left),
+            right=np.concatenate(right),
+            value=np.concatenate(value),
+            roots=offsets,
+            max_depth=max(tree.max_depth for tree in trees),
+            classes=estimator.classes_,
+            kind=kind,
+            scaler=scaler,
+            learning_rate=learning_rate,
+            init_raw=init_raw,
+            n_outputs=n_outputs
+        )
+
+    def apply(self, X) -> np.ndarray:
+        """Leaf node index of every (row, tree) pair"""
+        X = np.array(X, dtype=np.float64)
+        if isinstance(self.scaler, StandardScaler):
+            # Same arithmetic as StandardScaler.transform, without its input validation
+            if self.scaler.with_mean:
+                X -= self.scaler.mean_
+            if self.scaler.with_std:
+                X /= self.scaler.scale_
+        elif self.scaler is not None:
+            X = self.scaler.transform(X)
+        X = X.astype(np.float32).astype(np.float64)
+
+        rows = np.arange(len(X))[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def predict_proba(self, X) -> np.ndarray:
+        leaves = self.apply(X)
+
+        if self.kind == 'forest':
+            return self.value[leaves].mean(axis=1)
+
+        # Boosting: leaves are laid out stage-major, n_outputs trees per stage
+        leaf_values = self.value[leaves, 0].reshape(len(leaves), -1, self.n_outputs)
+        raw = self.init_raw + self.learning_rate * leaf_values.sum(axis=1)
+        if self.n_outputs == 1:
+            positive = expit(raw[:, 0])
+            return np.column_stack([1.0 - positive, positive])
+        return softmax(raw, axis=1)
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+def verify(compiled: CompiledForest, estimator: Any, X, scaler=None) -> float:
+    """Largest absolute difference between compiled and sklearn probabilities on raw rows ``X``"""
+    expected = estimator.predict_proba(scaler.transform(X) if scaler is not None else X)
+    actual = compiled.predict_proba(np.asarray(X, dtype=np.float64))
+    return float(np.max(np.abs(actual - expected))) if len(expected) else 0.0
+
+def compile_verified(estimator: Any, X_probe, scaler=None) -> Optional[CompiledForest]:
+    """Compile an estimator and check it against sklearn; returns None when it cannot be used
+
+    ``estimator`` is a pipeline (or a bare forest with its ``scaler``) and
+    ``X_probe`` a few representative raw rows used for the comparison.
+    """
+    if not CompiledForest.supports(estimator):
+        return None
+    try:
+        compiled = CompiledForest.from_estimator(estimator, scaler=scaler)
+        difference = verify(compiled, estimator, X_probe, scaler=scaler)
+    except Exception as e:
+        logger.error(f"Error compiling tree ensemble: {str(e)}")
+        return None
+
+    if difference > VERIFY_TOLERANCE:
+        logger.warning(f"Compiled tree ensemble differs from sklearn by {difference:.3e}; using sklearn")
+        return None
+    return compiled
+
+def predict_proba(estimator: Any, X: pd.DataFrame, scaler=None) -> np.ndarray:
+    """Class probabilities from the configured inference backend
+
+    With ``ML_INFERENCE_BACKEND=compiled`` tree ensembles are compiled on
+    first use, verified against sklearn on that first batch and cached for
+    as long as the estimator is alive; anything that cannot be compiled
+    falls back to sklearn. The compiled path wins where sklearn's per-call
+    overhead dominates, so batches above ``ML_COMPILED_MAX_BATCH`` rows
+    still go to sklearn's Cython traversal.
+    """
+    if settings.ML_INFERENCE_BACKEND == 'compiled' and len(X) <= settings.ML_COMPILED_MAX_BATCH:
+        compiled = _compiled_cache.get(estimator)
+        if compiled is None:
+            compiled = compile_verified(estimator, X, scaler=scaler) or False
+            _compiled_cache[estimator] = compiled
+        if compiled:
+            return compiled.predict_proba(X.to_numpy())
+
+    return estimator.predict_proba(scaler.transform(X) if scaler is not None else X)
@@ -25,6 +25,10 @@ celery_app.conf.update(
     task_soft_time_limit=25 * 60,  # 25 minutes
     worker_prefetch_multiplier=1,
     worker_max_tasks_per_child=1000,
+    # Training is CPU-bound; it gets its own queue and worker so it cannot starve other tasks
+    task_routes={
+        "app.tasks.model_tasks.*": {"queue": settings.TRAINING_QUEUE},
+    },
 )
 
 # Periodic tasks
@@ -0,0 +1,323 @@
+from sqlalchemy import select, update, func
+from threadpoolctl import threadpool_limits
+from datetime import datetime
+import asyncio
+import logging
+import os
+import uuid
+from typing import Any, Dict, Optional
+
+from app.database import AsyncSessionLocal
+from app.models.database import Model, TrainingLog
+from app.services.enhanced_ml_service import enhanced_ml_service
+from app.services.feature_store import feature_store
+from app.services.model_artifacts import load_artifact, save_artifact
+from app.services.model_registry import model_registry, enhanced_model_path
+from app.tasks.celery_app import celery_app
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Per-task limits replacing the global 30-minute task_time_limit; the hard limit follows the soft one
+TRAINING_SOFT_TIME_LIMIT = settings.TRAINING_SEARCH_TIME_BUDGET + settings.TRAINING_TASK_OVERHEAD_SECONDS
+TRAINING_TIME_LIMIT = TRAINING_SOFT_TIME_LIMIT + 5 * 60
+
+def training_cpu_budget(requested: Optional[int] = None) -> int:
+    """Cores a training run may use: the request, capped by TRAINING_CPU_BUDGET"""
+    budget = max(1, settings.TRAINING_CPU_BUDGET)
+    if requested:
+        return max(1, min(int(requested), budget))
+    return budget
+
+async def _update_training_log(training_log_id: str, **values) -> None:
+    """Write training status in its own short transaction so it is visible while training runs"""
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(TrainingLog).where(TrainingLog.id == training_log_id).values(**values))
+        await db.commit()
+
+@celery_app.task(bind=True, acks_late=True, soft_time_limit=TRAINING_SOFT_TIME_LIMIT, time_limit=TRAINING_TIME_LIMIT)
+def train_model_task(self, training_log_id: str, training_data_config: Dict[str, Any] = None):
+    """Train a model on the training queue and record progress in its TrainingLog"""
+    return asyncio.run(_train_model_async(str(training_log_id), training_data_config))
+
+async def _train_model_async(training_log_id: str, training_data_config: Dict[str, Any] = None):
+    """Async body of train_model_task"""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(TrainingLog, Model).join(Model, TrainingLog.model_id == Model.id).where(
+                TrainingLog.id == training_log_id
+            )
+        )
+        row = result.one_or_none()
+        if row is None:
+            raise ValueError(f"Training log {training_log_id} not found")
+        training_log, model = row
+
+        config = {**(training_log.training_config or {}), **(training_data_config or {})}
+        config.setdefault('algorithm', model.algorithm)
+        config['model_id'] = str(model.id)
+        config['n_jobs'] = training_cpu_budget(config.get('n_jobs'))
+
+    await _update_training_log(training_log_id, status='running', stage='starting', progress=0, started_at=func.now())
+
+    async def progress(stage: str, percent: int):
+        await _update_training_log(training_log_id, stage=stage, progress=percent)
+
+    try:
+        async with AsyncSessionLocal() as db:
+            # BLAS/OpenMP pools inside numpy and sklearn stay within the same budget
+            with threadpool_limits(limits=config['n_jobs']):
+                metrics = await enhanced_ml_service.train_enhanced_model(db, config, progress=progress)
+
+            await db.execute(
+                update(Model).where(Model.id == model.id).values(
+                    accuracy=round(metrics['accuracy'] * 100, 2),
+                    precision_score=round(metrics['precision'] * 100, 2),
+                    recall_score=round(metrics['recall'] * 100, 2),
+                    f1_score=round(metrics['f1_score'] * 100, 2),
+                    features=metrics['features_used'],
+                    model_file_path=metrics['model_path'],
+                    trained_at=func.now()
+                )
+            )
+            await db.execute(
+                update(TrainingLog).where(TrainingLog.id == training_log_id).values(
+                    status='completed',
+                    stage='completed',
+                    progress=100,
+                    accuracy_achieved=round(metrics['accuracy'] * 100, 2),
+                    training_samples=metrics['training_samples'],
+                    validation_samples=metrics['test_samples'],
+                    completed_at=func.now(),
+                    duration=func.now() - TrainingLog.started_at
+                )
+            )
+            await db.commit()
+
+        logger.info(
+            f"Model {model.id} trained on {config['n_jobs']} cores: "
+            f"accuracy {metrics['accuracy']:.3f}, {metrics['training_samples']} samples"
+        )
+        return {
+            "status": "completed",
+            "training_log_id": training_log_id,
+            "model_id": str(model.id),
+            "accuracy": metrics['accuracy']
+        }
+
+    except Exception as e:
+        logger.error(f"Error training model {model.id}: {str(e)}")
+        await _update_training_log(
+            training_log_id,
+            status='failed',
+            error_message=str(e),
+            completed_at=func.now(),
+            duration=func.now() - TrainingLog.started_at
+        )
+        raise
+
+def _next_version(version: Optional[str]) -> str:
+    """Bump the last numeric component: 1.0 -> 1.1, v2 -> v2.1"""
+    head, _, last = (version or '').rpartition('.')
+    if last.isdigit():
+        return f"{head}.{int(last) + 1}" if head else str(int(last) + 1)
+    return f"{version}.1" if version else "1"
+
+def _is_better(candidate: Dict[str, float], current: Dict[str, float]) -> bool:
+    """Higher holdout accuracy wins; on a tie, lower log loss"""
+    if candidate['accuracy'] != current['accuracy']:
+        return candidate['accuracy'] > current['accuracy']
+    return candidate['log_loss'] < current['log_loss']
+
+def _rounded(metrics: Dict[str, float]) -> Dict[str, float]:
+    return {name: round(float(value), 4) for name, value in metrics.items()}
+
+@celery_app.task(acks_late=True, soft_time_limit=TRAINING_SOFT_TIME_LIMIT, time_limit=TRAINING_TIME_LIMIT)
+def scheduled_model_retrain(added_estimators: Optional[int] = None):
+    """Warm-start the active model on newly finished matches and promote it if it does better"""
+    return asyncio.run(_scheduled_retrain_async(added_estimators))
+
+async def _scheduled_retrain_async(added_estimators: Optional[int] = None):
+    """Async body of scheduled_model_retrain
+    
+    Matches whose result was recorded since the active model was trained
+    (its ``trained_through`` watermark, else ``trained_at``) are split by
+    recording time: the older part extends the model with
+    ``EnhancedMLService.warm_start`` and the most recent
+    ``RETRAIN_HOLDOUT_FRACTION`` scores both the current model and the
+    candidate. A better candidate is saved as a new model version and
+    activated; otherwise the current model stays and the next run sees
+    the same matches plus whatever finished in between.
+    """
+    added_estimators = added_estimators or settings.RETRAIN_ADDED_ESTIMATORS
+    n_jobs = training_cpu_budget()
+    
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(Model).where(
+                Model.is_active == True,
+                Model.is_deleted == False
+            ).order_by(Model.created_at.desc())
+        )
+        model = result.scalars().first()
+        
+        if model is None or model.trained_at is None:
+            logger.info("Scheduled retrain skipped: no trained active model")
+            return {"status": "skipped", "reason": "no trained active model"}
+        
+        model_id = str(model.id)
+        if not os.path.exists(enhanced_model_path(model_id)):
+            logger.info(f"Scheduled retrain skipped: model {model_id} has no enhanced pipeline")
+            return {"status": "skipped", "reason": "active model cannot be warm-started", "model_id": model_id}
+        
+        trained_through = (model.parameters or {}).get('trained_through')
+        since = datetime.fromisoformat(trained_through) if trained_through else model.trained_at
+        matches = await enhanced_ml_service._get_matches_finished_since(db, since)
+        
+        if len(matches) < settings.RETRAIN_MIN_NEW_MATCHES:
+            logger.info(f"Scheduled retrain skipped: {len(matches)} new matches since {since.isoformat()}")
+            return {"status": "skipped", "reason": "not enough new matches", "model_id": model_id, "new_matches": len(matches)}
+        
+        training_log = TrainingLog(
+            model_id=model.id,
+            status='running',
+            stage='computing_features',
+            progress=10,
+            training_config={
+                'mode': 'warm_start',
+                'since': since.isoformat(),
+                'new_matches': len(matches),
+                'added_estimators': added_estimators
+            }
+        )
+        db.add(training_log)
+        await db.commit()
+        await db.refresh(training_log)
+        training_log_id = str(training_log.id)
+        
+        try:
+            X = await feature_store.get_features(db, matches)
+            y = enhanced_ml_service._prepare_labels(matches)
+            
+            await _update_training_log(training_log_id, stage='fitting', progress=40)
+            pipeline = await asyncio.to_thread(load_artifact, enhanced_model_path(model_id), False)
+            missing = [name for name in pipeline.feature_names_ if name not in X.columns]
+            if missing:
+                raise ValueError(f"Feature set changed since training ({len(missing)} columns missing); a full retrain is required")
+            X = X.fillna(pipeline.feature_means_).fillna(0.0)
+            
+            # Most recently recorded results are the holdout neither model has seen
+            holdout_size = max(1, int(len(matches) * settings.RETRAIN_HOLDOUT_FRACTION))
+            split = len(matches) - holdout_size
+            X_fit, y_fit = X.iloc[:split], y[:split]
+            X_holdout, y_holdout = X.iloc[split:], y[split:]
+            
+            with threadpool_limits(limits=n_jobs):
+                current_metrics = enhanced_ml_service.holdout_metrics(pipeline, X_holdout, y_holdout)
+                candidate = enhanced_ml_service.warm_start(pipeline, X_fit, y_fit, added_estimators, n_jobs)
+                await _update_training_log(training_log_id, stage='evaluating', progress=75)
+                candidate_metrics = enhanced_ml_service.holdout_metrics(candidate, X_holdout, y_holdout)
+            
+            promoted = _is_better(candidate_metrics, current_metrics)
+            outcome = {
+                **training_log.training_config,
+                'fit_samples': split,
+                'current': _rounded(current_metrics),
+                'candidate': _rounded(candidate_metrics),
+                'promoted': promoted
+            }
+            
+            new_model_id = None
+            if promoted:
+                await _update_training_log(training_log_id, stage='saving', progress=90)
+                new_model_id = uuid.uuid4()
+                model_path = await asyncio.to_thread(save_artifact, candidate, enhanced_model_path(str(new_model_id)))
+                classifier = candidate.named_steps['classifier']
+                
+                try:
+                    await db.execute(update(Model).where(Model.is_active == True).values(is_active=False))
+                    db.add(Model(
+                        id=new_model_id,
+                        name=model.name,
+                        version=_next_version(model.version),
+                        algorithm=model.algorithm,
+                        parameters={
+                            **(model.parameters or {}),
+                            **({'n_estimators': classifier.n_estimators} if hasattr(classifier, 'n_estimators') else {}),
+                            'warm_started_from': model_id,
+                            'trained_through': matches[split - 1].finished_at.isoformat()
+                        },
+                        features=list(candidate.feature_names_),
+                        trained_at=func.now(),
+                        accuracy=round(candidate_metrics['accuracy'] * 100, 2),
+                        precision_score=round(candidate_metrics['precision'] * 100, 2),
+                        recall_score=round(candidate_metrics['recall'] * 100, 2),
+                        f1_score=round(candidate_metrics['f1_score'] * 100, 2),
+                        is_active=True,
+                        model_file_path=model_path,
+                        notes=f"Warm-start retrain of version {model.version} on {split} matches",
+                        created_by=model.created_by
+                    ))
+                    outcome['promoted_model_id'] = str(new_model_id)
+                    await db.execute(
+                        update(TrainingLog).where(TrainingLog.id == training_log_id).values(
+                            status='completed',
+                            stage='completed',
+                            progress=100,
+                            accuracy_achieved=round(candidate_metrics['accuracy'] * 100, 2),
+                            training_samples=split,
+                            validation_samples=holdout_size,
+                            training_config=outcome,
+                            completed_at=func.now(),
+                            duration=func.now() - TrainingLog.started_at
+                        )
+                    )
+                    await db.commit()
+                except Exception:
+                    await db.rollback()
+                    os.remove(model_path)
+                    raise
+                
+                # Load it here as the API does on activation; other processes load it on first use
+                try:
+                    await model_registry.activate(str(new_model_id))
+                except Exception as e:
+                    logger.error(f"Failed to load promoted model {new_model_id}: {str(e)}")
+            else:
+                await _update_training_log(
+                    training_log_id,
+                    status='completed',
+                    stage='completed',
+                    progress=100,
+                    accuracy_achieved=round(candidate_metrics['accuracy'] * 100, 2),
+                    training_samples=split,
+                    validation_samples=holdout_size,
+                    training_config=outcome,
+                    completed_at=func.now(),
+                    duration=func.now() - TrainingLog.started_at
+                )
+            
+            logger.info(
+                f"Scheduled retrain of model {model_id}: holdout accuracy {current_metrics['accuracy']:.3f} -> "
+                f"{candidate_metrics['accuracy']:.3f} on {holdout_size} matches, "
+                + (f"promoted {new_model_id}" if promoted else "kept current model")
+            )
+            return {
+                "status": "completed",
+                "training_log_id": training_log_id,
+                "model_id": model_id,
+                "promoted_model_id": str(new_model_id) if new_model_id else None,
+                "current_accuracy": current_metrics['accuracy'],
+                "candidate_accuracy": candidate_metrics['accuracy']
+            }
+        
+        except Exception as e:
+            logger.error(f"Error in scheduled retrain of model {model_id}: {str(e)}")
+            await _update_training_log(
+                training_log_id,
+                status='failed',
+                error_message=str(e),
+                completed_at=func.now(),
+                duration=func.now() - TrainingLog.started_at
+            )
+            raise
@@ -1,19 +1,28 @@
 from celery import Celery
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
 import asyncio
 import logging
+import time
 from typing import List
 import uuid
 
 from app.database import get_db
-from app.models.database import PredictionBatch, Prediction, Match, Model
+from app.models.database import PredictionBatch, Prediction, Match, Model, Season
 from app.services.enhanced_ml_service import enhanced_ml_service
 from app.services.statistics_service import statistics_service
+from app.services.scoreline_model import scoreline_service
+from app.services.team_stats_service import team_stats_service
+from app.services.prediction_rollups import prediction_rollup_service
 from app.core.config import settings
+from app.core.cache import response_cache, TAG_MATCHES
 
 logger = logging.getLogger(__name__)
 
+# Rows per multi-row INSERT when writing a prediction batch
+PREDICTION_INSERT_CHUNK_SIZE = 500
+
 # Create Celery app
 celery_app = Celery(
     "football_predictions",
@@ -76,12 +85,12 @@ async def _generate_predictions_async(batch_id: str, match_ids: List[str] = None
                     )
                 )
             else:
-                # Get upcoming matches
+                # Get the next upcoming matches (soonest first, read from idx_matches_status_date)
                 matches_result = await db.execute(
                     select(Match).where(
                         Match.status == 'scheduled',
                         Match.is_deleted == False
-                    ).limit(50)  # Limit to prevent overload
+                    ).order_by(Match.match_date, Match.id).limit(50)  # Limit to prevent overload
                 )
             
             matches = matches_result.scalars().all()
@@ -90,65 +99,107 @@ async def _generate_predictions_async(batch_id: str, match_ids: List[str] = None
                 logger.warning("No matches found for prediction")
                 return {"status": "completed", "predictions_generated": 0}
             
-            predictions_generated = 0
+            # Skip matches already predicted in this batch (one query for the whole set)
+            existing_result = await db.execute(
+                select(Prediction.match_id).where(
+                    Prediction.batch_id == batch_id,
+                    Prediction.match_id.in_([match.id for match in matches])
+                )
+            )
+            existing_ids = {str(match_id) for match_id in existing_result.scalars().all()}
+            if existing_ids:
+                logger.info(f"Predictions already exist for {len(existing_ids)} matches in batch {batch_id}")
             
-            for match in matches:
-                try:
-                    # Check if prediction already exists for this match and batch
-                    existing_result = await db.execute(
-                        select(Prediction).where(
-                            Prediction.match_id == match.id,
-                            Prediction.batch_id == batch_id
-                        )
-                    )
-                    existing = existing_result.scalar_one_or_none()
-                    
-                    if existing:
-                        logger.info(f"Prediction already exists for match {match.id}")
-                        continue
-                    
-                    # Generate prediction using enhanced ML service
-                    if model.algorithm in ['RandomForest', 'GradientBoosting', 'LogisticRegression']:
-                        prediction_data = await enhanced_ml_service.predict_match_enhanced(
-                            db, str(match.id), str(model.id)
-                        )
-                    else:
-                        # Fallback to statistical prediction
+            remaining = [match for match in matches if str(match.id) not in existing_ids]
+            
+            # Generate predictions; ML models score the whole remaining set as one matrix.
+            # A match that cannot be predicted is left out and reported in ``failed``
+            predictions_data = []
+            failed = []
+            if model.algorithm in ['RandomForest', 'GradientBoosting', 'LogisticRegression']:
+                predictions_data = await enhanced_ml_service.predict_matches_enhanced(
+                    db, [str(match.id) for match in remaining], str(model.id), failed
+                )
+            else:
+                # Fallback to statistical prediction; score matrices for every fixture in one pass
+                scorelines = await scoreline_service.predict_fixtures(
+                    db, [(str(match.home_team_id), str(match.away_team_id)) for match in remaining]
+                )
+                for match, scoreline in zip(remaining, scorelines):
+                    try:
                         prediction_data = await statistics_service.run_comprehensive_prediction(
-                            db, str(match.home_team_id), str(match.away_team_id)
+                            db, str(match.home_team_id), str(match.away_team_id), scoreline=scoreline
                         )
-                    
-                    # Create prediction record
-                    prediction = Prediction(
-                        match_id=match.id,
-                        batch_id=batch_id,
-                        predicted_winner=prediction_data['predicted_winner'],
-                        home_expected_goals=prediction_data.get('home_expected_goals', 0.0),
-                        away_expected_goals=prediction_data.get('away_expected_goals', 0.0),
-                        home_win_probability=prediction_data.get('home_win_probability', 0.0),
-                        draw_probability=prediction_data.get('draw_probability', 0.0),
-                        away_win_probability=prediction_data.get('away_win_probability', 0.0),
-                        confidence_score=prediction_data.get('confidence_score', 0.0),
-                        features_used=prediction_data.get('features_used', {})
-                    )
-                    
-                    db.add(prediction)
-                    predictions_generated += 1
-                    
-                except Exception as e:
-                    logger.error(f"Error generating prediction for match {match.id}: {str(e)}")
-                    continue
+                        if scoreline is not None:
+                            # Winner and confidence come from the same probabilities that are stored
+                            outcomes = {
+                                'home': scoreline['home_win_prob'],
+                                'draw': scoreline['draw_prob'],
+                                'away': scoreline['away_win_prob']
+                            }
+                            predicted_winner = max(outcomes, key=outcomes.get)
+                            prediction_data.update({
+                                'predicted_winner': predicted_winner,
+                                'confidence_score': round(outcomes[predicted_winner], 3),
+                                'home_win_probability': round(outcomes['home'], 3),
+                                'draw_probability': round(outcomes['draw'], 3),
+                                'away_win_probability': round(outcomes['away'], 3)
+                            })
+                        predictions_data.append({'match_id': str(match.id), **prediction_data})
+                    except Exception as e:
+                        logger.error(f"Error generating prediction for match {match.id}: {str(e)}")
+                        failed.append({'match_id': str(match.id), 'error': str(e)})
+                        continue
+            
+            rows = [
+                {
+                    'match_id': uuid.UUID(prediction_data['match_id']),
+                    'batch_id': batch.id,
+                    'predicted_winner': prediction_data['predicted_winner'],
+                    'home_expected_goals': prediction_data.get('home_expected_goals', 0.0),
+                    'away_expected_goals': prediction_data.get('away_expected_goals', 0.0),
+                    'home_win_probability': prediction_data.get('home_win_probability', 0.0),
+                    'draw_probability': prediction_data.get('draw_probability', 0.0),
+                    'away_win_probability': prediction_data.get('away_win_probability', 0.0),
+                    'confidence_score': prediction_data.get('confidence_score', 0.0),
+                    'features_used': prediction_data.get('features_used', {})
+                }
+                for prediction_data in predictions_data
+            ]
+            
+            # Multi-row inserts; rows written concurrently by another worker are skipped
+            inserted_ids = []
+            insert_started = time.perf_counter()
+            for start in range(0, len(rows), PREDICTION_INSERT_CHUNK_SIZE):
+                stmt = insert(Prediction).values(rows[start:start + PREDICTION_INSERT_CHUNK_SIZE])
+                stmt = stmt.on_conflict_do_nothing(constraint='uq_predictions_match_batch').returning(Prediction.id)
+                inserted = await db.execute(stmt)
+                inserted_ids.extend(inserted.scalars().all())
+            insert_seconds = time.perf_counter() - insert_started
+            predictions_generated = len(inserted_ids)
+            
+            # Dashboard rollup, in the same transaction as the rows it counts
+            await prediction_rollup_service.record_inserted(db, inserted_ids)
             
             # Update batch with total predictions
-            batch.total_predictions = predictions_generated
+            batch.total_predictions = (batch.total_predictions or 0) + predictions_generated
             await db.commit()
             
-            logger.info(f"Generated {predictions_generated} predictions for batch {batch_id}")
+            rows_per_second = predictions_generated / insert_seconds if insert_seconds > 0 else 0.0
+            logger.info(
+                f"Generated {predictions_generated} predictions for batch {batch_id} "
+                f"({rows_per_second:.0f} rows/s insert throughput)"
+            )
             
             return {
                 "status": "completed",
                 "predictions_generated": predictions_generated,
-                "batch_id": batch_id
+                "batch_id": batch_id,
+                "skipped_existing": len(existing_ids),
+                "predictions_failed": len(failed),
+                "failed": failed,
+                "insert_seconds": round(insert_seconds, 4),
+                "insert_rows_per_second": round(rows_per_second, 1)
             }
             
         except Exception as e:
@@ -171,8 +222,8 @@ async def _evaluate_predictions_async(prediction_ids: List[str] = None, batch_id
     """Async function to evaluate predictions"""
     async for db in get_db():
         try:
-            # Build query for predictions to evaluate
-            query = select(Prediction).join(Match).where(
+            # Build query for predictions to evaluate (the match result comes with each row)
+            query = select(Prediction, Match.winner).join(Match).where(
                 Match.status == 'finished',
                 Match.winner.isnot(None),
                 Prediction.result_status == 'pending'
@@ -183,39 +234,32 @@ async def _evaluate_predictions_async(prediction_ids: List[str] = None, batch_id
             elif batch_id:
                 query = query.where(Prediction.batch_id == batch_id)
             
-            result = await db.execute(query)
-            predictions = result.scalars().all()
+            # Rows being settled by a concurrent run are skipped so the rollup counts them once
+            result = await db.execute(query.with_for_update(of=Prediction, skip_locked=True))
+            rows = result.all()
             
-            if not predictions:
+            if not rows:
                 logger.warning("No predictions found for evaluation")
                 return {"status": "completed", "predictions_evaluated": 0}
             
             predictions_evaluated = 0
             correct_predictions = 0
+            settled_ids = []
             
-            for prediction in predictions:
-                try:
-                    # Get match result
-                    match_result = await db.execute(
-                        select(Match).where(Match.id == prediction.match_id)
-                    )
-                    match = match_result.scalar_one_or_none()
-                    
-                    if not match or match.status != 'finished' or not match.winner:
-                        continue
-                    
-                    # Evaluate prediction
-                    is_correct = prediction.predicted_winner == match.winner
-                    prediction.result_status = 'correct' if is_correct else 'wrong'
-                    
-                    if is_correct:
-                        correct_predictions += 1
-                    
-                    predictions_evaluated += 1
-                    
-                except Exception as e:
-                    logger.error(f"Error evaluating prediction {prediction.id}: {str(e)}")
-                    continue
+            for prediction, winner in rows:
+                # Evaluate prediction
+                is_correct = prediction.predicted_winner == winner
+                prediction.result_status = 'correct' if is_correct else 'wrong'
+                settled_ids.append(prediction.id)
+                
+                if is_correct:
+                    correct_predictions += 1
+                
+                predictions_evaluated += 1
+            
+            # Move the settled predictions from pending to correct/wrong in the dashboard rollup
+            await db.flush()
+            await prediction_rollup_service.record_settled(db, settled_ids)
             
             await db.commit()
             
@@ -250,13 +294,31 @@ async def _update_team_stats_async():
     """Async function to update team statistics"""
     async for db in get_db():
         try:
-            # This would contain logic to recalculate team statistics
-            # based on recent matches and update the TeamStats table
-            logger.info("Team stats update completed")
-            return {"status": "completed"}
+            # Full recompute per season; the API keeps team_stats current incrementally,
+            # so anything corrected here is drift worth investigating
+            seasons_result = await db.execute(select(Season.id))
+            season_ids = seasons_result.scalars().all()
+            
+            reports = []
+            for season_id in season_ids:
+                reports.append(await team_stats_service.recompute_season(db, season_id))
+                await db.commit()
+            
+            drifted_teams = sum(report['drifted_teams'] for report in reports)
+            if drifted_teams:
+                # team_stats derives from matches, so corrected rows invalidate the same entries
+                await response_cache.invalidate(TAG_MATCHES)
+            logger.info(f"Team stats update completed: {len(reports)} seasons, {drifted_teams} teams corrected")
+            return {
+                "status": "completed",
+                "seasons_checked": len(reports),
+                "drifted_teams": drifted_teams,
+                "drift": [report for report in reports if report['drifted_teams']]
+            }
             
         except Exception as e:
             logger.error(f"Error updating team stats: {str(e)}")
+            await db.rollback()
             raise
         finally:
             await db.close()
@@ -0,0 +1,321 @@
+"""End-to-end benchmark of the API endpoints and the Celery task bodies
+
+Runs against a scratch PostgreSQL database, optionally seeding it first
+with benchmarks/seed.py. The FastAPI app is driven in-process through
+httpx's ASGITransport with authentication overridden, so the numbers cover
+routing, validation, SQL and serialization without network or token cost.
+The task bodies (_generate_predictions_async, _evaluate_predictions_async)
+and EnhancedMLService.train_enhanced_model are awaited directly.
+
+For every endpoint it reports p50/p95/p99 latency, throughput and SQL
+statements per request (counted with a before_cursor_execute listener).
+Results are written as JSON; --compare prints the p95 change against an
+earlier run.
+
+    python benchmarks/harness.py --seed --requests 200 --concurrency 8
+    python benchmarks/harness.py --skip-tasks --output after.json --compare before.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from seed import DEFAULT_DATABASE_URL  # noqa: E402
+
+def configure_environment(args) -> None:
+    # app.core.config reads the environment at import time, so this runs before any app import
+    os.environ['DATABASE_URL'] = args.database_url
+    os.environ['ENVIRONMENT'] = 'benchmark'  # no SQL echo
+    os.environ['LOG_LEVEL'] = 'WARNING'
+    os.environ['RESPONSE_CACHE_ENABLED'] = 'true' if args.response_cache else 'false'
+    os.environ.setdefault('MODEL_STORAGE_PATH', tempfile.mkdtemp(prefix='benchmark_models_'))
+    # A fresh feature cache per run: the first training repeat builds the matrix, later ones reuse it
+    os.environ.setdefault('FEATURE_CACHE_PATH', os.path.join(os.environ['MODEL_STORAGE_PATH'], 'feature_cache'))
+
+class QueryCounter:
+    """Counts SQL statements sent through the application's engine"""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self.count = 0
+        event.listen(engine.sync_engine, 'before_cursor_execute', self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+def summarize(latencies_ms, wall_seconds: float, queries: int, errors: int) -> dict:
+    samples = np.array(latencies_ms) if latencies_ms else np.zeros(1)
+    requests = len(latencies_ms)
+    return {
+        'requests': requests,
+        'errors': errors,
+        'p50_ms': round(float(np.percentile(samples, 50)), 3),
+        'p95_ms': round(float(np.percentile(samples, 95)), 3),
+        'p99_ms': round(float(np.percentile(samples, 99)), 3),
+        'mean_ms': round(float(samples.mean()), 3),
+        'throughput_rps': round(requests / wall_seconds, 1) if wall_seconds > 0 else 0.0,
+        'queries_per_request': round(queries / requests, 2) if requests else 0.0
+    }
+
+async def load_sample(db) -> dict:
+    """IDs used to build the endpoint URLs: a busy fixture, its season, the seeded model"""
+    from sqlalchemy import select
+    from app.models.database import Match, Model
+
+    match = (await db.execute(
+        select(Match).where(Match.status == 'finished', Match.is_deleted == False)
+        .order_by(Match.match_date.desc()).limit(1)
+    )).scalar_one_or_none()
+    model = (await db.execute(select(Model).where(Model.is_deleted == False).limit(1))).scalar_one_or_none()
+    if match is None or model is None:
+        raise SystemExit('The database has no finished matches or no model; run with --seed')
+    return {
+        'home_team_id': str(match.home_team_id),
+        'away_team_id': str(match.away_team_id),
+        'season_id': str(match.season_id),
+        'model_id': str(model.id)
+    }
+
+def endpoint_scenarios(sample: dict) -> dict:
+    home, away, season = sample['home_team_id'], sample['away_team_id'], sample['season_id']
+    return {
+        'matches_list': '/matches/?size=20',
+        'matches_by_status': '/matches/?status=finished&size=20',
+        'matches_by_team': f'/matches/?team_id={home}&size=20',
+        'predictions_list': '/predictions/?size=20',
+        'predictions_overview': '/predictions/stats/overview',
+        'models_list': '/models/',
+        'stats_overview': '/stats/overview',
+        'stats_model_stats': '/stats/model_stats',
+        'stats_performance_trends': '/stats/performance_trends',
+        'team_analysis': f'/statistics/team-analysis?home_team_id={home}&away_team_id={away}',
+        'team_stats': f'/statistics/team-stats/{home}?season_id={season}',
+        'league_table': f'/statistics/league-table?season_id={season}',
+        'match_stats': f'/statistics/match-stats?season_id={season}'
+    }
+
+async def bench_endpoint(client, path: str, counter: QueryCounter, requests: int, concurrency: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        await client.get(path)
+
+    latencies, errors = [], 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.get(path)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+
+    queries_before = counter.count
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    wall = time.perf_counter() - started
+    return summarize(latencies, wall, counter.count - queries_before, errors)
+
+async def run_endpoints(args, sample: dict, counter: QueryCounter) -> dict:
+    import httpx
+    from main import app
+    from app.core.security import get_current_user
+    from app.models.database import User
+
+    user = User(id=uuid.uuid4(), email='benchmark@example.com', full_name='Benchmark', role='admin', is_active=True)
+    app.dependency_overrides[get_current_user] = lambda: user
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://benchmark') as client:
+        for name, path in endpoint_scenarios(sample).items():
+            if args.only and name not in args.only:
+                continue
+            results[name] = {'path': path, **await bench_endpoint(
+                client, path, counter, args.requests, args.concurrency, args.warmup
+            )}
+            row = results[name]
+            print(
+                f"{name:<28}{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}"
+                f"{row['throughput_rps']:>10.1f}{row['queries_per_request']:>9.1f}{row['errors']:>7}"
+            )
+    app.dependency_overrides.pop(get_current_user, None)
+    return results
+
+async def timed_task(name: str, counter: QueryCounter, fn, repeats: int) -> dict:
+    durations, outcome = [], None
+    queries_before = counter.count
+    for _ in range(repeats):
+        started = time.perf_counter()
+        outcome = await fn()
+        durations.append((time.perf_counter() - started) * 1000)
+    result = summarize(durations, sum(durations) / 1000, counter.count - queries_before, 0)
+    result['last_result'] = outcome
+    print(f"{name:<28}{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}{result['p99_ms']:>9.1f}{'':>10}{result['queries_per_request']:>9.1f}")
+    return result
+
+async def run_tasks(args, sample: dict, counter: QueryCounter) -> dict:
+    from sqlalchemy import func, select, update
+    from app.database import AsyncSessionLocal
+    from app.models.database import Match, PredictionBatch
+    from app.services.enhanced_ml_service import enhanced_ml_service
+    from app.tasks.prediction_tasks import _generate_predictions_async, _evaluate_predictions_async
+
+    model_id = sample['model_id']
+    results = {}
+
+    async def train():
+        async with AsyncSessionLocal() as db:
+            metrics = await enhanced_ml_service.train_enhanced_model(
+                db, {'model_id': model_id, 'algorithm': 'RandomForest', 'n_estimators': args.trees}
+            )
+            await db.commit()
+        return {key: metrics[key] for key in ('accuracy', 'training_samples', 'test_samples')}
+
+    results['train_enhanced_model'] = await timed_task('train_enhanced_model', counter, train, args.train_repeats)
+
+    # Batches are created up front so only the task body is timed
+    async with AsyncSessionLocal() as db:
+        batches = [PredictionBatch(model_id=model_id, description='benchmark') for _ in range(args.task_repeats)]
+        db.add_all(batches)
+        await db.commit()
+    batch_ids = [str(batch.id) for batch in batches]
+    pending = iter(batch_ids)
+
+    async def generate():
+        return await _generate_predictions_async(next(pending))
+
+    results['generate_predictions'] = await timed_task('generate_predictions', counter, generate, args.task_repeats)
+
+    # Results "come in" for the matches the batches predicted (the next 50 scheduled), then one batch is evaluated
+    async with AsyncSessionLocal() as db:
+        match_ids = (await db.execute(
+            select(Match.id).where(Match.status == 'scheduled', Match.is_deleted == False)
+            .order_by(Match.match_date, Match.id).limit(50)
+        )).scalars().all()
+        await db.execute(
+            update(Match).where(Match.id.in_(match_ids)).values(
+                status='finished', home_goals=1, away_goals=0, winner='home', finished_at=func.now()
+            )
+        )
+        await db.commit()
+
+    async def evaluate():
+        return await _evaluate_predictions_async(batch_id=batch_ids[-1])
+
+    results['evaluate_predictions'] = await timed_task('evaluate_predictions', counter, evaluate, 1)
+    return results
+
+async def prepare(args) -> dict:
+    """Seed if asked, then build the derived tables the endpoints read"""
+    if args.seed:
+        import asyncpg
+        import seed
+        conn = await asyncpg.connect(args.database_url)
+        try:
+            await seed.reset(conn)
+            print(json.dumps({
+                key: value for key, value in
+                (await seed.seed(conn, args.leagues, args.teams, args.seasons)).items()
+                if key != 'season_ids'
+            }))
+        finally:
+            await conn.close()
+
+    from sqlalchemy import select
+    from app.database import AsyncSessionLocal
+    from app.models.database import Season
+    from app.services.prediction_rollups import prediction_rollup_service
+    from app.services.team_stats_service import team_stats_service
+
+    async with AsyncSessionLocal() as db:
+        if args.seed:
+            for season_id in (await db.execute(select(Season.id))).scalars().all():
+                await team_stats_service.recompute_season(db, season_id)
+            await prediction_rollup_service.rebuild(db)
+            await db.commit()
+        return await load_sample(db)
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return 'unknown'
+
+def compare(report: dict, baseline_path: str) -> None:
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\n{'p95 vs ' + os.path.basename(baseline_path):<28}{'before':>10}{'after':>10}{'change':>9}")
+    for section in ('endpoints', 'tasks'):
+        for name, row in report.get(section, {}).items():
+            before = baseline.get(section, {}).get(name)
+            if before and before['p95_ms']:
+                change = (row['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100
+                print(f"{name:<28}{before['p95_ms']:>10.1f}{row['p95_ms']:>10.1f}{change:>8.1f}%")
+
+async def run(args) -> dict:
+    from app.database import engine
+
+    sample = await prepare(args)
+    counter = QueryCounter(engine)
+    report = {
+        'started_at': datetime.utcnow().isoformat(),
+        'commit': git_commit(),
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+        'sample': sample
+    }
+
+    print(f"\n{'endpoint':<28}{'p50':>9}{'p95':>9}{'p99':>9}{'req/s':>10}{'queries':>9}{'errors':>7}   (ms)")
+    report['endpoints'] = await run_endpoints(args, sample, counter)
+
+    if not args.skip_tasks:
+        print(f"\n{'task':<28}{'p50':>9}{'p95':>9}{'p99':>9}{'':>10}{'queries':>9}")
+        report['tasks'] = await run_tasks(args, sample, counter)
+
+    await engine.dispose()
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database-url', default=DEFAULT_DATABASE_URL, help='scratch database; --seed wipes it')
+    parser.add_argument('--seed', action='store_true', help='reset and seed the database first')
+    parser.add_argument('--leagues', type=int, default=8)
+    parser.add_argument('--teams', type=int, default=20, help='teams per league')
+    parser.add_argument('--seasons', type=int, default=10, help='seasons per league')
+    parser.add_argument('--requests', type=int, default=200, help='requests per endpoint')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--warmup', type=int, default=5, help='untimed requests per endpoint')
+    parser.add_argument('--only', nargs='*', help='endpoint names to run')
+    parser.add_argument('--response-cache', action='store_true', help='leave the Redis response cache on')
+    parser.add_argument('--skip-tasks', action='store_true', help='endpoints only')
+    parser.add_argument('--trees', type=int, default=100, help='n_estimators for the training run')
+    parser.add_argument('--train-repeats', type=int, default=1)
+    parser.add_argument('--task-repeats', type=int, default=3, help='prediction batches to generate')
+    parser.add_argument('--output', default=f"benchmark_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.json")
+    parser.add_argument('--compare', help='earlier JSON result to compare p95 against')
+    args = parser.parse_args()
+
+    configure_environment(args)
+    report = asyncio.run(run(args))
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"\nresults written to {args.output}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+if __name__ == '__main__':
+    main()
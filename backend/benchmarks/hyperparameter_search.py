@@ -0,0 +1,128 @@
+"""Hyperparameter search benchmark: time-to-accuracy of grid, random and halving search
+
+Runs app.services.search_strategy.run_search with each strategy on the same
+synthetic three-class data set (shaped like the match features: a few
+informative columns, noise and an imbalanced draw class) and reports wall
+time, model fits, the winner's CV accuracy and its accuracy on a holdout.
+Time-to-accuracy is when a strategy first had a full-data CV score within
+``--tolerance`` of the grid's best; strategies that never get there show '-'.
+
+    python benchmarks/hyperparameter_search.py
+    python benchmarks/hyperparameter_search.py --algorithm GradientBoosting --n-jobs 4 --time-budget 120
+    python benchmarks/hyperparameter_search.py --samples 20000 --output search.json
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+from sklearn.datasets import make_classification
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.search_strategy import SEARCH_STRATEGIES, run_search  # noqa: E402
+
+def make_data(samples: int, features: int, random_seed: int):
+    """Noisy, imbalanced three-class data (home / draw / away)"""
+    return make_classification(
+        n_samples=samples, n_features=features, n_informative=max(3, features // 3),
+        n_redundant=max(1, features // 6), n_classes=3, weights=[0.46, 0.26, 0.28],
+        class_sep=0.6, flip_y=0.15, random_state=random_seed
+    )
+
+def make_pipeline(algorithm: str, n_jobs: int, random_seed: int) -> Pipeline:
+    """The untuned pipeline enhanced_ml_service starts from"""
+    if algorithm == 'RandomForest':
+        model = RandomForestClassifier(n_estimators=200, max_depth=15, min_samples_split=5, min_samples_leaf=2, random_state=random_seed, n_jobs=n_jobs)
+    elif algorithm == 'GradientBoosting':
+        model = GradientBoostingClassifier(n_estimators=100, max_depth=6, learning_rate=0.1, random_state=random_seed)
+    else:
+        model = LogisticRegression(random_state=random_seed, max_iter=2000)
+    return Pipeline([('scaler', StandardScaler()), ('classifier', model)])
+
+def time_to_accuracy(trace, target: float):
+    for seconds, score in trace:
+        if score >= target:
+            return seconds
+    return None
+
+def run(args) -> list:
+    X, y = make_data(args.samples, args.features, args.seed)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=args.seed, stratify=y)
+    pipeline = make_pipeline(args.algorithm, args.n_jobs, args.seed)
+
+    report = []
+    for strategy in args.strategies:
+        result = run_search(
+            pipeline, X_train, y_train, args.algorithm,
+            strategy=strategy,
+            n_jobs=args.n_jobs,
+            max_candidates=args.candidates if strategy != 'grid' else None,
+            max_seconds=args.time_budget,
+            max_fits=args.max_fits,
+            random_state=args.seed
+        )
+        if result is None:
+            raise SystemExit(f"{args.algorithm} has no search space")
+        report.append({
+            'strategy': strategy,
+            'candidates': result.candidates,
+            'fits': result.fits,
+            'seconds': result.seconds,
+            'stopped_early': result.stopped_early,
+            'cv_accuracy': result.cv_mean,
+            'cv_std': result.cv_std,
+            'cv_samples': result.cv_samples,
+            'holdout_accuracy': accuracy_score(y_test, result.best_estimator.predict(X_test)),
+            'best_params': result.best_params,
+            'trace': result.trace
+        })
+
+    # The exhaustive grid's best is the reference; without a grid run, the best strategy's
+    reference = next((entry for entry in report if entry['strategy'] == 'grid'), None)
+    target = (reference or max(report, key=lambda entry: entry['cv_accuracy']))['cv_accuracy'] - args.tolerance
+    for entry in report:
+        entry['target_accuracy'] = target
+        entry['time_to_accuracy'] = time_to_accuracy(entry['trace'], target)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--algorithm', default='RandomForest', choices=['RandomForest', 'GradientBoosting', 'LogisticRegression'])
+    parser.add_argument('--strategies', nargs='*', default=list(SEARCH_STRATEGIES), choices=SEARCH_STRATEGIES)
+    parser.add_argument('--samples', type=int, default=4000, help='rows, before the 80/20 holdout split')
+    parser.add_argument('--features', type=int, default=24)
+    parser.add_argument('--n-jobs', type=int, default=2, help='CPU budget, as TRAINING_CPU_BUDGET')
+    parser.add_argument('--candidates', type=int, default=None, help='candidates sampled by random and halving search')
+    parser.add_argument('--time-budget', type=float, default=None, help='wall-clock seconds per search')
+    parser.add_argument('--max-fits', type=int, default=None, help='model fits per search')
+    parser.add_argument('--tolerance', type=float, default=0.005, help='CV accuracy below the grid best that still counts as reached')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='write the report, including traces, as JSON')
+    args = parser.parse_args()
+
+    report = run(args)
+
+    print(f"target CV accuracy {report[0]['target_accuracy']:.4f} ({args.algorithm}, {args.samples} rows, {args.n_jobs} cores)")
+    print(f"{'strategy':<10}{'cands':>7}{'fits':>7}{'seconds':>10}{'to target':>11}{'cv acc':>9}{'holdout':>9}")
+    for entry in report:
+        reached = f"{entry['time_to_accuracy']:.1f}" if entry['time_to_accuracy'] is not None else '-'
+        flag = ' (budget)' if entry['stopped_early'] else ''
+        print(
+            f"{entry['strategy']:<10}{entry['candidates']:>7}{entry['fits']:>7}{entry['seconds']:>10.1f}{reached:>11}"
+            f"{entry['cv_accuracy']:>9.4f}{entry['holdout_accuracy']:>9.4f}{flag}"
+        )
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, default=lambda value: value.item() if isinstance(value, np.generic) else str(value))
+
+if __name__ == '__main__':
+    main()
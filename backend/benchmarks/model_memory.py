@@ -0,0 +1,121 @@
+"""Per-worker memory of a model artifact loaded with and without memory mapping
+
+Forks N workers that each load the same artifact (as uvicorn/Celery workers
+do), run one prediction so every page is touched, and report Rss, Pss and
+private memory from /proc/self/smaps_rollup while all workers are alive.
+Pss divides shared pages between the processes mapping them, so it is the
+number that shows sharing.
+
+    python benchmarks/model_memory.py --workers 4 --trees 300
+    python benchmarks/model_memory.py --artifact models/enhanced_model_<id>.joblib
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.model_artifacts import load_artifact, save_artifact  # noqa: E402
+
+FIELDS = ('Rss', 'Pss', 'Shared_Clean', 'Private_Clean', 'Private_Dirty')
+
+def read_memory() -> dict:
+    """Memory counters of the current process in MiB"""
+    values = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            name, _, rest = line.partition(':')
+            if name in FIELDS:
+                values[name] = int(rest.split()[0]) / 1024
+    return values
+
+def build_artifact(path: str, trees: int, rows: int, features: int) -> None:
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    rng = np.random.default_rng(42)
+    X = rng.normal(size=(rows, features))
+    y = rng.integers(0, 3, size=rows)
+    pipeline = Pipeline([
+        ('scaler', StandardScaler()),
+        ('classifier', RandomForestClassifier(n_estimators=trees, min_samples_leaf=2, random_state=42, n_jobs=-1))
+    ]).fit(X, y)
+    save_artifact(pipeline, path)
+
+def worker(path: str, mmap: bool, features: int, barrier, results) -> None:
+    baseline = read_memory()
+    model = load_artifact(path, mmap=mmap)
+    n_features = getattr(model, 'n_features_in_', features)
+    model.predict_proba(np.zeros((16, n_features)))
+    barrier.wait()  # every worker holds its copy before anyone measures
+    loaded = read_memory()
+    results.put({
+        'pid': os.getpid(),
+        'baseline': baseline,
+        'loaded': loaded,
+        'delta': {name: loaded[name] - baseline.get(name, 0.0) for name in loaded}
+    })
+    barrier.wait()
+
+def run(path: str, mmap: bool, workers: int, features: int) -> list:
+    context = multiprocessing.get_context('fork')
+    barrier = context.Barrier(workers)
+    results = context.Queue()
+    processes = [
+        context.Process(target=worker, args=(path, mmap, features, barrier, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    samples = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return samples
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--artifact', help='existing .joblib artifact; a RandomForest pipeline is trained when omitted')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--trees', type=int, default=300)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--features', type=int, default=30)
+    parser.add_argument('--output', help='write the raw samples as JSON')
+    args = parser.parse_args()
+
+    path = args.artifact
+    if path is None:
+        # Train in a separate process so the forked workers do not inherit the fitted model
+        path = os.path.join(tempfile.mkdtemp(), 'benchmark_model.joblib')
+        builder = multiprocessing.get_context('spawn').Process(
+            target=build_artifact, args=(path, args.trees, args.rows, args.features)
+        )
+        builder.start()
+        builder.join()
+
+    size_mib = os.path.getsize(path) / 1024 / 1024
+    print(f"artifact: {path} ({size_mib:.1f} MiB), workers: {args.workers}")
+    print(f"{'mode':<8}{'Rss':>10}{'Pss':>10}{'Private':>10}{'Shared':>10}   (MiB per worker after load)")
+
+    report = {'artifact': path, 'artifact_mib': size_mib, 'workers': args.workers, 'modes': {}}
+    for label, mmap in (('copy', False), ('mmap', True)):
+        samples = run(path, mmap, args.workers, args.features)
+        mean = {
+            name: float(np.mean([s['loaded'].get(name, 0.0) for s in samples]))
+            for name in FIELDS
+        }
+        private = mean['Private_Clean'] + mean['Private_Dirty']
+        print(f"{label:<8}{mean['Rss']:>10.1f}{mean['Pss']:>10.1f}{private:>10.1f}{mean['Shared_Clean']:>10.1f}")
+        report['modes'][label] = {'mean_mib': mean, 'samples': samples}
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""Scoreline model benchmark: Dixon-Coles fit, match-day refit and batched scoring times
+
+Simulates leagues of teams with known attack/defence strengths, then times
+a cold fit of app.services.scoreline_model on the full history, the
+warm-started refit after one more match day, and scoring every fixture of
+a round-robin in one batch (score matrices plus all markets). Reports how
+well the fitted strengths recover the simulated ones.
+
+    python benchmarks/scoreline_model.py
+    python benchmarks/scoreline_model.py --leagues 20 --seasons 10 --output scoreline.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.match_history import MatchRecord  # noqa: E402
+from app.services.scoreline_model import ScorelineService, scoreline_markets  # noqa: E402
+
+def simulate(rng, leagues: int, teams: int, seasons: int, home_advantage: float):
+    """Double round-robins per league and season; returns records, true strengths and team ids"""
+    team_ids = [f"L{league:02d}T{team:02d}" for league in range(leagues) for team in range(teams)]
+    attack = dict(zip(team_ids, rng.normal(0.0, 0.3, len(team_ids))))
+    defence = dict(zip(team_ids, rng.normal(0.1, 0.2, len(team_ids))))
+
+    records, start = [], datetime.now(timezone.utc) - timedelta(days=365 * seasons)
+    for league in range(leagues):
+        league_teams = team_ids[league * teams:(league + 1) * teams]
+        for season in range(seasons):
+            for home in league_teams:
+                for away in league_teams:
+                    if home == away:
+                        continue
+                    kickoff = start + timedelta(days=365 * season + int(rng.integers(0, 280)))
+                    lam = np.exp(home_advantage + attack[home] + defence[away])
+                    mu = np.exp(attack[away] + defence[home])
+                    records.append(MatchRecord(
+                        id=f"{len(records)}", home_team_id=home, away_team_id=away, season_id=f"{league}-{season}",
+                        match_date=kickoff, home_goals=int(rng.poisson(lam)), away_goals=int(rng.poisson(mu)), winner=None
+                    ))
+    return records, attack, defence, team_ids
+
+def run(args) -> dict:
+    rng = np.random.default_rng(args.seed)
+    records, attack, defence, team_ids = simulate(rng, args.leagues, args.teams, args.seasons, args.home_advantage)
+    service = ScorelineService()
+
+    started = time.perf_counter()
+    service.model = service.fit_records(records)
+    cold_seconds = time.perf_counter() - started
+
+    # One more match day: every team of every league plays once
+    latest = max(record.match_date for record in records) + timedelta(days=1)
+    match_day = []
+    for league in range(args.leagues):
+        league_teams = list(rng.permutation(team_ids[league * args.teams:(league + 1) * args.teams]))
+        for home, away in zip(league_teams[0::2], league_teams[1::2]):
+            match_day.append(MatchRecord(
+                id=f"md{len(match_day)}", home_team_id=home, away_team_id=away, season_id='next',
+                match_date=latest, home_goals=int(rng.poisson(1.5)), away_goals=int(rng.poisson(1.1)), winner=None
+            ))
+    started = time.perf_counter()
+    service.model = service.fit_records(records + match_day)
+    warm_seconds = time.perf_counter() - started
+
+    model = service.model
+    fixtures = [
+        (home, away)
+        for league in range(args.leagues)
+        for home in team_ids[league * args.teams:(league + 1) * args.teams]
+        for away in team_ids[league * args.teams:(league + 1) * args.teams]
+        if home != away
+    ]
+    started = time.perf_counter()
+    lam, mu = model.expected_goals([home for home, _ in fixtures], [away for _, away in fixtures])
+    markets = scoreline_markets(model.score_matrices(lam, mu))
+    score_seconds = time.perf_counter() - started
+
+    fitted = [model.team_index[team_id] for team_id in team_ids]
+    return {
+        'matches': model.matches,
+        'teams': len(team_ids),
+        'fixtures_scored': len(fixtures),
+        'cold_fit_seconds': cold_seconds,
+        'match_day_refit_seconds': warm_seconds,
+        'score_seconds': score_seconds,
+        'fixtures_per_second': len(fixtures) / score_seconds if score_seconds > 0 else None,
+        'attack_correlation': float(np.corrcoef(model.attack[fitted], [attack[t] for t in team_ids])[0, 1]),
+        'defence_correlation': float(np.corrcoef(model.defence[fitted], [defence[t] for t in team_ids])[0, 1]),
+        'home_advantage': model.home_advantage,
+        'rho': model.rho,
+        'mean_home_win_prob': float(markets['home_win_prob'].mean())
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--leagues', type=int, default=8)
+    parser.add_argument('--teams', type=int, default=20, help='teams per league')
+    parser.add_argument('--seasons', type=int, default=5)
+    parser.add_argument('--home-advantage', type=float, default=0.25, help='simulated log home advantage')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='write the report as JSON')
+    args = parser.parse_args()
+
+    report = run(args)
+    print(json.dumps(report, indent=2))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == '__main__':
+    main()
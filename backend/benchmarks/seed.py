@@ -0,0 +1,174 @@
+"""Seed a scratch PostgreSQL database with synthetic leagues
+
+Applies scripts/create-database-schema.sql (without the Supabase realtime
+publication) and loads, per league, a set of teams and seasons with a
+double round-robin of matches, one model with a prediction batch per
+season and a prediction for every match. The last season of each league
+is only partly played, so there are scheduled matches and pending
+predictions too. Rows are loaded with COPY and the tables are ANALYZEd so
+the planner sees realistic statistics. team_stats and the prediction
+rollup are left empty; the application rebuilds them.
+
+    python benchmarks/seed.py --database-url postgresql://localhost/football_bench --reset
+    python benchmarks/seed.py --leagues 8 --teams 20 --seasons 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+import asyncpg
+import numpy as np
+
+SCHEMA_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'scripts', 'create-database-schema.sql'
+)
+
+DEFAULT_DATABASE_URL = os.getenv('BENCHMARK_DATABASE_URL', 'postgresql://localhost/football_bench')
+
+MATCH_COLUMNS = [
+    'id', 'home_team_id', 'away_team_id', 'season_id', 'match_date',
+    'home_goals', 'away_goals', 'status', 'winner', 'is_deleted', 'finished_at'
+]
+PREDICTION_COLUMNS = [
+    'id', 'match_id', 'batch_id', 'predicted_winner', 'home_expected_goals', 'away_expected_goals',
+    'home_win_probability', 'draw_probability', 'away_win_probability', 'confidence_score',
+    'result_status', 'created_at'
+]
+OUTCOMES = ('home', 'draw', 'away')
+
+def _decimal(value: float, places: int) -> Decimal:
+    return Decimal(f"{value:.{places}f}")
+
+def schema_script() -> str:
+    """The schema file minus statements that only exist on Supabase"""
+    with open(SCHEMA_PATH) as f:
+        return ''.join(line for line in f if 'supabase_realtime' not in line)
+
+async def reset(conn: asyncpg.Connection) -> None:
+    await conn.execute('DROP SCHEMA IF EXISTS public CASCADE; CREATE SCHEMA public;')
+    await conn.execute(schema_script())
+
+def _double_round_robin(rng, team_ids, season_start: date):
+    """(home, away, kickoff) for every ordered pair, spread over a 40-week season"""
+    fixtures = []
+    for home in team_ids:
+        for away in team_ids:
+            if home != away:
+                day = season_start + timedelta(days=int(rng.integers(0, 280)))
+                kickoff = datetime(day.year, day.month, day.day, int(rng.choice([12, 15, 17, 20])), tzinfo=timezone.utc)
+                fixtures.append((home, away, kickoff))
+    return fixtures
+
+async def seed(
+    conn: asyncpg.Connection,
+    leagues: int = 8,
+    teams: int = 20,
+    seasons: int = 10,
+    played_fraction: float = 0.5,
+    random_seed: int = 42
+) -> dict:
+    """Load the synthetic data set; returns the generated IDs and row counts"""
+    rng = np.random.default_rng(random_seed)
+    first_year = date.today().year - seasons
+
+    team_rows, season_rows, match_rows, prediction_rows, batch_rows = [], [], [], [], []
+    model_id = uuid.uuid4()
+    season_ids = []
+
+    for league in range(1, leagues + 1):
+        team_ids = [uuid.uuid4() for _ in range(teams)]
+        strength = dict(zip(team_ids, rng.normal(0.0, 0.35, size=teams)))
+        team_rows += [
+            (team_id, f"League {league} Team {index:02d}", f"L{league:02d}T{index:02d}", False)
+            for index, team_id in enumerate(team_ids, 1)
+        ]
+
+        for offset in range(seasons):
+            year = first_year + offset
+            season_id, batch_id = uuid.uuid4(), uuid.uuid4()
+            season_start = date(year, 8, 1)
+            is_current = offset == seasons - 1
+            season_ids.append(season_id)
+            season_rows.append((season_id, f"League {league} {year}/{(year + 1) % 100:02d}", season_start, date(year + 1, 5, 31), is_current))
+            batch_rows.append((batch_id, model_id, f"League {league} {year}/{(year + 1) % 100:02d}"))
+
+            fixtures = _double_round_robin(rng, team_ids, season_start)
+            cutoff = season_start + timedelta(days=int(280 * played_fraction)) if is_current else None
+            for home, away, kickoff in fixtures:
+                match_id = uuid.uuid4()
+                finished = cutoff is None or kickoff.date() < cutoff
+                home_rate = np.exp(0.35 + strength[home] - strength[away])
+                away_rate = np.exp(0.1 + strength[away] - strength[home])
+
+                if finished:
+                    home_goals, away_goals = int(rng.poisson(home_rate)), int(rng.poisson(away_rate))
+                    winner = 'home' if home_goals > away_goals else 'away' if away_goals > home_goals else 'draw'
+                    match_rows.append((match_id, home, away, season_id, kickoff, home_goals, away_goals, 'finished', winner, False, kickoff + timedelta(hours=2)))
+                else:
+                    winner = None
+                    match_rows.append((match_id, home, away, season_id, kickoff, None, None, 'scheduled', None, False, None))
+
+                probabilities = rng.dirichlet([home_rate * 2, 1.5, away_rate * 2])
+                predicted = OUTCOMES[int(np.argmax(probabilities))]
+                status = 'pending' if winner is None else 'correct' if predicted == winner else 'wrong'
+                prediction_rows.append((
+                    uuid.uuid4(), match_id, batch_id, predicted,
+                    _decimal(min(home_rate, 9.99), 2), _decimal(min(away_rate, 9.99), 2),
+                    *(_decimal(p, 3) for p in probabilities),
+                    _decimal(probabilities.max(), 3), status, kickoff - timedelta(days=1)
+                ))
+
+    await conn.execute(
+        "INSERT INTO models (id, name, version, algorithm, is_active, trained_at) "
+        "VALUES ($1, 'benchmark', '1.0', 'RandomForest', true, now())",
+        model_id
+    )
+    await conn.copy_records_to_table('teams', records=team_rows, columns=['id', 'name', 'short_code', 'is_deleted'])
+    await conn.copy_records_to_table('seasons', records=season_rows, columns=['id', 'name', 'start_date', 'end_date', 'is_active'])
+    await conn.copy_records_to_table('matches', records=match_rows, columns=MATCH_COLUMNS)
+    await conn.copy_records_to_table('prediction_batches', records=batch_rows, columns=['id', 'model_id', 'description'])
+    await conn.copy_records_to_table('predictions', records=prediction_rows, columns=PREDICTION_COLUMNS)
+    await conn.execute('ANALYZE')
+
+    return {
+        'model_id': str(model_id),
+        'season_ids': [str(season_id) for season_id in season_ids],
+        'teams': len(team_rows),
+        'seasons': len(season_rows),
+        'matches': len(match_rows),
+        'predictions': len(prediction_rows)
+    }
+
+async def run(args) -> dict:
+    conn = await asyncpg.connect(args.database_url)
+    try:
+        if args.reset:
+            await reset(conn)
+        return await seed(conn, args.leagues, args.teams, args.seasons, args.played_fraction, args.seed)
+    finally:
+        await conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database-url', default=DEFAULT_DATABASE_URL, help='scratch database; never point this at real data')
+    parser.add_argument('--reset', action='store_true', help='drop the public schema and apply the schema file first')
+    parser.add_argument('--leagues', type=int, default=8)
+    parser.add_argument('--teams', type=int, default=20, help='teams per league')
+    parser.add_argument('--seasons', type=int, default=10, help='seasons per league')
+    parser.add_argument('--played-fraction', type=float, default=0.5, help='share of the current season already played')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    summary = asyncio.run(run(args))
+    print(json.dumps({key: value for key, value in summary.items() if key != 'season_ids'}, indent=2))
+    print(f"seeded in {time.perf_counter() - started:.1f}s")
+
+if __name__ == '__main__':
+    main()
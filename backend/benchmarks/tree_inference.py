@@ -0,0 +1,73 @@
+"""Latency of compiled tree-ensemble inference against sklearn's predict_proba
+
+Trains RandomForest and GradientBoosting pipelines shaped like the ones
+EnhancedMLService produces, checks that the compiled form agrees with
+sklearn to within 1e-9 and times single-row and 1k-row batches.
+
+    python benchmarks/tree_inference.py
+    python benchmarks/tree_inference.py --trees 300 --repeats 50
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier  # noqa: E402
+from sklearn.pipeline import Pipeline  # noqa: E402
+from sklearn.preprocessing import StandardScaler  # noqa: E402
+
+from app.services.tree_inference import VERIFY_TOLERANCE, CompiledForest, verify  # noqa: E402
+
+def timed(fn, X, repeats: int) -> float:
+    """Median wall time of ``fn(X)`` in milliseconds"""
+    fn(X)  # warm up
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn(X)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--trees', type=int, default=200)
+    parser.add_argument('--rows', type=int, default=2000, help='training rows')
+    parser.add_argument('--features', type=int, default=30)
+    parser.add_argument('--repeats', type=int, default=30)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    X = rng.normal(size=(args.rows, args.features))
+    y = rng.integers(0, 3, size=args.rows)
+    X_eval = rng.normal(size=(1000, args.features))
+
+    estimators = {
+        'RandomForest': RandomForestClassifier(
+            n_estimators=args.trees, max_depth=15, min_samples_split=5, min_samples_leaf=2, random_state=42, n_jobs=-1
+        ),
+        'GradientBoosting': GradientBoostingClassifier(
+            n_estimators=max(args.trees // 2, 1), max_depth=6, learning_rate=0.1, random_state=42
+        ),
+    }
+
+    print(f"{'model':<18}{'batch':>7}{'sklearn ms':>12}{'compiled ms':>13}{'speedup':>9}{'max |diff|':>12}")
+    for name, estimator in estimators.items():
+        pipeline = Pipeline([('scaler', StandardScaler()), ('classifier', estimator)]).fit(X, y)
+        compiled = CompiledForest.from_estimator(pipeline)
+        difference = verify(compiled, pipeline, X_eval)
+        if difference > VERIFY_TOLERANCE:
+            raise SystemExit(f"{name}: compiled output differs from sklearn by {difference:.3e}")
+
+        for batch in (1, 10, 100, 1000):
+            rows = X_eval[:batch]
+            sklearn_ms = timed(pipeline.predict_proba, rows, args.repeats)
+            compiled_ms = timed(compiled.predict_proba, rows, args.repeats)
+            print(f"{name:<18}{batch:>7}{sklearn_ms:>12.3f}{compiled_ms:>13.3f}{sklearn_ms / compiled_ms:>8.1f}x{difference:>12.1e}")
+
+if __name__ == '__main__':
+    main()
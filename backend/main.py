@@ -2,19 +2,31 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.responses import JSONResponse
+import asyncio
 import logging
 import time
 from contextlib import asynccontextmanager
 
 from app.core.config import settings
-from app.database import engine, Base
+from app.database import engine, Base, AsyncSessionLocal
 from app.routers import auth, matches, predictions, models, stats, admin, statistics
 from app.core.logging_config import setup_logging
+from app.services.match_history import match_history_index
+from app.services.model_registry import model_registry
+from app.core.cache import response_cache
 
 # Setup logging
 setup_logging()
 logger = logging.getLogger(__name__)
 
+async def _preload_active_model():
+    """Warm the model registry with the active model"""
+    try:
+        async with AsyncSessionLocal() as db:
+            await model_registry.preload_active(db)
+    except Exception as e:
+        logger.error(f"Failed to preload active model: {str(e)}")
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events"""
@@ -27,10 +39,22 @@ async def lifespan(app: FastAPI):
     
     logger.info("Database tables created/verified")
     
+    # Warm the in-process match history index used by the statistics service
+    try:
+        async with AsyncSessionLocal() as db:
+            await match_history_index.load(db)
+    except Exception as e:
+        logger.error(f"Failed to load match history index: {str(e)}")
+    
+    # Load the active model in the background so startup is not held up by disk I/O
+    preload_task = asyncio.create_task(_preload_active_model())
+    
     yield
     
     # Shutdown
     logger.info("Shutting down Football Prediction API...")
+    preload_task.cancel()
+    await response_cache.close()
 
 # Create FastAPI app
 app = FastAPI(
@@ -0,0 +1,177 @@
+import asyncio
+
+import pytest
+
+from app.core import cache as cache_module
+from app.core.cache import RETRY_AFTER_SECONDS, ResponseCache
+
+class FakeRedis:
+    """In-memory stand-in for the redis.asyncio commands ResponseCache uses (no expiry)"""
+
+    def __init__(self):
+        self.data = {}
+        self.fail = False
+
+    def _check(self):
+        if self.fail:
+            raise ConnectionError("redis is down")
+
+    async def get(self, key):
+        self._check()
+        return self.data.get(key)
+
+    async def mget(self, keys):
+        self._check()
+        return [self.data.get(key) for key in keys]
+
+    async def set(self, key, value, nx=False, px=None, ex=None):
+        self._check()
+        if nx and key in self.data:
+            return None
+        self.data[key] = value.encode() if isinstance(value, str) else value
+        return True
+
+    async def exists(self, key):
+        self._check()
+        return int(key in self.data)
+
+    async def incr(self, key):
+        self._check()
+        value = int(self.data.get(key, b"0")) + 1
+        self.data[key] = str(value).encode()
+        return value
+
+    async def eval(self, script, numkeys, key, token):
+        self._check()
+        if self.data.get(key) == token.encode():
+            del self.data[key]
+            return 1
+        return 0
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def aclose(self):
+        pass
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def incr(self, key):
+        self.commands.append(key)
+
+    async def execute(self):
+        return [await self.client.incr(key) for key in self.commands]
+
+class Loader:
+    """Compute callback counting its calls; ``release`` holds every call until set"""
+
+    def __init__(self, value=None):
+        self.calls = 0
+        self.value = value if value is not None else {"answer": 42}
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        return self.value
+
+@pytest.fixture
+def redis_client():
+    return FakeRedis()
+
+@pytest.fixture
+def cache(redis_client, monkeypatch):
+    monkeypatch.setattr(cache_module.settings, "RESPONSE_CACHE_ENABLED", True)
+    response_cache = ResponseCache(url="redis://test", prefix="test")
+    response_cache._get_client = lambda: redis_client
+    return response_cache
+
+@pytest.mark.asyncio
+async def test_miss_computes_then_hit_is_served_from_redis(cache, redis_client):
+    loader = Loader()
+
+    assert await cache.get_or_compute("standings", {"season_id": 1}, loader, ttl=60) == {"answer": 42}
+    assert await cache.get_or_compute("standings", {"season_id": 1}, loader, ttl=60) == {"answer": 42}
+    assert loader.calls == 1
+
+    # Different arguments are a different entry
+    await cache.get_or_compute("standings", {"season_id": 2}, loader, ttl=60)
+    assert loader.calls == 2
+    assert not any(key.endswith(":lock") for key in redis_client.data)
+
+@pytest.mark.asyncio
+async def test_invalidating_a_tag_drops_entries_that_depend_on_it(cache):
+    loader = Loader()
+
+    await cache.get_or_compute("teams", {}, loader, ttl=60, tags=["teams"])
+    await cache.get_or_compute("matches", {}, loader, ttl=60, tags=["matches"])
+    assert loader.calls == 2
+
+    await cache.invalidate("teams")
+
+    await cache.get_or_compute("teams", {}, loader, ttl=60, tags=["teams"])
+    assert loader.calls == 3
+    # An entry that does not depend on the tag is still served
+    await cache.get_or_compute("matches", {}, loader, ttl=60, tags=["matches"])
+    assert loader.calls == 3
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_call_the_loader_once(cache):
+    loader = Loader()
+    loader.release.clear()
+
+    requests = [asyncio.create_task(cache.get_or_compute("standings", {}, loader, ttl=60)) for _ in range(10)]
+    await asyncio.sleep(0.01)
+    loader.release.set()
+
+    assert await asyncio.gather(*requests) == [{"answer": 42}] * 10
+    assert loader.calls == 1
+
+@pytest.mark.asyncio
+async def test_miss_waits_for_another_workers_fill_lock(cache, redis_client):
+    other_worker = ResponseCache(url="redis://test", prefix="test")
+    other_worker._get_client = lambda: redis_client
+    loader = Loader()
+    loader.release.clear()
+
+    filling = asyncio.create_task(other_worker.get_or_compute("standings", {}, loader, ttl=60))
+    await asyncio.sleep(0.01)
+    waiting = asyncio.create_task(cache.get_or_compute("standings", {}, loader, ttl=60))
+    await asyncio.sleep(0.01)
+    loader.release.set()
+
+    assert await filling == await waiting == {"answer": 42}
+    assert loader.calls == 1
+
+@pytest.mark.asyncio
+async def test_redis_error_bypasses_the_cache_for_a_while(cache, redis_client, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    loader = Loader()
+
+    redis_client.fail = True
+    assert await cache.get_or_compute("standings", {}, loader, ttl=60) == {"answer": 42}
+    assert not cache.available
+
+    # Redis is back, but the cache keeps stepping aside until the retry window ends
+    redis_client.fail = False
+    now[0] += RETRY_AFTER_SECONDS - 1
+    await cache.get_or_compute("standings", {}, loader, ttl=60)
+    assert redis_client.data == {}
+    assert loader.calls == 2
+
+    now[0] += 1
+    assert cache.available
+    await cache.get_or_compute("standings", {}, loader, ttl=60)
+    await cache.get_or_compute("standings", {}, loader, ttl=60)
+    assert loader.calls == 3
@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.conditional import ConditionalGet
+from app.core.security import get_current_user
+from app.database import get_db
+from app.models.database import Match, Team
+
+class FakeResult:
+    def __init__(self, row):
+        self.row = row
+
+    def one(self):
+        return self.row
+
+class FakeSession:
+    """Answers the validator query with per-table (max(updated_at), count) the test controls"""
+
+    def __init__(self):
+        now = datetime(2024, 3, 9, 15, 0, 0, 500000, tzinfo=timezone.utc)
+        self.tables = {"matches": [now, 380], "teams": [now - timedelta(days=30), 20]}
+        self.queries = 0
+
+    async def execute(self, query):
+        self.queries += 1
+        return FakeResult(tuple(self.tables["matches"] + self.tables["teams"]))
+
+    def write(self, table, seconds=1):
+        self.tables[table][0] += timedelta(seconds=seconds)
+
+@pytest.fixture
+def session():
+    return FakeSession()
+
+@pytest.fixture
+def app(session):
+    app = FastAPI()
+    calls = {"endpoint": 0}
+
+    @app.get("/matches", dependencies=[Depends(ConditionalGet(Match, Team))])
+    async def list_matches():
+        calls["endpoint"] += 1
+        return {"items": []}
+
+    async def fake_db():
+        yield session
+
+    app.dependency_overrides[get_db] = fake_db
+    app.dependency_overrides[get_current_user] = lambda: "user"
+    app.state.calls = calls
+    return app
+
+@pytest.fixture
+def client(app):
+    return TestClient(app)
+
+def test_first_request_gets_validators(client, session):
+    response = client.get("/matches")
+
+    assert response.status_code == 200
+    assert response.headers["etag"].startswith('W/"')
+    assert response.headers["last-modified"] == format_datetime(session.tables["matches"][0].replace(microsecond=0), usegmt=True)
+    assert response.headers["cache-control"] == "private, no-cache"
+
+def test_matching_etag_is_not_modified_without_running_the_endpoint(app, client):
+    etag = client.get("/matches").headers["etag"]
+
+    response = client.get("/matches", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    assert app.state.calls["endpoint"] == 1
+
+def test_etag_changes_after_a_write(client, session):
+    etag = client.get("/matches").headers["etag"]
+
+    session.write("teams")
+    response = client.get("/matches", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+def test_etag_changes_after_a_hard_delete(client, session):
+    etag = client.get("/matches").headers["etag"]
+
+    # A deleted row leaves max(updated_at) alone; only the count moves
+    session.tables["matches"][1] -= 1
+    response = client.get("/matches", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+def test_etag_depends_on_the_query_string(client):
+    first = client.get("/matches", params={"page": 1}).headers["etag"]
+
+    response = client.get("/matches", params={"page": 2}, headers={"If-None-Match": first})
+
+    assert response.status_code == 200
+    assert response.headers["etag"] != first
+
+def test_if_modified_since(client, session):
+    last_modified = client.get("/matches").headers["last-modified"]
+
+    assert client.get("/matches", headers={"If-Modified-Since": last_modified}).status_code == 304
+
+    session.write("matches")
+    assert client.get("/matches", headers={"If-Modified-Since": last_modified}).status_code == 200
+
+def test_if_none_match_takes_precedence_over_if_modified_since(client):
+    last_modified = client.get("/matches").headers["last-modified"]
+
+    response = client.get("/matches", headers={"If-None-Match": 'W/"stale"', "If-Modified-Since": last_modified})
+
+    assert response.status_code == 200
+
+def test_matching_etag_without_credentials_is_rejected(app, client, session):
+    etag = client.get("/matches").headers["etag"]
+    queries = session.queries
+
+    del app.dependency_overrides[get_current_user]
+    response = client.get("/matches", headers={"If-None-Match": etag})
+
+    assert response.status_code in (401, 403)
+    assert session.queries == queries
@@ -0,0 +1,106 @@
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services import enhanced_ml_service as module
+from app.services.enhanced_ml_service import EnhancedMLService
+from app.services.feature_store import FEATURE_COLUMNS
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.rows
+
+class FakeSession:
+    """Returns the test's matches for any query and counts savepoints"""
+
+    def __init__(self, matches):
+        self.matches = matches
+        self.savepoints = 0
+
+    async def execute(self, query):
+        return FakeResult(self.matches)
+
+    @asynccontextmanager
+    async def begin_nested(self):
+        self.savepoints += 1
+        yield
+
+class FakePipeline:
+    """Home win for every row; refuses rows whose home_form_index is negative"""
+    classes_ = np.array([0, 1, 2])
+
+    def predict_proba(self, X):
+        if (X['home_form_index'] < 0).any():
+            raise ValueError("negative form")
+        return np.tile([0.6, 0.3, 0.1], (len(X), 1))
+
+def features(**overrides):
+    row = dict.fromkeys(FEATURE_COLUMNS, 1.0)
+    row.update(overrides)
+    return row
+
+@pytest.fixture
+def service(monkeypatch):
+    service = EnhancedMLService()
+    pipeline = FakePipeline()
+
+    async def get_enhanced(model_id):
+        return pipeline
+
+    monkeypatch.setattr(service.registry, "get_enhanced", get_enhanced)
+    monkeypatch.setattr(module.settings, "ML_INFERENCE_BACKEND", "sklearn")
+    return service
+
+def use_features(monkeypatch, rows_by_id, broken=()):
+    async def get_features(db, matches):
+        if any(match.id in broken for match in matches):
+            raise RuntimeError("cannot compute")
+        return pd.DataFrame([rows_by_id[match.id] for match in matches], columns=FEATURE_COLUMNS)
+
+    monkeypatch.setattr(module.feature_store, "get_features", get_features)
+
+def matches(*ids):
+    return [SimpleNamespace(id=match_id) for match_id in ids]
+
+@pytest.mark.asyncio
+async def test_unscorable_rows_are_reported_and_the_rest_predicted(service, monkeypatch):
+    use_features(monkeypatch, {
+        "a": features(), "b": features(home_form_index=np.inf), "c": features(home_form_index=-1.0), "d": features()
+    })
+    failures = []
+
+    predictions = await service.predict_matches_enhanced(FakeSession(matches("a", "b", "c", "d")), ["a", "b", "c", "d"], "m", failures)
+
+    assert [p['match_id'] for p in predictions] == ["a", "d"]
+    assert all(p['predicted_winner'] == 'home' for p in predictions)
+    assert [f['match_id'] for f in failures] == ["b", "c"]
+
+@pytest.mark.asyncio
+async def test_feature_failure_drops_only_that_match(service, monkeypatch):
+    use_features(monkeypatch, {"a": features(), "b": features(), "c": features()}, broken={"b"})
+    db = FakeSession(matches("a", "b", "c"))
+    failures = []
+
+    predictions = await service.predict_matches_enhanced(db, ["a", "b", "c"], "m", failures)
+
+    assert [p['match_id'] for p in predictions] == ["a", "c"]
+    assert failures == [{'match_id': "b", 'error': "features could not be computed: cannot compute"}]
+    # The batch attempt plus one savepoint per match
+    assert db.savepoints == 4
+
+@pytest.mark.asyncio
+async def test_single_match_failure_raises(service, monkeypatch):
+    # No stored training means and a one-row batch: the gap cannot be filled
+    use_features(monkeypatch, {"a": features(home_form_index=np.nan)})
+
+    with pytest.raises(ValueError, match="could not be predicted"):
+        await service.predict_match_enhanced(FakeSession(matches("a")), "a", "m")
@@ -0,0 +1,99 @@
+import base64
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, create_engine, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.core.pagination import InvalidCursor, apply_keyset, decode_cursor, encode_cursor
+
+metadata = MetaData()
+
+matches = Table(
+    "matches", metadata,
+    Column("id", UUID(as_uuid=True), primary_key=True),
+    Column("match_date", DateTime(timezone=True)),
+    Column("status", String)
+)
+
+# Same shape with types SQLite can store, to run the keyset query for real
+rows_table = Table(
+    "rows", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("created_at", DateTime)
+)
+
+def key_columns():
+    return [matches.c.match_date, matches.c.id]
+
+def test_cursor_round_trip_restores_typed_values():
+    values = [datetime(2024, 3, 9, 15, 0, tzinfo=timezone.utc), uuid.uuid4()]
+
+    cursor = encode_cursor(values)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor, key_columns()) == values
+
+@pytest.mark.parametrize("cursor", [
+    "not-base64!",
+    base64.urlsafe_b64encode(b"{}").decode(),
+    encode_cursor(["2024-03-09T15:00:00+00:00"]),
+    encode_cursor(["yesterday", str(uuid.uuid4())]),
+    encode_cursor(["2024-03-09T15:00:00+00:00", "not-a-uuid"]),
+])
+def test_tampered_cursor_is_rejected(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, key_columns())
+
+def test_tampered_cursor_is_rejected_by_apply_keyset():
+    payload = json.dumps(["2024-03-09T15:00:00+00:00", "1; DROP TABLE matches"]).encode()
+    with pytest.raises(InvalidCursor):
+        apply_keyset(select(matches), key_columns(), base64.urlsafe_b64encode(payload).decode())
+
+def test_first_page_only_orders_descending():
+    sql = str(apply_keyset(select(matches), key_columns(), None).compile(dialect=postgresql.dialect()))
+
+    assert "WHERE" not in sql
+    assert sql.endswith("ORDER BY matches.match_date DESC, matches.id DESC")
+
+def test_cursor_becomes_a_row_comparison_on_the_key_columns():
+    last_date, last_id = datetime(2024, 3, 9, 15, 0, tzinfo=timezone.utc), uuid.uuid4()
+    query = apply_keyset(
+        select(matches).where(matches.c.status == "finished"),
+        key_columns(),
+        encode_cursor([last_date, last_id])
+    )
+
+    compiled = query.compile(dialect=postgresql.dialect())
+    sql = str(compiled)
+
+    assert "(matches.match_date, matches.id) < (%(param_1)s, %(param_2)s::UUID)" in sql
+    assert "matches.status = %(status_1)s" in sql
+    assert sql.endswith("ORDER BY matches.match_date DESC, matches.id DESC")
+    assert compiled.params["param_1"] == last_date
+    assert compiled.params["param_2"] == last_id
+
+def test_keyset_pages_visit_every_row_once_across_equal_sort_values():
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine, tables=[rows_table])
+    start = datetime(2024, 1, 1)
+    # Three rows share each timestamp, so a page boundary falls inside a tie
+    data = [{"id": i, "created_at": start + timedelta(days=i // 3)} for i in range(10)]
+    columns = [rows_table.c.created_at, rows_table.c.id]
+
+    with engine.connect() as conn:
+        conn.execute(rows_table.insert(), data)
+
+        seen, cursor = [], None
+        while True:
+            page = conn.execute(apply_keyset(select(rows_table), columns, cursor).limit(4)).all()
+            seen.extend(row.id for row in page)
+            if len(page) < 4:
+                break
+            cursor = encode_cursor([page[-1].created_at, page[-1].id])
+
+    expected = [row["id"] for row in sorted(data, key=lambda row: (row["created_at"], row["id"]), reverse=True)]
+    assert seen == expected
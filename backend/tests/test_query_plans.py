@@ -0,0 +1,149 @@
+"""EXPLAIN the hot match and prediction queries and fail on sequential scans
+
+Builds the queries the API and the Celery tasks run on every request or
+batch (team history, head-to-head, the list endpoints, the prediction and
+evaluation queues) with the application's models and checks that no plan
+reads ``matches`` or ``predictions`` with a Seq Scan. Small lookup tables
+(teams, seasons, models) may be scanned. The planner only prefers the
+indexes on realistic volumes, so the database must be seeded first;
+without ``TEST_DATABASE_URL`` the tests are skipped.
+
+    python benchmarks/seed.py --database-url postgresql://localhost/football_bench --reset
+    TEST_DATABASE_URL=postgresql://localhost/football_bench python -m pytest tests/test_query_plans.py
+"""
+import asyncio
+import json
+import os
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import and_, or_, select
+from sqlalchemy.dialects import postgresql
+
+from app.models.database import Match, Prediction
+
+asyncpg = pytest.importorskip("asyncpg")
+
+DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+# Tables large enough that a sequential scan on a hot path is a regression
+CHECKED_TABLES = {'matches', 'predictions'}
+
+def _live_team(sample):
+    return or_(Match.home_team_id == sample['home_team_id'], Match.away_team_id == sample['home_team_id'])
+
+# Name -> query for a sample row, mirroring the filters and ordering used in app/
+HOT_QUERIES = {
+    # routers/statistics.py team statistics, last N matches
+    'team_finished_matches': lambda sample: select(Match).where(
+        _live_team(sample), Match.status == 'finished', Match.is_deleted == False
+    ).order_by(Match.match_date.desc()).limit(10),
+    # ml_service recent form before a kickoff
+    'team_recent_form': lambda sample: select(Match).where(
+        _live_team(sample), Match.match_date < sample['match_date'],
+        Match.status == 'finished', Match.is_deleted == False
+    ).order_by(Match.match_date.desc()).limit(5),
+    # statistics_service / ml_service head-to-head
+    'head_to_head': lambda sample: select(Match).where(
+        or_(
+            and_(Match.home_team_id == sample['home_team_id'], Match.away_team_id == sample['away_team_id']),
+            and_(Match.home_team_id == sample['away_team_id'], Match.away_team_id == sample['home_team_id'])
+        ),
+        Match.status == 'finished', Match.is_deleted == False
+    ).order_by(Match.match_date.desc()).limit(5),
+    # routers/matches.py list filtered by status, first keyset page
+    'matches_by_status': lambda sample: select(Match).where(
+        Match.is_deleted == False, Match.status == 'finished'
+    ).order_by(Match.match_date.desc(), Match.id.desc()).limit(21),
+    # routers/matches.py list filtered by team, next keyset page
+    'matches_by_team': lambda sample: select(Match).where(
+        Match.is_deleted == False, _live_team(sample), Match.match_date < sample['match_date']
+    ).order_by(Match.match_date.desc(), Match.id.desc()).limit(21),
+    # team_stats_service form refresh within a season
+    'team_season_form': lambda sample: select(Match.home_team_id, Match.winner).where(
+        Match.season_id == sample['season_id'], Match.status == 'finished',
+        Match.is_deleted == False, _live_team(sample)
+    ).order_by(Match.match_date.desc()).limit(5),
+    # tasks/prediction_tasks.py upcoming matches to predict
+    'upcoming_matches': lambda sample: select(Match).where(
+        Match.status == 'scheduled', Match.is_deleted == False
+    ).order_by(Match.match_date, Match.id).limit(50),
+    # tasks/prediction_tasks.py matches already predicted in a batch
+    'batch_existing_predictions': lambda sample: select(Prediction.match_id).where(
+        Prediction.batch_id == sample['batch_id'], Prediction.match_id.in_(sample['match_ids'])
+    ),
+    # tasks/prediction_tasks.py evaluation queue
+    'pending_evaluation': lambda sample: select(Prediction, Match.winner).join(Match).where(
+        Match.status == 'finished', Match.winner.isnot(None), Prediction.result_status == 'pending'
+    ),
+    # routers/predictions.py list filtered by status
+    'predictions_by_status': lambda sample: select(Prediction).where(
+        Prediction.result_status == 'correct'
+    ).order_by(Prediction.created_at.desc(), Prediction.id.desc()).limit(21),
+    # routers/predictions.py list filtered by match
+    'predictions_for_match': lambda sample: select(Prediction).where(
+        Prediction.match_id == sample['match_id']
+    ).order_by(Prediction.created_at.desc(), Prediction.id.desc()).limit(21)
+}
+
+async def load_sample(conn) -> dict:
+    """IDs of a finished match in the middle of the data set and its batch"""
+    row = await conn.fetchrow(
+        "SELECT m.id, m.home_team_id, m.away_team_id, m.season_id, m.match_date, p.batch_id "
+        "FROM matches m JOIN predictions p ON p.match_id = m.id "
+        "WHERE m.status = 'finished' ORDER BY m.match_date DESC OFFSET 100 LIMIT 1"
+    )
+    if row is None:
+        return None
+    match_ids = await conn.fetch(
+        "SELECT id FROM matches WHERE status = 'scheduled' ORDER BY match_date LIMIT 50"
+    )
+    return {
+        'match_id': row['id'],
+        'home_team_id': row['home_team_id'],
+        'away_team_id': row['away_team_id'],
+        'season_id': row['season_id'],
+        'match_date': row['match_date'] + timedelta(seconds=1),
+        'batch_id': row['batch_id'],
+        'match_ids': [record['id'] for record in match_ids] or [row['id']]
+    }
+
+def plan_nodes(node: dict):
+    yield node
+    for child in node.get('Plans', []):
+        yield from plan_nodes(child)
+
+def seq_scans(plan: dict) -> list:
+    return sorted({
+        node['Relation Name'] for node in plan_nodes(plan)
+        if node['Node Type'] == 'Seq Scan' and node.get('Relation Name') in CHECKED_TABLES
+    })
+
+async def explain_all() -> dict:
+    """Name -> top plan node of every hot query; None when the database has no seeded data"""
+    conn = await asyncpg.connect(DATABASE_URL)
+    try:
+        sample = await load_sample(conn)
+        if sample is None:
+            return None
+        plans = {}
+        for name, build in HOT_QUERIES.items():
+            sql = str(build(sample).compile(dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True}))
+            result = await conn.fetchval(f"EXPLAIN (FORMAT JSON) {sql}")
+            plans[name] = (json.loads(result) if isinstance(result, str) else result)[0]['Plan']
+        return plans
+    finally:
+        await conn.close()
+
+@pytest.fixture(scope="module")
+def plans():
+    plans = asyncio.run(explain_all())
+    if plans is None:
+        pytest.fail("No finished matches with predictions; seed the database with benchmarks/seed.py")
+    return plans
+
+@pytest.mark.parametrize("name", list(HOT_QUERIES))
+def test_hot_query_uses_an_index(plans, name):
+    assert seq_scans(plans[name]) == [], json.dumps(plans[name], indent=2)
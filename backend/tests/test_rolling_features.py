@@ -0,0 +1,136 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.services.feature_store import FEATURE_COLUMNS, ROLLING_ENGINE_MIN_BATCH, FeatureStore
+from app.services.match_history import MatchHistoryIndex
+from app.services.rolling_features import RollingFeatureEngine
+
+TEAMS = [f"team-{i}" for i in range(8)]
+
+def make_match(i, home, away, season, kickoff, home_goals, away_goals, winner='auto', status='finished'):
+    if winner == 'auto':
+        if home_goals is None or away_goals is None:
+            winner = None
+        else:
+            winner = 'home' if home_goals > away_goals else 'away' if home_goals < away_goals else 'draw'
+    return SimpleNamespace(
+        id=f"match-{i}", home_team_id=home, away_team_id=away, season_id=season, match_date=kickoff,
+        home_goals=home_goals, away_goals=away_goals, winner=winner, status=status, is_deleted=False,
+        updated_at=kickoff
+    )
+
+def round_robin(teams):
+    """Rounds of a double round-robin (circle method); every team plays once per round"""
+    rounds, rotation = [], list(teams)
+    for _ in range(len(teams) - 1):
+        pairs = [(rotation[i], rotation[-1 - i]) for i in range(len(teams) // 2)]
+        rounds.append(pairs)
+        rotation = [rotation[0], rotation[-1]] + rotation[1:-1]
+    return rounds + [[(away, home) for home, away in pairs] for pairs in rounds]
+
+def synthetic_history(seed=3):
+    """Two seasons of rounds kicking off together, some results without goals or winner"""
+    rng = np.random.default_rng(seed)
+    matches = []
+    for season_number, season in enumerate(("2023", "2024")):
+        start = datetime(2023 + season_number, 8, 1, 15, tzinfo=timezone.utc)
+        for round_number, pairs in enumerate(round_robin(TEAMS)):
+            # A whole round shares a kick-off, so same-day matches must not see each other
+            kickoff = start + timedelta(days=7 * round_number)
+            for home, away in pairs:
+                home_goals, away_goals = int(rng.poisson(1.5)), int(rng.poisson(1.1))
+                winner = 'auto'
+                if len(matches) % 17 == 5:
+                    home_goals = away_goals = None  # finished without a recorded score
+                elif len(matches) % 13 == 7:
+                    winner = None  # finished with goals but no winner (the bulk import allows it)
+                matches.append(make_match(len(matches), home, away, season, kickoff, home_goals, away_goals, winner))
+    return matches
+
+@pytest.fixture(scope="module")
+def history():
+    return synthetic_history()
+
+@pytest.fixture(scope="module")
+def store(history):
+    store = FeatureStore()
+    store.history = MatchHistoryIndex()
+    for match in history:
+        store.history.upsert_match(match)
+    store.history.is_loaded = True
+    return store
+
+@pytest.fixture(scope="module")
+def fixtures(history):
+    """Every played match (as of its own kick-off) plus upcoming fixtures after the last result"""
+    last = max(match.match_date for match in history)
+    upcoming = [
+        make_match(10_000 + i, home, away, "2024", last + timedelta(days=1 + i // 4), None, None, None, status='scheduled')
+        for i, (home, away) in enumerate(zip(TEAMS, TEAMS[1:] + TEAMS[:1]))
+    ]
+    return history + upcoming
+
+def test_history_covers_the_edge_cases(history):
+    kickoffs = [match.match_date for match in history]
+    assert len(set(kickoffs)) < len(kickoffs)
+    assert any(match.home_goals is None for match in history)
+    assert any(match.winner is None and match.home_goals is not None for match in history)
+    assert len({match.season_id for match in history}) == 2
+
+def test_engine_matches_per_match_features(store, history, fixtures):
+    engine = RollingFeatureEngine.from_records(store.history.records())
+    rolling = engine.compute_for(fixtures)
+
+    for i, match in enumerate(fixtures):
+        expected = store.compute_features(match)
+        points = rolling['home_season_wins'][i] * 3 + rolling['home_season_draws'][i]
+        assert rolling['home_form_index'][i] == expected['home_form_index'], match.id
+        assert rolling['away_form_index'][i] == expected['away_form_index'], match.id
+        assert rolling['home_expected_goals'][i] == expected['home_expected_goals'], match.id
+        assert rolling['away_expected_goals'][i] == expected['away_expected_goals'], match.id
+        assert rolling['btts_probability'][i] / 100 == pytest.approx(expected['btts_probability'], abs=1e-12), match.id
+        assert points == expected['home_points'], match.id
+        assert rolling['home_season_goals_for'][i] == expected['home_goals_for'], match.id
+        assert rolling['away_season_goals_against'][i] == expected['away_goals_against'], match.id
+
+def test_season_stats_do_not_cross_seasons(store, history):
+    first_of_2024 = min((m for m in history if m.season_id == "2024"), key=lambda m: m.match_date)
+    engine = RollingFeatureEngine.from_records(store.history.records())
+
+    rolling = engine.compute_for([first_of_2024])
+
+    assert rolling['home_season_matches_played'][0] == 0
+    assert rolling['away_season_matches_played'][0] == 0
+    # Form still looks back into the previous season
+    assert store.compute_features(first_of_2024)['home_form_index'] == rolling['home_form_index'][0]
+
+def test_match_without_winner_counts_as_played_but_not_as_a_result():
+    no_winner = make_match(1, "a", "b", "s", datetime(2024, 1, 1, tzinfo=timezone.utc), 2, 1, winner=None)
+    next_match = make_match(2, "a", "b", "s", datetime(2024, 1, 8, tzinfo=timezone.utc), None, None, None, status='scheduled')
+    engine = RollingFeatureEngine.from_records([no_winner])
+    single = FeatureStore()
+    single.history = MatchHistoryIndex()
+    single.history.upsert_match(no_winner)
+
+    rolling = engine.compute_for([next_match])
+    expected = single.compute_features(next_match)
+
+    assert rolling['home_season_matches_played'][0] == 1
+    assert rolling['home_season_wins'][0] == rolling['away_season_losses'][0] == 0
+    assert expected['home_points'] == expected['away_points'] == 0
+    assert expected['home_win_rate'] == 0
+    assert rolling['home_form_index'][0] == expected['home_form_index'] == 0.0
+
+def test_batch_features_equal_per_match_features(store, fixtures):
+    assert len(fixtures) >= ROLLING_ENGINE_MIN_BATCH
+
+    batch = store.compute_features_batch(fixtures)
+
+    for match, row in zip(fixtures, batch):
+        expected = store.compute_features(match)
+        assert list(row) == FEATURE_COLUMNS
+        for column in FEATURE_COLUMNS:
+            assert row[column] == pytest.approx(expected[column], abs=1e-12), (match.id, column)
@@ -0,0 +1,123 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from app.services.match_history import MatchRecord
+from app.services.scoreline_model import (
+    OVER_UNDER_LINES, SCORELINE_MIN_MATCHES, DixonColesModel, ScorelineService, scoreline_markets
+)
+
+HOME_ADVANTAGE = 0.25
+
+def simulate(seed=7, teams=12, seasons=4):
+    """Double round-robins with known strengths, an hour apart so time decay hardly weighs in"""
+    rng = np.random.default_rng(seed)
+    team_ids = [f"T{team:02d}" for team in range(teams)]
+    attack = rng.normal(0.0, 0.3, teams)
+    attack -= attack.mean()
+    defence = rng.normal(0.1, 0.2, teams)
+
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    records = []
+    for season in range(seasons):
+        for home in range(teams):
+            for away in range(teams):
+                if home == away:
+                    continue
+                lam = np.exp(HOME_ADVANTAGE + attack[home] + defence[away])
+                mu = np.exp(attack[away] + defence[home])
+                records.append(MatchRecord(
+                    id=str(len(records)), home_team_id=team_ids[home], away_team_id=team_ids[away],
+                    season_id=str(season), match_date=start + timedelta(hours=len(records)),
+                    home_goals=int(rng.poisson(lam)), away_goals=int(rng.poisson(mu)), winner=None
+                ))
+    return records, team_ids, attack, defence
+
+@pytest.fixture(scope="module")
+def fitted():
+    records, team_ids, attack, defence = simulate()
+    model = ScorelineService().fit_records(records)
+    return model, team_ids, attack, defence
+
+def model_with(rho):
+    return DixonColesModel({"A": 0, "B": 1}, np.zeros(2), np.zeros(2), HOME_ADVANTAGE, rho, matches=0)
+
+@pytest.mark.parametrize("rho", [-0.15, 0.0, 0.12])
+def test_score_matrices_are_distributions(rho):
+    lam = np.array([0.3, 1.4, 2.2, 3.5])
+    mu = np.array([0.4, 1.1, 0.9, 2.8])
+
+    matrices = model_with(rho).score_matrices(lam, mu)
+
+    assert matrices.shape == (4, 11, 11)
+    assert (matrices >= 0).all()
+    np.testing.assert_allclose(matrices.sum(axis=(1, 2)), 1.0)
+
+def test_without_correlation_the_matrix_is_independent_poisson():
+    matrices = model_with(0.0).score_matrices(np.array([1.3]), np.array([0.8]), max_goals=30)
+
+    home = matrices[0].sum(axis=1)
+    assert home[0] == pytest.approx(np.exp(-1.3))
+    assert (np.arange(31) * home).sum() == pytest.approx(1.3)
+
+def test_markets_are_consistent():
+    lam = np.array([0.5, 1.4, 2.6])
+    mu = np.array([2.0, 1.1, 0.7])
+    matrices = model_with(-0.1).score_matrices(lam, mu)
+
+    markets = scoreline_markets(matrices)
+
+    np.testing.assert_allclose(markets['home_win_prob'] + markets['draw_prob'] + markets['away_win_prob'], 1.0)
+    np.testing.assert_allclose(markets['draw_prob'], np.trace(matrices, axis1=1, axis2=2))
+    np.testing.assert_allclose(markets['btts_prob'], 1 - matrices[:, 0, :].sum(axis=1) - matrices[:, :, 0].sum(axis=1) + matrices[:, 0, 0])
+    for line in OVER_UNDER_LINES:
+        name = f"{line}".replace('.', '_')
+        np.testing.assert_allclose(markets[f'over_{name}'] + markets[f'under_{name}'], 1.0)
+    # A higher line is never more likely to be exceeded
+    assert (markets['over_1_5'] >= markets['over_2_5']).all()
+    assert (markets['over_2_5'] >= markets['over_3_5']).all()
+    # Stronger home side, likelier home win
+    assert markets['home_win_prob'][0] < markets['home_win_prob'][1] < markets['home_win_prob'][2]
+
+    # Correct scores are sorted and index the matrix
+    assert (np.diff(markets['correct_score_prob'], axis=1) <= 0).all()
+    rows = np.arange(3)[:, None]
+    np.testing.assert_allclose(
+        matrices[rows, markets['correct_score_home'], markets['correct_score_away']],
+        markets['correct_score_prob']
+    )
+
+def test_fit_recovers_simulated_strengths(fitted):
+    model, team_ids, attack, defence = fitted
+    order = [model.team_index[team_id] for team_id in team_ids]
+
+    assert np.corrcoef(model.attack[order], attack)[0, 1] > 0.8
+    assert np.corrcoef(model.defence[order], defence)[0, 1] > 0.7
+    assert model.home_advantage == pytest.approx(HOME_ADVANTAGE, abs=0.1)
+    assert -0.2 <= model.rho <= 0.2
+
+def test_expected_goals_use_league_average_for_unknown_teams(fitted):
+    model = fitted[0]
+
+    lam, mu = model.expected_goals(["T00", "new"], ["new", "T00"])
+
+    assert lam[0] == pytest.approx(np.exp(model.home_advantage + model.attack[model.team_index["T00"]] + model.defence.mean()))
+    assert mu[1] == pytest.approx(np.exp(model.attack[model.team_index["T00"]] + model.defence.mean()))
+
+def test_warm_start_refit_matches_a_cold_fit():
+    records, _, _, _ = simulate(seed=11, teams=8, seasons=3)
+    service = ScorelineService()
+    service.model = service.fit_records(records[:-20])
+
+    warm = service.fit_records(records)
+    cold = ScorelineService().fit_records(records)
+
+    np.testing.assert_allclose(warm.attack, cold.attack, atol=1e-3)
+    assert warm.home_advantage == pytest.approx(cold.home_advantage, abs=1e-3)
+
+def test_too_little_history_fits_nothing():
+    records, _, _, _ = simulate(teams=4, seasons=1)
+
+    assert len(records) < SCORELINE_MIN_MATCHES
+    assert ScorelineService().fit_records(records) is None
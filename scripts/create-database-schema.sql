@@ -21,7 +21,8 @@ CREATE TABLE public.seasons (
   start_date DATE,
   end_date DATE,
   is_active BOOLEAN NOT NULL DEFAULT false,
-  created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+  created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+  updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
 );
 
 -- Table: teams
@@ -53,11 +54,15 @@ CREATE TABLE public.matches (
   referee TEXT,
   weather_conditions JSONB,
   is_deleted BOOLEAN NOT NULL DEFAULT false,
+  finished_at TIMESTAMP WITH TIME ZONE, -- when the current result was recorded; NULL while not finished
   created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
   updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
   CONSTRAINT different_teams CHECK (home_team_id != away_team_id)
 );
 
+-- One live match per fixture; a soft-deleted fixture can be created again
+CREATE UNIQUE INDEX uq_matches_fixture ON public.matches(home_team_id, away_team_id, match_date) WHERE is_deleted = false;
+
 -- Table: models (ML model metadata)
 CREATE TABLE public.models (
   id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
@@ -106,7 +111,22 @@ CREATE TABLE public.predictions (
   confidence_score DECIMAL(4,3) NOT NULL CHECK (confidence_score >= 0 AND confidence_score <= 1),
   result_status TEXT DEFAULT 'pending' CHECK (result_status IN ('pending', 'correct', 'wrong')),
   features_used JSONB DEFAULT '{}',
-  created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+  created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+  CONSTRAINT uq_predictions_match_batch UNIQUE (match_id, batch_id)
+);
+
+-- Table: prediction_daily_rollups (per-day, per-model prediction counts by confidence bucket)
+CREATE TABLE public.prediction_daily_rollups (
+  day DATE NOT NULL, -- UTC date of predictions.created_at
+  model_id UUID NOT NULL REFERENCES public.models(id),
+  confidence_bucket INTEGER NOT NULL CHECK (confidence_bucket BETWEEN 0 AND 5),
+  total INTEGER NOT NULL DEFAULT 0,
+  correct INTEGER NOT NULL DEFAULT 0,
+  wrong INTEGER NOT NULL DEFAULT 0,
+  pending INTEGER NOT NULL DEFAULT 0,
+  confidence_sum DECIMAL(14,3) NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+  PRIMARY KEY (day, model_id, confidence_bucket)
 );
 
 -- Table: training_logs
@@ -115,7 +135,9 @@ CREATE TABLE public.training_logs (
   model_id UUID NOT NULL REFERENCES public.models(id),
   started_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
   completed_at TIMESTAMP WITH TIME ZONE,
-  status TEXT NOT NULL DEFAULT 'running' CHECK (status IN ('running', 'completed', 'failed')),
+  status TEXT NOT NULL DEFAULT 'running' CHECK (status IN ('queued', 'running', 'completed', 'failed')),
+  stage TEXT, -- current training step, e.g. 'fitting'
+  progress INTEGER NOT NULL DEFAULT 0 CHECK (progress BETWEEN 0 AND 100),
   accuracy_achieved DECIMAL(5,2),
   training_samples INTEGER,
   validation_samples INTEGER,
@@ -149,6 +171,17 @@ CREATE TABLE public.team_stats (
   UNIQUE(team_id, season_id)
 );
 
+-- Table: match_features (point-in-time feature store)
+CREATE TABLE public.match_features (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  match_id UUID NOT NULL REFERENCES public.matches(id),
+  feature_version TEXT NOT NULL,
+  as_of TIMESTAMP WITH TIME ZONE NOT NULL, -- features only use data strictly before this instant
+  features JSONB NOT NULL DEFAULT '{}',
+  computed_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+  CONSTRAINT uq_match_features_match_version UNIQUE (match_id, feature_version)
+);
+
 -- Table: logs (audit trail)
 CREATE TABLE public.logs (
   id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
@@ -176,6 +209,11 @@ CREATE TRIGGER trg_update_users_updated_at
   FOR EACH ROW
   EXECUTE FUNCTION public.update_updated_at_column();
 
+CREATE TRIGGER trg_update_seasons_updated_at
+  BEFORE UPDATE ON public.seasons
+  FOR EACH ROW
+  EXECUTE FUNCTION public.update_updated_at_column();
+
 CREATE TRIGGER trg_update_teams_updated_at
   BEFORE UPDATE ON public.teams
   FOR EACH ROW
@@ -196,70 +234,29 @@ CREATE TRIGGER trg_update_team_stats_updated_at
   FOR EACH ROW
   EXECUTE FUNCTION public.update_updated_at_column();
 
--- Function to update team stats after match completion
-CREATE OR REPLACE FUNCTION public.update_team_stats()
-RETURNS TRIGGER AS $$
-BEGIN
-  -- Only update if match status changed to 'finished'
-  IF NEW.status = 'finished' AND (OLD.status IS NULL OR OLD.status != 'finished') THEN
-    -- Update home team stats
-    INSERT INTO public.team_stats (team_id, season_id, matches_played, wins, draws, losses, goals_for, goals_against, goal_difference, points)
-    VALUES (NEW.home_team_id, NEW.season_id, 1, 
-            CASE WHEN NEW.winner = 'home' THEN 1 ELSE 0 END,
-            CASE WHEN NEW.winner = 'draw' THEN 1 ELSE 0 END,
-            CASE WHEN NEW.winner = 'away' THEN 1 ELSE 0 END,
-            COALESCE(NEW.home_goals, 0),
-            COALESCE(NEW.away_goals, 0),
-            COALESCE(NEW.home_goals, 0) - COALESCE(NEW.away_goals, 0),
-            CASE WHEN NEW.winner = 'home' THEN 3 WHEN NEW.winner = 'draw' THEN 1 ELSE 0 END)
-    ON CONFLICT (team_id, season_id) DO UPDATE SET
-      matches_played = team_stats.matches_played + 1,
-      wins = team_stats.wins + CASE WHEN NEW.winner = 'home' THEN 1 ELSE 0 END,
-      draws = team_stats.draws + CASE WHEN NEW.winner = 'draw' THEN 1 ELSE 0 END,
-      losses = team_stats.losses + CASE WHEN NEW.winner = 'away' THEN 1 ELSE 0 END,
-      goals_for = team_stats.goals_for + COALESCE(NEW.home_goals, 0),
-      goals_against = team_stats.goals_against + COALESCE(NEW.away_goals, 0),
-      goal_difference = team_stats.goal_difference + (COALESCE(NEW.home_goals, 0) - COALESCE(NEW.away_goals, 0)),
-      points = team_stats.points + CASE WHEN NEW.winner = 'home' THEN 3 WHEN NEW.winner = 'draw' THEN 1 ELSE 0 END;
-
-    -- Update away team stats
-    INSERT INTO public.team_stats (team_id, season_id, matches_played, wins, draws, losses, goals_for, goals_against, goal_difference, points)
-    VALUES (NEW.away_team_id, NEW.season_id, 1,
-            CASE WHEN NEW.winner = 'away' THEN 1 ELSE 0 END,
-            CASE WHEN NEW.winner = 'draw' THEN 1 ELSE 0 END,
-            CASE WHEN NEW.winner = 'home' THEN 1 ELSE 0 END,
-            COALESCE(NEW.away_goals, 0),
-            COALESCE(NEW.home_goals, 0),
-            COALESCE(NEW.away_goals, 0) - COALESCE(NEW.home_goals, 0),
-            CASE WHEN NEW.winner = 'away' THEN 3 WHEN NEW.winner = 'draw' THEN 1 ELSE 0 END)
-    ON CONFLICT (team_id, season_id) DO UPDATE SET
-      matches_played = team_stats.matches_played + 1,
-      wins = team_stats.wins + CASE WHEN NEW.winner = 'away' THEN 1 ELSE 0 END,
-      draws = team_stats.draws + CASE WHEN NEW.winner = 'draw' THEN 1 ELSE 0 END,
-      losses = team_stats.losses + CASE WHEN NEW.winner = 'home' THEN 1 ELSE 0 END,
-      goals_for = team_stats.goals_for + COALESCE(NEW.away_goals, 0),
-      goals_against = team_stats.goals_against + COALESCE(NEW.home_goals, 0),
-      goal_difference = team_stats.goal_difference + (COALESCE(NEW.away_goals, 0) - COALESCE(NEW.home_goals, 0)),
-      points = team_stats.points + CASE WHEN NEW.winner = 'away' THEN 3 WHEN NEW.winner = 'draw' THEN 1 ELSE 0 END;
-  END IF;
-  
-  RETURN NEW;
-END;
-$$ LANGUAGE plpgsql;
-
-CREATE TRIGGER trg_update_team_stats_on_match_finish
-  AFTER UPDATE ON public.matches
-  FOR EACH ROW
-  EXECUTE FUNCTION public.update_team_stats();
+-- team_stats is maintained by the API (TeamStatsService) in the same transaction as
+-- the match write, with a nightly full recompute as a consistency check. There is
+-- deliberately no trigger on matches: it would count every result twice.
+DROP TRIGGER IF EXISTS trg_update_team_stats_on_match_finish ON public.matches;
+DROP FUNCTION IF EXISTS public.update_team_stats();
 
 -- Indexes for performance
 CREATE INDEX idx_matches_date ON public.matches(match_date);
-CREATE INDEX idx_matches_status ON public.matches(status);
-CREATE INDEX idx_matches_teams ON public.matches(home_team_id, away_team_id);
 CREATE INDEX idx_matches_season ON public.matches(season_id);
-CREATE INDEX idx_predictions_match ON public.predictions(match_id);
+CREATE INDEX idx_matches_updated_at ON public.matches(updated_at); -- conditional GET validators
+CREATE INDEX idx_matches_finished_at ON public.matches(finished_at) WHERE finished_at IS NOT NULL; -- warm-start retrain
+CREATE INDEX idx_team_stats_updated_at ON public.team_stats(updated_at);
 CREATE INDEX idx_predictions_batch ON public.predictions(batch_id);
-CREATE INDEX idx_predictions_status ON public.predictions(result_status);
+-- Team pairs (head-to-head) use uq_matches_fixture; (match_id, batch_id) lookups use uq_predictions_match_batch
+
+-- Hot match queries: live matches of one team (home or away side), by status, newest first.
+-- An OR over both sides becomes a BitmapOr of the two indexes.
+CREATE INDEX idx_matches_home_status_date ON public.matches(home_team_id, status, match_date DESC) WHERE is_deleted = false;
+CREATE INDEX idx_matches_away_status_date ON public.matches(away_team_id, status, match_date DESC) WHERE is_deleted = false;
+CREATE INDEX idx_matches_status_date ON public.matches(status, match_date DESC, id DESC) WHERE is_deleted = false;
+CREATE INDEX idx_predictions_status_created ON public.predictions(result_status, created_at DESC, id DESC);
+CREATE INDEX idx_predictions_pending ON public.predictions(match_id) WHERE result_status = 'pending'; -- evaluation queue
+CREATE INDEX idx_prediction_rollups_model_day ON public.prediction_daily_rollups(model_id, day);
 CREATE INDEX idx_training_logs_model ON public.training_logs(model_id);
 CREATE INDEX idx_team_stats_team ON public.team_stats(team_id);
 CREATE INDEX idx_team_stats_season ON public.team_stats(season_id);
@@ -267,6 +264,12 @@ CREATE INDEX idx_logs_user ON public.logs(user_id);
 CREATE INDEX idx_logs_timestamp ON public.logs(timestamp);
 CREATE INDEX idx_logs_action ON public.logs(action_type);
 
+-- Keyset pagination: (sort column, id) matches the ORDER BY ... DESC, id DESC of the list endpoints
+CREATE INDEX idx_matches_date_id ON public.matches(match_date, id);
+CREATE INDEX idx_predictions_created_id ON public.predictions(created_at, id);
+CREATE INDEX idx_models_created_id ON public.models(created_at, id);
+CREATE INDEX idx_logs_timestamp_id ON public.logs(timestamp, id);
+
 -- Row-level security
 ALTER TABLE public.users ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.teams ENABLE ROW LEVEL SECURITY;
@@ -276,6 +279,8 @@ ALTER TABLE public.predictions ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.training_logs ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.team_stats ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.logs ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.match_features ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.prediction_daily_rollups ENABLE ROW LEVEL SECURITY;
 
 -- Public policies (open by default for now - can be restricted later)
 CREATE POLICY public_users ON public.users FOR ALL USING (true) WITH CHECK (true);
@@ -286,6 +291,8 @@ CREATE POLICY public_predictions ON public.predictions FOR ALL USING (true) WITH
 CREATE POLICY public_training_logs ON public.training_logs FOR ALL USING (true) WITH CHECK (true);
 CREATE POLICY public_team_stats ON public.team_stats FOR ALL USING (true) WITH CHECK (true);
 CREATE POLICY public_logs ON public.logs FOR ALL USING (true) WITH CHECK (true);
+CREATE POLICY public_match_features ON public.match_features FOR ALL USING (true) WITH CHECK (true);
+CREATE POLICY public_prediction_daily_rollups ON public.prediction_daily_rollups FOR ALL USING (true) WITH CHECK (true);
 
 -- Realtime support
 ALTER TABLE public.matches REPLICA IDENTITY FULL;